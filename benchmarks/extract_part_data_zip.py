@@ -0,0 +1,37 @@
+import tempfile
+import timeit
+import zipfile
+from pathlib import Path
+
+from manager import utils
+
+from .synthetic import write_synthetic_bundle
+
+PART_COUNTS = [10, 100, 1000]
+REPEATS = 3
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        print(f"{'parts':>8} {'best (s)':>10} {'per part (ms)':>14}")
+
+        for number_of_parts in PART_COUNTS:
+            zip_path = write_synthetic_bundle(
+                Path(temporary_folder) / f"bundle_{number_of_parts}.zip",
+                number_of_parts
+            )
+
+            with zipfile.ZipFile(zip_path) as zip_file:
+                best = min(timeit.repeat(
+                    lambda: utils.extract_part_data_zip(zip_file),
+                    number=1, repeat=REPEATS
+                ))
+
+            print(
+                f"{number_of_parts:>8} {best:>10.4f} "
+                f"{best / number_of_parts * 1000:>14.4f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
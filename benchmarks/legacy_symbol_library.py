@@ -0,0 +1,73 @@
+import re
+import tempfile
+import timeit
+from pathlib import Path
+
+from manager import utils
+
+from .synthetic import LEGACY_SYMBOL_TEMPLATE, synthetic_part_number
+
+SYMBOL_COUNTS = [1000, 10000]
+REPEATS = 3
+
+# Previous regex based parser, kept as baseline
+_component_regex = re.compile(r'DEF[\s\S]*?ENDDEF')
+_name_regex = re.compile(r'(?<=DEF\W)(.*?)(?=\W)')
+
+
+def regex_parse_file(library_path: Path):
+    with open(library_path, 'r') as file:
+        library_as_string = file.read()
+
+    symbols = []
+    for match in _component_regex.findall(library_as_string):
+        name_match = _name_regex.search(match)
+        symbols.append((name_match.group(0), match[name_match.end():]))
+
+    return symbols
+
+
+def write_synthetic_library(library_path: Path, number_of_symbols: int) -> Path:
+    symbols = [
+        utils.LegacySymbol.from_str(LEGACY_SYMBOL_TEMPLATE.format(
+            part_number=synthetic_part_number(index)
+        ))
+        for index in range(number_of_symbols)
+    ]
+    utils.LegacySymbolLibrary(symbols).to_file(library_path)
+
+    return library_path
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        print(f"{'symbols':>8} {'regex (s)':>10} {'stream (s)':>11} {'to_str (s)':>11}")
+
+        for number_of_symbols in SYMBOL_COUNTS:
+            library_path = write_synthetic_library(
+                Path(temporary_folder) / f"library_{number_of_symbols}.lib",
+                number_of_symbols
+            )
+
+            regex_best = min(timeit.repeat(
+                lambda: regex_parse_file(library_path),
+                number=1, repeat=REPEATS
+            ))
+            stream_best = min(timeit.repeat(
+                lambda: utils.LegacySymbolLibrary.from_file(library_path),
+                number=1, repeat=REPEATS
+            ))
+
+            library = utils.LegacySymbolLibrary.from_file(library_path)
+            to_str_best = min(timeit.repeat(
+                library.to_str, number=1, repeat=REPEATS
+            ))
+
+            print(
+                f"{number_of_symbols:>8} {regex_best:>10.4f} "
+                f"{stream_best:>11.4f} {to_str_best:>11.4f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import timeit
+
+from manager.utils.search_index import SearchIndex
+
+from .synthetic import synthetic_part_number
+
+PART_COUNTS = [1000, 10000, 50000]
+REPEATS = 5
+
+MANUFACTURERS = ["Synthetic Inc.", "Texas Instruments", "Analog Devices", "Microchip"]
+PACKAGES = ["SOT-23", "SOIC", "QFN", "TSSOP"]
+CATEGORIES = ["Integrated_Circuits", "Transistors", "Diodes"]
+PIN_COUNTS = [3, 8, 16, 48]
+
+# (query, fuzzy)
+QUERIES = [
+    (synthetic_part_number(123), False),
+    ("syn0001", False),
+    ("texas package:soic pins:8", False),
+    ("microhcip", True),
+]
+
+
+def synthetic_entries(number_of_parts: int):
+    return [
+        {
+            'part_number': synthetic_part_number(index),
+            'manufacturer': MANUFACTURERS[index % len(MANUFACTURERS)],
+            'category': CATEGORIES[index % len(CATEGORIES)],
+            'package_category': PACKAGES[index % len(PACKAGES)],
+            'pin_count': PIN_COUNTS[index % len(PIN_COUNTS)],
+        }
+        for index in range(number_of_parts)
+    ]
+
+
+def main():
+    print(f"{'parts':>8} {'build (s)':>10}  query times (ms)")
+
+    for number_of_parts in PART_COUNTS:
+        entries = synthetic_entries(number_of_parts)
+
+        build_best = min(timeit.repeat(
+            lambda: SearchIndex(entries), number=1, repeat=REPEATS
+        ))
+
+        search_index = SearchIndex(entries)
+        search_index.index_trigrams()
+
+        query_bests = []
+        for query, fuzzy in QUERIES:
+            query_bests.append(min(timeit.repeat(
+                lambda: search_index.search(query, fuzzy=fuzzy, limit=20),
+                number=1, repeat=REPEATS
+            )))
+
+        print(
+            f"{number_of_parts:>8} {build_best:>10.4f}  " +
+            ' '.join(f"{best * 1000:>8.2f}" for best in query_bests)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import subprocess
+import sys
+
+# Import time of the CLI, measured with `python -X importtime`.  Exits with
+#   an error if any invocation goes over its budget, or imports kiutils when
+#   it has no need to
+REPEATS = 5
+
+# (arguments, import time budget in ms, if kiutils may be imported)
+INVOCATIONS = [
+    (['--help'], 100, False),
+    (['set-project', '--help'], 100, False),
+    (['add', '--help'], 100, False),
+    (['post-migrate', '--help'], 100, False),
+    (['new', '--help'], 100, False),
+    (['remove', '--help'], 100, False),
+    (['gc', '--help'], 100, False),
+    (['search', '--help'], 100, False),
+    (['list', '--help'], 100, False),
+    (['verify', '--help'], 100, False),
+    (['watch', '--help'], 100, False),
+    (['serve', '--help'], 100, False),
+    (['stop', '--help'], 100, False),
+]
+
+
+def measure_imports(arguments):
+    # Returns total import time in ms, and names of imported modules
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'manager'] + arguments,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True
+    )
+
+    total_us = 0
+    modules = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        _, cumulative_us, module_name = line[len('import time:'):].split('|')
+        modules.add(module_name.strip())
+
+        # Only top level imports, nested imports are in their cumulative time
+        if not module_name[1:].startswith(' '):
+            total_us += int(cumulative_us)
+
+    return total_us / 1000, modules
+
+
+def main():
+    over_budget = False
+
+    print(f"{'command':<26} {'best (ms)':>10} {'budget (ms)':>12} {'kiutils':>8}")
+
+    for arguments, budget_ms, kiutils_allowed in INVOCATIONS:
+        measurements = [measure_imports(arguments) for _ in range(REPEATS)]
+        best_ms = min(total_ms for total_ms, _ in measurements)
+        kiutils_imported = any(
+            module == 'kiutils' or module.startswith('kiutils.')
+            for module in measurements[0][1]
+        )
+
+        failed = best_ms > budget_ms or (kiutils_imported and not kiutils_allowed)
+        over_budget = over_budget or failed
+
+        print(
+            f"{' '.join(arguments):<26} {best_ms:>10.1f} {budget_ms:>12} "
+            f"{'yes' if kiutils_imported else 'no':>8}"
+            f"{'  OVER BUDGET' if failed else ''}"
+        )
+
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
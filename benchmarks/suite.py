@@ -0,0 +1,337 @@
+import argparse
+import json
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .synthetic import migrate_legacy_libraries, write_synthetic_bundle
+
+# Benchmark suite of the import pipeline on synthetic Component Search Engine
+#   bundles.  Inputs (bundles, projects to merge into) are built up front and
+#   each case is timed in a fresh process, so the peak memory reported is
+#   that of the case alone
+#   Run `python -m benchmarks.suite --help` for the options
+
+CASES = ['extract', 'import', 'import-folder', 'legacy-parse', 'legacy-serialize', 'post-migrate']
+
+GROUP = 'Extern'
+# Bundles of a run alternate between these categories, so imports and
+#   post-migrate touch more than one library
+PART_CATEGORIES = ["Integrated Circuits", "Transistors"]
+
+
+def peak_rss() -> Tuple[Optional[int], Optional[int]]:
+    # Peak resident set size in bytes of this process, and of its largest
+    #   finished child process (worker processes).  None where unsupported
+    try:
+        import resource
+    except ImportError:
+        return None, None
+
+    # Kilobytes on Linux, bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+
+    return (
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    )
+
+
+####################################
+# Inputs
+
+
+def write_bundles(folder: Path, number_of_parts: int, model_size: int, number_of_bundles: int) -> List[Path]:
+    # number_of_parts spread over number_of_bundles zips
+    bundle_paths = []
+
+    first_index = 0
+    for bundle_index in range(number_of_bundles):
+        bundle_parts = number_of_parts // number_of_bundles
+        if bundle_index < number_of_parts % number_of_bundles:
+            bundle_parts += 1
+        if bundle_parts == 0:
+            continue
+
+        bundle_paths.append(write_synthetic_bundle(
+            folder / f"bundle_{bundle_index}.zip", bundle_parts,
+            part_category=PART_CATEGORIES[bundle_index % len(PART_CATEGORIES)],
+            model_size=model_size, first_index=first_index
+        ))
+        first_index += bundle_parts
+
+    return bundle_paths
+
+
+def unpack_bundles(folder: Path, bundle_paths: List[Path]) -> List[Path]:
+    # Bundles unpacked to folders, as shared storage holds them
+    unpacked_paths = []
+
+    for bundle_path in bundle_paths:
+        unpacked_path = folder / bundle_path.stem
+        with zipfile.ZipFile(bundle_path) as bundle_zip:
+            bundle_zip.extractall(unpacked_path)
+        unpacked_paths.append(unpacked_path)
+
+    return unpacked_paths
+
+
+def write_migrated_project(project_folder: Path, bundle_paths: List[Path]):
+    # Project with bundles imported, and its legacy libraries migrated as if
+    #   by KiCad, ready for post-migrate
+    from manager import utils
+
+    project_folder.mkdir()
+    utils.import_parts(bundle_paths, project_folder, GROUP, jobs=1)
+    migrate_legacy_libraries(project_folder)
+
+
+def write_legacy_library(library_path: Path, bundle_paths: List[Path]):
+    # Legacy library holding the symbol of every part of bundles
+    from manager import utils
+
+    symbols = []
+    for bundle_path in bundle_paths:
+        with zipfile.ZipFile(bundle_path) as bundle_zip:
+            for part_dict in utils.extract_part_data_zip(bundle_zip):
+                symbols.extend(utils.LegacySymbolLibrary.from_str(
+                    part_dict['legacy_schematic_symbol_file']
+                ).symbols)
+
+    utils.LegacySymbolLibrary(symbols).to_file(library_path)
+
+
+####################################
+# Cases
+#   Each returns (setup or None, function to time), both given the scratch
+#   folder of one repeat
+
+
+def extract_case(inputs: dict):
+    from manager import utils
+
+    def run(scratch_folder: Path):
+        for bundle_path in inputs['bundles']:
+            with zipfile.ZipFile(bundle_path) as bundle_zip:
+                utils.extract_part_data_zip(bundle_zip)
+
+    return None, run
+
+
+def import_case(inputs: dict):
+    from manager import utils
+
+    def setup(scratch_folder: Path):
+        (scratch_folder / 'project').mkdir()
+
+    def run(scratch_folder: Path):
+        utils.import_parts(
+            inputs['bundles'], scratch_folder / 'project', GROUP,
+            jobs=inputs['jobs']
+        )
+
+    return setup, run
+
+
+def import_folder_case(inputs: dict):
+    from manager import utils
+
+    def setup(scratch_folder: Path):
+        (scratch_folder / 'project').mkdir()
+
+    def run(scratch_folder: Path):
+        utils.import_parts(
+            inputs['unpacked_bundles'], scratch_folder / 'project', GROUP,
+            jobs=inputs['jobs']
+        )
+
+    return setup, run
+
+
+def legacy_parse_case(inputs: dict):
+    from manager import utils
+
+    def run(scratch_folder: Path):
+        utils.LegacySymbolLibrary.from_file(inputs['legacy_library'])
+
+    return None, run
+
+
+def legacy_serialize_case(inputs: dict):
+    from manager import utils
+
+    library = utils.LegacySymbolLibrary.from_file(inputs['legacy_library'])
+
+    def run(scratch_folder: Path):
+        library.to_str()
+
+    return None, run
+
+
+def post_migrate_case(inputs: dict):
+    from manager import utils
+
+    def setup(scratch_folder: Path):
+        shutil.copytree(inputs['migrated_project'], scratch_folder / 'project')
+
+    def run(scratch_folder: Path):
+        utils.merge_newly_migrated_symbol_libraries(
+            scratch_folder / 'project', GROUP, jobs=inputs['jobs']
+        )
+
+    return setup, run
+
+
+CASE_FUNCTIONS = {
+    'extract': extract_case,
+    'import': import_case,
+    'import-folder': import_folder_case,
+    'legacy-parse': legacy_parse_case,
+    'legacy-serialize': legacy_serialize_case,
+    'post-migrate': post_migrate_case,
+}
+
+
+def run_case(case: str, inputs: dict, repeats: int, scratch_folder: Path) -> dict:
+    # Runs in its own process.  Setup of each repeat is not timed
+    setup, run = CASE_FUNCTIONS[case](inputs)
+
+    timings = []
+    for repeat in range(repeats):
+        repeat_folder = scratch_folder / f"{case}_{repeat}"
+        repeat_folder.mkdir()
+
+        if setup is not None:
+            setup(repeat_folder)
+
+        start = time.perf_counter()
+        run(repeat_folder)
+        timings.append(time.perf_counter() - start)
+
+        shutil.rmtree(repeat_folder)
+
+    peak_rss_self, peak_rss_workers = peak_rss()
+
+    return {
+        'best_seconds': min(timings),
+        'peak_rss': peak_rss_self,
+        'peak_rss_workers': peak_rss_workers,
+    }
+
+
+####################################
+# Reporting
+
+
+def format_bytes(number_of_bytes: Optional[int]) -> str:
+    if number_of_bytes is None:
+        return '-'
+    return f"{number_of_bytes / 2**20:.1f}"
+
+
+def print_results(results: List[dict]):
+    print(
+        f"{'case':<17} {'parts':>7} {'model (B)':>10} {'best (s)':>10} "
+        f"{'parts/s':>10} {'MB/s':>8} {'RSS (MiB)':>10} {'workers (MiB)':>14}"
+    )
+
+    for result in results:
+        print(
+            f"{result['case']:<17} {result['parts']:>7} "
+            f"{result['model_size']:>10} {result['best_seconds']:>10.4f} "
+            f"{result['parts_per_second']:>10.1f} "
+            f"{result['megabytes_per_second']:>8.2f} "
+            f"{format_bytes(result['peak_rss']):>10} "
+            f"{format_bytes(result['peak_rss_workers']):>14}"
+        )
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.suite',
+        description="Time the import pipeline on synthetic Component Search Engine bundles."
+    )
+    parser.add_argument('--parts', type=int, nargs='+', default=[10, 100, 1000],
+                        help="Part counts to benchmark")
+    parser.add_argument('--model-sizes', type=int, nargs='+', default=[1024],
+                        help="Sizes in bytes of each part's 3D model")
+    parser.add_argument('--bundles', type=int, default=4,
+                        help="Number of zips the parts are spread over")
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help="Worker processes of import and post-migrate")
+    parser.add_argument('--repeats', type=int, default=3,
+                        help="Times each case is run, best time is reported")
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=CASES)
+    parser.add_argument('--json', type=Path, default=None,
+                        help="Also write results to this file")
+    options = parser.parse_args(arguments)
+
+    # Fresh interpreter per case, so peak memory of previous cases and of
+    #   building inputs is not counted
+    spawn_context = multiprocessing.get_context('spawn')
+
+    results = []
+    with tempfile.TemporaryDirectory() as temporary_folder:
+        temporary_folder = Path(temporary_folder)
+
+        for model_size in options.model_sizes:
+            for number_of_parts in options.parts:
+                inputs_folder = temporary_folder / f"inputs_{number_of_parts}_{model_size}"
+                inputs_folder.mkdir()
+
+                bundle_paths = write_bundles(
+                    inputs_folder, number_of_parts, model_size, options.bundles
+                )
+                inputs = {'bundles': bundle_paths, 'jobs': options.jobs}
+
+                if 'import-folder' in options.cases:
+                    inputs['unpacked_bundles'] = unpack_bundles(
+                        inputs_folder, bundle_paths
+                    )
+
+                if 'legacy-parse' in options.cases or 'legacy-serialize' in options.cases:
+                    inputs['legacy_library'] = inputs_folder / 'library.lib'
+                    write_legacy_library(inputs['legacy_library'], bundle_paths)
+
+                if 'post-migrate' in options.cases:
+                    inputs['migrated_project'] = inputs_folder / 'migrated_project'
+                    write_migrated_project(inputs['migrated_project'], bundle_paths)
+
+                for case in options.cases:
+                    with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor:
+                        result = executor.submit(
+                            run_case, case, inputs, options.repeats,
+                            temporary_folder
+                        ).result()
+
+                    best_seconds = result['best_seconds']
+                    # Models are only read out of bundles when importing
+                    model_bytes = number_of_parts * model_size \
+                        if case in ('import', 'import-folder') else 0
+
+                    results.append({
+                        'case': case,
+                        'parts': number_of_parts,
+                        'model_size': model_size,
+                        **result,
+                        'parts_per_second': number_of_parts / best_seconds,
+                        'megabytes_per_second': model_bytes / 1e6 / best_seconds,
+                    })
+
+                shutil.rmtree(inputs_folder)
+
+    print_results(results)
+
+    if options.json is not None:
+        with open(options.json, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+import zipfile
+from pathlib import Path, PurePosixPath
+
+# Synthetic Component Search Engine (CSE) bundles for benchmarking.
+#   Layout mirrors a CSE download:
+#       {part}/part_info.txt
+#       {part}/KiCad/{part}.lib
+#       {part}/KiCad/{part}.kicad_mod
+#       {part}/3D/{part}.stp
+
+PART_INFO_TEMPLATE = (
+    "Manufacturer=Synthetic Inc.\n"
+    "PartNumber={part_number}\n"
+    "PartCategory={part_category}\n"
+    "PackageCategory=SOT-23\n"
+    "PinCount=3\n"
+    "Version=1.2\n"
+    "Released=2022-01-01T00:00:00\n"
+    "Downloaded=2022-06-01T00:00:00\n"
+    "3D=Y"
+)
+
+LEGACY_SYMBOL_TEMPLATE = (
+    "EESchema-LIBRARY Version 2.3\n"
+    "#encoding utf-8\n"
+    "#\n"
+    "# {part_number}\n"
+    "#\n"
+    "DEF {part_number} IC 0 30 Y Y 1 F N\n"
+    "F0 \"IC\" 550 300 50 H V L CNN\n"
+    "F1 \"{part_number}\" 550 200 50 H V L CNN\n"
+    "F2 \"{part_number}\" 550 100 50 H I L CNN\n"
+    "F3 \"\" 550 0 50 H I L CNN\n"
+    "DRAW\n"
+    "X 1 1 0 0 200 R 50 50 0 0 P\n"
+    "X 2 2 0 -100 200 R 50 50 0 0 P\n"
+    "X 3 3 700 0 200 L 50 50 0 0 P\n"
+    "P 5 0 1 6 200 100 500 100 500 -200 200 -200 200 100 N\n"
+    "ENDDRAW\n"
+    "ENDDEF\n"
+    "#\n"
+    "#End Library\n"
+)
+
+FOOTPRINT_TEMPLATE = (
+    "(module \"{part_number}\" (layer F.Cu)\n"
+    "  (descr \"{part_number}\")\n"
+    "  (fp_text reference IC** (at 0 0) (layer F.SilkS)\n"
+    "    (effects (font (size 1.27 1.27) (thickness 0.254)))\n"
+    "  )\n"
+    "  (fp_text value \"{part_number}\" (at 0 0) (layer F.SilkS) hide\n"
+    "    (effects (font (size 1.27 1.27) (thickness 0.254)))\n"
+    "  )\n"
+    "  (fp_line (start -1.5 -0.7) (end 1.5 -0.7) (layer F.Fab) (width 0.2))\n"
+    "  (pad 1 smd rect (at -1 1) (size 0.6 0.8) (layers F.Cu F.Paste F.Mask))\n"
+    "  (pad 2 smd rect (at 1 1) (size 0.6 0.8) (layers F.Cu F.Paste F.Mask))\n"
+    "  (pad 3 smd rect (at 0 -1) (size 0.6 0.8) (layers F.Cu F.Paste F.Mask))\n"
+    "  (model {part_number}.stp\n"
+    "    (at (xyz 0 0 0))\n"
+    "    (scale (xyz 1 1 1))\n"
+    "    (rotate (xyz 0 0 0))\n"
+    "  )\n"
+    ")\n"
+)
+
+
+def synthetic_part_number(index: int) -> str:
+    return f"SYN{index:06d}-T"
+
+
+def write_synthetic_bundle(zip_path: Path, number_of_parts: int,
+                           part_category: str = "Integrated Circuits",
+                           model_size: int = 1024, first_index: int = 0) -> Path:
+    # Parts are numbered from first_index, so bundles with different
+    #   first_index hold different parts
+    model_payload = b"ISO-10303-21;\n" + b"0" * max(model_size - 14, 0)
+
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        for index in range(first_index, first_index + number_of_parts):
+            part_number = synthetic_part_number(index)
+
+            zip_file.writestr(
+                f"{part_number}/part_info.txt",
+                PART_INFO_TEMPLATE.format(
+                    part_number=part_number, part_category=part_category
+                )
+            )
+            zip_file.writestr(
+                f"{part_number}/KiCad/{part_number}.lib",
+                LEGACY_SYMBOL_TEMPLATE.format(part_number=part_number)
+            )
+            zip_file.writestr(
+                f"{part_number}/KiCad/{part_number}.kicad_mod",
+                FOOTPRINT_TEMPLATE.format(part_number=part_number)
+            )
+            zip_file.writestr(
+                f"{part_number}/3D/{part_number}.stp", model_payload
+            )
+
+    return zip_path
+
+
+def migrate_legacy_libraries(project_folder: Path):
+    # Does what KiCad's `Migrate Libraries` button does to every legacy
+    #   symbol library of project: writes a .kicad_sym next to the .lib and
+    #   points its library table entry at it
+    import kiutils.libraries
+    import kiutils.symbol
+
+    from manager import utils
+
+    symbol_library_table_path = utils.get_symbol_library_table(project_folder)
+    symbol_library_table = kiutils.libraries.LibTable.from_file(
+        symbol_library_table_path
+    )
+
+    for symbol_lib in symbol_library_table.libs:
+        if symbol_lib.type != 'Legacy':
+            continue
+
+        legacy_lib_path = project_folder / \
+            Path(symbol_lib.uri).relative_to(utils.KICAD_PROJECT_ENV_VAR)
+        legacy_library = utils.LegacySymbolLibrary.from_file(legacy_lib_path)
+
+        migrated_lib = kiutils.symbol.SymbolLib(
+            version='20211014', generator='kicad_symbol_editor'
+        )
+        for legacy_symbol in legacy_library.symbols:
+            migrated_lib.symbols.append(
+                utils.convert_legacy_symbol(legacy_symbol)
+            )
+        migrated_lib.to_file(legacy_lib_path.with_suffix('.kicad_sym'))
+
+        symbol_lib.type = 'KiCad'
+        symbol_lib.uri = str(PurePosixPath(symbol_lib.uri).with_suffix('.kicad_sym'))
+
+    symbol_library_table.to_file(symbol_library_table_path)
@@ -0,0 +1,80 @@
+import importlib
+import os
+import pathlib
+import sys
+
+import click
+
+# Subcommands each live in their own module, which is only imported once the
+#   subcommand is used (or listed by `--help`).  Subcommand modules import
+#   `manager.utils` (and so kiutils) within their command functions, so
+#   listing them stays cheap too
+
+GROUP = "Extern"
+
+PROJECT_FOLDER_ENVIROMENT_VAR = "KICAD_PROJECT_FOLDER"
+
+
+class LazyGroup(click.Group):
+    """Click group importing its subcommands on first use."""
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Command name -> "module:attribute" of command
+        self.lazy_commands = {} if lazy_commands is None else lazy_commands
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, command_name):
+        if command_name in self.lazy_commands:
+            module_name, attribute_name = \
+                self.lazy_commands[command_name].split(':')
+
+            module = importlib.import_module(module_name)
+            return getattr(module, attribute_name)
+
+        return super().get_command(ctx, command_name)
+
+
+def kicad_project_folder_option(function):
+    function = click.argument('kicad_project_folder',
+                              type=click.Path(exists=True))(function)
+    return function
+
+
+def get_project_folder():
+    return os.environ.get(PROJECT_FOLDER_ENVIROMENT_VAR)
+
+
+def ensure_project_folder_is_set():
+    kicad_project_folder = get_project_folder()
+    if kicad_project_folder is None:
+        print("ERROR: Project folder not set!  Set with command `set-project`",
+              file=sys.stderr)
+        sys.exit(1)
+
+    return pathlib.Path(kicad_project_folder)
+
+
+def run_operation(operation, kicad_project_folder, **arguments):
+    # Operation is sent to the daemon serving project if there is one, as it
+    #   has project files loaded already.  Otherwise it is run here
+    from .. import daemon
+
+    response = daemon.send_request(kicad_project_folder, operation, arguments)
+    if response is None:
+        from ..operations import OPERATIONS
+        return OPERATIONS[operation](str(kicad_project_folder), GROUP, **arguments)
+
+    if not response['ok']:
+        raise click.ClickException(response['error'])
+
+    return response['result']
+
+
+def print_stage_timings(stage_timings):
+    print("Stage timings:")
+    for stage, seconds in stage_timings.items():
+        print(f"  {stage:<10} {seconds:8.3f} s")
+    print(f"  {'total':<10} {sum(stage_timings.values()):8.3f} s")
@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+
+import click
+
+from . import ensure_project_folder_is_set, print_stage_timings, run_operation
+
+
+@click.command()
+@click.argument('bundles', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--jobs', '-j', type=int, default=None,
+              help="Number of worker processes extracting bundles.  Defaults to number of CPUs.")
+@click.option('--dedupe-models', is_flag=True,
+              help="Store 3D models once per unique contents in a shared model store.")
+@click.option('--incremental', is_flag=True,
+              help="Skip parts already installed unchanged, and replace installed parts that have a newer version.")
+@click.option('--convert-symbols', is_flag=True,
+              help="Convert legacy symbols to modern symbols while importing, instead of migrating them in KiCad.")
+@click.option('--no-footprint-cache', is_flag=True,
+              help="Upgrade every footprint instead of reusing upgrades cached by earlier imports.")
+@click.option('--link-models', is_flag=True,
+              help="Hard link 3D models of unpacked bundles into the project instead of copying them.  Linked models share contents with the bundle's files.")
+@click.option('--profile', type=click.Choice(['text', 'json', 'cprofile']),
+              is_flag=False, flag_value='text', default=None,
+              help="Profile import stages.  `text` prints a breakdown per stage, `json` dumps it, `cprofile` also dumps cProfile statistics.")
+@click.option('--profile-output', type=click.Path(dir_okay=False), default=None,
+              help="File `--profile json` or `--profile cprofile` writes to.  Defaults to import-profile.json and import.prof.")
+def add_parts(bundles, jobs, dedupe_models, incremental, convert_symbols, no_footprint_cache, link_models, profile, profile_output):
+    # Bundles are Component Search Engine .zip files, folders they were
+    #   unpacked to, or folders containing either
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    cprofile_output = None
+    if profile == 'cprofile':
+        cprofile_output = os.path.abspath(profile_output or 'import.prof')
+
+    # Absolute, as daemon may run in another working directory
+    result = run_operation(
+        'add', kicad_project_folder,
+        bundles=[os.path.abspath(bundle) for bundle in bundles],
+        jobs=jobs, dedupe_models=dedupe_models, incremental=incremental,
+        convert_symbols=convert_symbols,
+        footprint_cache=not no_footprint_cache, link_models=link_models,
+        profile=profile is not None, cprofile_output=cprofile_output
+    )
+
+    if result['bundles'] == 0:
+        print("ERROR: No .zip files or part folders found!", file=sys.stderr)
+        sys.exit(1)
+
+    if profile is not None:
+        print_profile(result['profile'], profile, profile_output, cprofile_output)
+
+    stage_timings = result['stage_timings']
+    action_counts = result['action_counts']
+
+    for conversion_warning in result['conversion_warnings']:
+        print(f"WARNING: {conversion_warning}", file=sys.stderr)
+
+    if incremental:
+        print(
+            f"{action_counts['new']} new, {action_counts['update']} updated, "
+            f"{action_counts['unchanged']} unchanged, "
+            f"{action_counts['outdated']} outdated parts"
+        )
+
+        if action_counts['new'] + action_counts['update'] == 0:
+            print_stage_timings(stage_timings)
+            return
+
+    if convert_symbols:
+        print_stage_timings(stage_timings)
+        return
+
+    print(
+        "Part has legacy symbol files.  Do the following to have them be editable:\n"
+        "- Quit KiCad (if not closed already)\n"
+        "- Open KiCad (to refresh libraries)\n"
+        "- Enter KiCad's `Symbol Editor` for the project\n"
+        "- Open `Preferences > Manage Symbol Libraries...` and go to `Project Specific Libraries` tab\n"
+        "- Find all entries starting with `LEGACY_` in the nickname\n"
+        "- One at a time, click each `LEGACY_` entry and press `Migrate Libraries` button\n"
+        "- Press `OK` to save the library entries and close the symbol library manager\n"
+        "- Quit KiCad\n"
+        "- Run this script's `post-migrate` command\n"
+        "- Open KiCad and use parts"
+    )
+
+    print_stage_timings(stage_timings)
+
+
+def print_profile(profile_report, profile, profile_output, cprofile_output):
+    if profile == 'json':
+        json_output = profile_output or 'import-profile.json'
+        with open(json_output, 'w') as file:
+            json.dump(profile_report, file, indent=2)
+
+        print(f"Profile written to {json_output}")
+        return
+
+    from ..utils.profiling import format_report
+
+    print(format_report(profile_report))
+
+    if cprofile_output is not None:
+        print(
+            f"cProfile statistics written to {cprofile_output} "
+            f"(view with `python -m pstats {cprofile_output}`)"
+        )
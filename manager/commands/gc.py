@@ -0,0 +1,17 @@
+import click
+
+from . import ensure_project_folder_is_set, run_operation
+
+
+@click.command()
+@click.option('--dry-run', is_flag=True, help="Only list unreferenced models.")
+def collect_garbage(dry_run):
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    removed_blobs = run_operation('gc', kicad_project_folder, dry_run=dry_run)
+
+    for blob in removed_blobs:
+        print(blob)
+
+    action = "unreferenced" if dry_run else "removed"
+    print(f"{len(removed_blobs)} models {action}")
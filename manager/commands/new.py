@@ -0,0 +1,15 @@
+import click
+
+from . import ensure_project_folder_is_set, run_operation
+
+
+@click.command()
+@click.argument('part_name', type=str)
+@click.argument('part_category', type=str)
+def new_part(part_name, part_category):
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    run_operation(
+        'new', kicad_project_folder,
+        part_name=part_name, part_category=part_category
+    )
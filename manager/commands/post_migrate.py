@@ -0,0 +1,12 @@
+import click
+
+from . import ensure_project_folder_is_set, run_operation
+
+
+@click.command()
+@click.option('--jobs', '-j', type=int, default=None,
+              help="Number of worker processes merging categories.  Defaults to number of CPUs.")
+def merge_migrated_symbol_libraries(jobs):
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    run_operation('post-migrate', kicad_project_folder, jobs=jobs)
@@ -0,0 +1,20 @@
+import click
+
+from . import ensure_project_folder_is_set, run_operation
+
+
+@click.command()
+@click.argument('part_numbers', nargs=-1, required=True)
+def remove_parts(part_numbers):
+    # Models in the model store (`--dedupe-models`) may be shared by other
+    #   parts, and are removed by `gc` instead
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    deleted_libraries = run_operation(
+        'remove', kicad_project_folder, part_numbers=list(part_numbers)
+    )
+
+    for library in deleted_libraries:
+        print(f"Removed empty library {library}")
+
+    print(f"{len(set(part_numbers))} parts removed")
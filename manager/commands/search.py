@@ -0,0 +1,61 @@
+import json
+
+import click
+
+from . import ensure_project_folder_is_set, run_operation
+
+
+def print_parts(part_entries, as_json):
+    if as_json:
+        print(json.dumps(part_entries, indent=2))
+        return
+
+    for entry in part_entries:
+        pin_count = entry.get('pin_count', -1)
+
+        print(
+            f"{entry['part_number']:<32} "
+            f"{entry.get('manufacturer') or '-':<24} "
+            f"{entry['category']:<24} "
+            f"{entry.get('package_category') or '-':<16} "
+            f"{pin_count if pin_count != -1 else '-':>4}"
+        )
+
+
+@click.command()
+@click.argument('query', nargs=-1, required=True)
+@click.option('--fuzzy', is_flag=True,
+              help="Also match words with typos.")
+@click.option('--limit', '-n', type=int, default=20, show_default=True,
+              help="Maximum number of parts listed.")
+@click.option('--json', 'as_json', is_flag=True,
+              help="Print part index entries as JSON.")
+def search_parts(query, fuzzy, limit, as_json):
+    # Every word of query has to match the start of a word of a part's
+    #   number, manufacturer, category, package or pin count.  Words prefixed
+    #   with a field only search that field, i.e. `package:soic pins:8`
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    part_entries = run_operation(
+        'search', kicad_project_folder,
+        query=' '.join(query), fuzzy=fuzzy, limit=limit
+    )
+
+    print_parts(part_entries, as_json)
+    if not as_json and len(part_entries) == 0:
+        print("No parts found")
+
+
+@click.command()
+@click.option('--category', default=None,
+              help="Only list parts of this category.")
+@click.option('--json', 'as_json', is_flag=True,
+              help="Print part index entries as JSON.")
+def list_parts(category, as_json):
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    part_entries = run_operation(
+        'list', kicad_project_folder, category=category
+    )
+
+    print_parts(part_entries, as_json)
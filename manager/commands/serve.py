@@ -0,0 +1,28 @@
+import sys
+
+import click
+
+from . import ensure_project_folder_is_set, GROUP
+
+
+@click.command()
+def serve():
+    from .. import daemon
+
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    server = daemon.DaemonServer(kicad_project_folder, GROUP)
+    print(f"Serving {server.project_folder} on {server.socket_path}")
+
+    server.serve()
+
+
+@click.command()
+def stop():
+    from .. import daemon
+
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    if daemon.send_request(kicad_project_folder, 'shutdown', {}) is None:
+        print("ERROR: No daemon serving project!", file=sys.stderr)
+        sys.exit(1)
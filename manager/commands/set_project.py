@@ -0,0 +1,20 @@
+import os
+import pathlib
+
+import click
+
+from . import kicad_project_folder_option, PROJECT_FOLDER_ENVIROMENT_VAR
+
+
+@click.command()
+@kicad_project_folder_option
+def set_project_path(kicad_project_folder):
+    import dotenv
+
+    working_directory = pathlib.Path(os.getcwd()).resolve()
+
+    dotenv.set_key(
+        dotenv_path=working_directory / '.env',
+        key_to_set=PROJECT_FOLDER_ENVIROMENT_VAR,
+        value_to_set=kicad_project_folder
+    )
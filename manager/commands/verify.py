@@ -0,0 +1,25 @@
+import sys
+
+import click
+
+from . import ensure_project_folder_is_set, run_operation
+
+
+@click.command()
+@click.option('--jobs', '-j', type=int, default=None,
+              help="Number of worker processes reading changed files.  Defaults to number of CPUs.")
+def verify_project(jobs):
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    result = run_operation('verify', kicad_project_folder, jobs=jobs)
+
+    for issue in result['issues']:
+        print(f"{issue['path']}: {issue['message']}")
+
+    print(
+        f"{len(result['issues'])} issues in {result['files_checked']} files "
+        f"({result['files_read']} read, rest unchanged since last check)"
+    )
+
+    if len(result['issues']) > 0:
+        sys.exit(1)
@@ -0,0 +1,40 @@
+import click
+
+from . import ensure_project_folder_is_set, run_operation, GROUP
+
+
+@click.command()
+@click.option('--jobs', '-j', type=int, default=None,
+              help="Number of worker processes merging categories.  Defaults to number of CPUs.")
+@click.option('--debounce', type=float, default=None,
+              help="Seconds without changes before migrated libraries are merged.")
+def watch(jobs, debounce):
+    from .. import watch as migration_watch
+
+    kicad_project_folder = ensure_project_folder_is_set()
+
+    def merge_migrated(nicknames):
+        try:
+            merged_nicknames = run_operation(
+                'post-migrate', kicad_project_folder,
+                jobs=jobs, nicknames=nicknames
+            )
+        except Exception as exception:
+            # Keep watching, merge is tried again once files change
+            print(f"ERROR: {exception}")
+            return
+
+        for nickname in merged_nicknames:
+            print(f"Merged {nickname}")
+
+    watcher = migration_watch.MigrationWatcher(
+        kicad_project_folder, GROUP, merge_migrated,
+        debounce=migration_watch.DEBOUNCE if debounce is None else debounce
+    )
+
+    print(f"Watching {kicad_project_folder} for migrated symbol libraries")
+
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
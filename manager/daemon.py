@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Long running server keeping parsed library tables, symbol indexes, part
+#   indexes and footprint listings of a project in memory between commands.
+#   CLI commands send their operation over a Unix socket as one line of JSON,
+#   and get back one line of JSON with its result.  Requests are handled one
+#   at a time, as every operation writes to the project
+#   A watcher thread polls files of the caches, so files edited outside the
+#   daemon (i.e. by KiCad) are dropped and reloaded
+
+# Seconds between polls of watched files
+WATCH_INTERVAL = 1.0
+
+
+def get_socket_path(project_folder: Path) -> Path:
+    # Unix socket paths are limited to around 100 characters, so socket is
+    #   named after a hash of project folder instead of placed inside it
+    project_hash = hashlib.sha256(
+        str(Path(project_folder).resolve()).encode('utf-8')
+    ).hexdigest()[:16]
+
+    runtime_folder = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return Path(runtime_folder) / f'kicad-component-manager-{project_hash}.sock'
+
+
+def send_request(project_folder: Path, operation: str, arguments: dict) -> Optional[dict]:
+    # Returns response of daemon serving project, or None if no daemon is
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+
+    socket_path = get_socket_path(project_folder)
+    if not socket_path.exists():
+        return None
+
+    request = {
+        'project_folder': str(Path(project_folder).resolve()),
+        'operation': operation,
+        'arguments': arguments,
+    }
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(socket_path))
+            client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+
+            with client.makefile('rb') as response_file:
+                response_line = response_file.readline()
+    except (ConnectionRefusedError, FileNotFoundError):
+        # Daemon exited without removing its socket
+        return None
+
+    if not response_line:
+        raise Exception("Daemon closed connection without responding")
+
+    return json.loads(response_line)
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = json.loads(self.rfile.readline())
+
+        try:
+            result = self.server.handle_request_dict(request)
+            response = {'ok': True, 'result': result}
+        except Exception as exception:
+            response = {'ok': False, 'error': str(exception)}
+
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class DaemonServer(socketserver.UnixStreamServer):
+    """Serves operations of one project until shut down."""
+
+    def __init__(self, project_folder: Path, group: str):
+        self.project_folder = Path(project_folder).resolve()
+        self.group = group
+        self.socket_path = get_socket_path(self.project_folder)
+
+        # Held while handling a request or polling watched files
+        self.lock = threading.Lock()
+        self._stop_watching = threading.Event()
+
+        if self.socket_path.exists():
+            if send_request(self.project_folder, 'ping', {}) is not None:
+                raise Exception(f"Daemon already serving {self.project_folder}")
+            self.socket_path.unlink()
+
+        super().__init__(str(self.socket_path), DaemonRequestHandler)
+
+    def handle_request_dict(self, request: dict):
+        from .operations import OPERATIONS
+
+        if Path(request['project_folder']) != self.project_folder:
+            raise Exception(
+                f"Daemon serves {self.project_folder}, not {request['project_folder']}"
+            )
+
+        operation = request['operation']
+        if operation == 'ping':
+            return None
+        if operation == 'shutdown':
+            # shutdown waits for serve_forever to return, so cannot be called
+            #   from within request
+            threading.Thread(target=self.shutdown).start()
+            return None
+
+        with self.lock:
+            return OPERATIONS[operation](
+                str(self.project_folder), self.group, **request['arguments']
+            )
+
+    def warm_caches(self):
+        from . import utils
+
+        for lib_type, library_table_path in [
+            ('fp_lib_table', utils.get_footprint_library_table(self.project_folder)),
+            ('sym_lib_table', utils.get_symbol_library_table(self.project_folder)),
+        ]:
+            if library_table_path.exists():
+                utils.load_library_table(lib_type, library_table_path)
+
+        # Fuzzy search is ready too, so searching the daemon is always fast
+        utils.PartIndex.for_group(
+            self.project_folder, utils.parts_folder, self.group
+        ).search_index.index_trigrams()
+        utils.get_footprint_files(self.project_folder, self.group)
+
+    def _watch(self):
+        from . import utils
+
+        while not self._stop_watching.wait(WATCH_INTERVAL):
+            with self.lock:
+                if len(utils.evict_stale_caches()) > 0:
+                    self.warm_caches()
+
+    def serve(self):
+        with self.lock:
+            self.warm_caches()
+
+        watcher = threading.Thread(target=self._watch, daemon=True)
+        watcher.start()
+
+        try:
+            self.serve_forever()
+        finally:
+            self._stop_watching.set()
+            self.server_close()
+            if self.socket_path.exists():
+                self.socket_path.unlink()
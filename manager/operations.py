@@ -0,0 +1,136 @@
+from pathlib import Path
+
+# Operations behind the CLI commands.  Run in the CLI process, or in the
+#   daemon serving the project if there is one.  Arguments and results only
+#   use JSON types, so they can be sent over the daemon's socket
+
+
+def run_profiled(operation, profile=False, cprofile_output=None):
+    # Returns (result of operation, profile report or None)
+    #   If cprofile_output is given, operation is also run under cProfile and
+    #   its statistics dumped there.  Only covers this process, not workers
+    if not profile and cprofile_output is None:
+        return operation(), None
+
+    from .utils import profiling
+
+    profiler = None
+    if cprofile_output is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    profiling.enable()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        result = operation()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile_output)
+
+        profile_report = profiling.report()
+        profiling.disable()
+
+    return result, profile_report
+
+
+def add_parts(project_folder: str, group: str, bundles, jobs=None, dedupe_models=False, incremental=False, convert_symbols=False, footprint_cache=True, link_models=False, profile=False, cprofile_output=None) -> dict:
+    from . import utils
+    from .utils.footprint_cache import FootprintCache
+
+    bundle_paths = utils.find_part_bundles(bundles)
+    if len(bundle_paths) == 0:
+        return {'bundles': 0}
+
+    (stage_timings, action_counts, conversion_warnings), profile_report = run_profiled(
+        lambda: utils.import_parts(
+            bundle_paths, Path(project_folder), group,
+            jobs=jobs, dedupe_models=dedupe_models, incremental=incremental,
+            convert_symbols=convert_symbols,
+            footprint_cache=FootprintCache.default() if footprint_cache else None,
+            link_models=link_models
+        ),
+        profile=profile, cprofile_output=cprofile_output
+    )
+
+    return {
+        'bundles': len(bundle_paths),
+        'stage_timings': stage_timings,
+        'action_counts': action_counts,
+        'conversion_warnings': conversion_warnings,
+        'profile': profile_report,
+    }
+
+
+def merge_migrated_symbol_libraries(project_folder: str, group: str, jobs=None, nicknames=None) -> list:
+    from . import utils
+
+    return utils.merge_newly_migrated_symbol_libraries(
+        Path(project_folder), group, jobs=jobs,
+        nicknames=None if nicknames is None else set(nicknames)
+    )
+
+
+def new_part(project_folder: str, group: str, part_name: str, part_category: str):
+    from . import utils
+
+    utils.new_part(Path(project_folder), part_name, part_category, group)
+
+
+def remove_parts(project_folder: str, group: str, part_numbers) -> list:
+    from . import utils
+
+    return utils.remove_parts(Path(project_folder), list(part_numbers), group)
+
+
+def collect_garbage(project_folder: str, group: str, dry_run=False) -> list:
+    from . import utils
+
+    removed_blobs = utils.collect_model_store_garbage(
+        Path(project_folder), group, dry_run=dry_run
+    )
+
+    return [str(blob) for blob in removed_blobs]
+
+
+def search_parts(project_folder: str, group: str, query: str, fuzzy=False, limit=None) -> list:
+    from . import utils
+
+    part_index = utils.PartIndex.for_group(
+        Path(project_folder), utils.parts_folder, group
+    )
+    return part_index.search(query, fuzzy=fuzzy, limit=limit)
+
+
+def list_parts(project_folder: str, group: str, category=None) -> list:
+    from . import utils
+
+    part_index = utils.PartIndex.for_group(
+        Path(project_folder), utils.parts_folder, group
+    )
+
+    categories = part_index.categories() if category is None else [category]
+    return [
+        part_index.get(part_number)
+        for part_category in categories
+        for part_number in part_index.parts_in_category(part_category)
+    ]
+
+
+def verify_project(project_folder: str, group: str, jobs=None) -> dict:
+    from .utils.verify import verify_project
+
+    return verify_project(Path(project_folder), group, jobs=jobs)
+
+
+OPERATIONS = {
+    'add': add_parts,
+    'post-migrate': merge_migrated_symbol_libraries,
+    'new': new_part,
+    'remove': remove_parts,
+    'gc': collect_garbage,
+    'search': search_parts,
+    'list': list_parts,
+    'verify': verify_project,
+}
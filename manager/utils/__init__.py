@@ -1,84 +1,165 @@
 import os
-from typing import List, Tuple, Optional
+import time
+import json
+from typing import TYPE_CHECKING, Dict, List, Set, Tuple, Optional, Union
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
 import re
+import shutil
+import hashlib
 import zipfile
-
-import kiutils.symbol
-import kiutils.libraries
-import kiutils.utils
-import kiutils.footprint
+from contextlib import nullcontext
+
+# kiutils (and process pools) are slow to import, so they are only imported
+#   by the functions using them.  Keeps startup of commands not needing them fast
+if TYPE_CHECKING:
+    import kiutils.libraries
+
+from .part_index import PartIndex, part_metadata_to_entry, evict_stale_part_indexes
+from .model_store import ModelStore
+from .transaction import Transaction, recover_transactions
+from . import profiling
+from . import kicad_sym_index
+from .kicad_sym_index import file_stat_key, kicad_symbol_index_path, \
+    get_kicad_symbol_index, append_kicad_symbols, replace_kicad_symbols, \
+    shift_offsets
+from .legacy_symbol_converter import convert_legacy_symbol, legacy_symbol_aliases
+from .footprint_cache import FootprintCache, footprint_model_paths, \
+    replace_footprint_model_paths, set_footprint_name
 
 
 @dataclass
 class LegacySymbol:
     rest_of_file: str = ""
     name: str = ""
-
-    __name_regex = re.compile(r'(?<=DEF\W)(.*?)(?=\W)')
+    # Lines before DEF that belong to symbol (i.e. `# NAME` comment block)
+    preamble: str = ""
 
     @classmethod
     def from_str(cls, symbol_as_string):
-        out = cls()
+        symbols = list(LegacySymbolLibraryReader(
+            symbol_as_string.splitlines(keepends=True)
+        ))
 
-        name_match = out.__name_regex.search(symbol_as_string)
+        # @TODO: Proper error handling
+        #   No DEF found, or more than one DEF
+        assert len(symbols) == 1
 
-        if name_match:
-            out.name = name_match.group(0)
+        return symbols[0]
 
-            rest_of_file_index = name_match.end()
-            out.rest_of_file = symbol_as_string[rest_of_file_index:]
-        else:
-            # @TODO: error on no name
-            pass
+    def to_str(self) -> str:
+        return f"{self.preamble}DEF {self.name} {self.rest_of_file}"
 
-        return out
 
-    def to_str(self) -> str:
-        return f"DEF {self.name} {self.rest_of_file}"
+class LegacySymbolLibraryReader:
+    """Line oriented streaming parser of legacy symbol libraries (.lib).
+
+    Iterating yields each `DEF ... ENDDEF` block as a LegacySymbol as soon as
+    it has been read, so libraries never have to be loaded whole.  Lines
+    outside of DEF blocks (comment blocks, DCM blocks, ...) are kept as the
+    preamble of the following symbol, or as the trailer if no symbol follows.
+    Header lines are available as `header` once the first symbol is read.
+    """
+
+    def __init__(self, lines):
+        # lines is any iterable of lines, including an open file
+        self._lines = lines
+
+        self.header = ""
+        self.trailer = ""
+
+    def __iter__(self):
+        pending_lines = []
+        in_header = True
+
+        lines = iter(self._lines)
+        for line in lines:
+            stripped_line = line.strip()
+
+            if in_header and (
+                stripped_line.startswith("EESchema-LIBRARY") or
+                stripped_line.startswith("#encoding")
+            ):
+                self.header += line
+                continue
+            in_header = False
+
+            if stripped_line == "#End Library":
+                break
+
+            if not stripped_line.startswith("DEF "):
+                pending_lines.append(line)
+                continue
+
+            # DEF line: `DEF name reference ...`
+            def_fields = line.split(maxsplit=2)
+            name = def_fields[1]
+            rest_of_def_line = def_fields[2] if len(def_fields) > 2 else ""
+
+            symbol_lines = [rest_of_def_line.rstrip('\r\n'), '\n']
+            for symbol_line in lines:
+                if symbol_line.strip() == "ENDDEF":
+                    symbol_lines.append(symbol_line.rstrip('\r\n'))
+                    break
+                symbol_lines.append(symbol_line)
+            else:
+                # @TODO: Proper error handling
+                raise Exception(f"Symbol {name} is missing its ENDDEF")
+
+            yield LegacySymbol(
+                rest_of_file=''.join(symbol_lines),
+                name=name,
+                preamble=''.join(pending_lines)
+            )
+
+            pending_lines = []
+
+        self.trailer = ''.join(pending_lines)
 
 
 @dataclass
 class LegacySymbolLibrary:
     symbols: List[LegacySymbol] = field(default_factory=list)
 
-    __component_regex = re.compile(r'DEF[\s\S]*?ENDDEF')
-
     # Taken from Component Search Engine KiCad .lib file
     __prefix = (
         "EESchema-LIBRARY Version 2.3\n"
         "#encoding utf-8\n"
     )
     __suffix = (
-        "\n#End Library"
+        "#End Library"
     )
 
-    def __init__(self, symbols=[]) -> None:
-        self.symbols = symbols
+    def __init__(self, symbols=None, header=None, trailer="") -> None:
+        self.symbols = [] if symbols is None else symbols
+        self.header = self.__prefix if not header else header
+        # Lines after last symbol before end of library
+        self.trailer = trailer
 
     @classmethod
     def from_file(cls, library_path: Path):
         with open(library_path, 'r') as file:
-            file_content = file.read()
-            return cls.from_str(file_content)
+            return cls.from_lines(file)
 
     @classmethod
     def from_str(cls, library_as_string: str):
-        out = cls()
-
-        matches = out.__component_regex.findall(library_as_string)
+        return cls.from_lines(library_as_string.splitlines(keepends=True))
 
-        out.symbols = [LegacySymbol().from_str(match) for match in matches]
+    @classmethod
+    def from_lines(cls, lines):
+        reader = LegacySymbolLibraryReader(lines)
+        symbols = list(reader)
 
-        return out
+        return cls(symbols, reader.header, reader.trailer)
 
     def to_str(self) -> str:
-        return self.__prefix + '\n'.join(symbol.to_str() for symbol in self.symbols) + self.__suffix
+        return self.header + \
+            ''.join(symbol.to_str() + '\n' for symbol in self.symbols) + \
+            self.trailer + self.__suffix
 
     def to_file(self, library_path: Path):
         self_as_string = self.to_str()
@@ -87,8 +168,298 @@ class LegacySymbolLibrary:
             return file.write(self_as_string)
 
     def merge(self, other):
-        # @TODO: Check duplicate names
-        return LegacySymbolLibrary(self.symbols + other.symbols)
+        names = set(symbol.name for symbol in self.symbols)
+        for symbol in other.symbols:
+            if symbol.name in names:
+                raise Exception(f"Symbol {symbol.name} already exists!")
+
+        return LegacySymbolLibrary(
+            self.symbols + other.symbols, self.header, self.trailer
+        )
+
+
+@dataclass
+class LegacySymbolIndex:
+    # Symbol name -> (offset of DEF line, offset after ENDDEF line)
+    symbols: Dict[str, Tuple[int, int]]
+    stat_key: Tuple[int, int]
+
+
+# Legacy symbol library path -> byte ranges of its symbols
+_legacy_symbol_indexes: Dict[Path, LegacySymbolIndex] = {}
+
+LEGACY_SYMBOL_INDEX_FORMAT_VERSION = 1
+
+
+def legacy_symbol_index_path(library_path: Path) -> Path:
+    # Index is kept beside its library, so a new process (without the
+    #   daemon) does not have to scan the whole library again
+    return library_path.with_name(f'.{library_path.name}.index.json')
+
+
+def _load_legacy_symbol_index(library_path: Path, stat_key: Tuple[int, int]) -> Optional[LegacySymbolIndex]:
+    # None if there is no saved index, or library changed since it was saved
+    try:
+        with open(legacy_symbol_index_path(library_path), 'r') as index_file:
+            saved_index = json.load(index_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if saved_index.get('version') != LEGACY_SYMBOL_INDEX_FORMAT_VERSION or \
+            tuple(saved_index['stat_key']) != stat_key:
+        return None
+
+    return LegacySymbolIndex(
+        {
+            name: tuple(symbol_range)
+            for name, symbol_range in saved_index['symbols'].items()
+        },
+        stat_key
+    )
+
+
+def _save_legacy_symbol_index(library_path: Path, symbol_index: LegacySymbolIndex):
+    # Saved index is only an optimization, so failing to save it is ignored
+    index_path = legacy_symbol_index_path(library_path)
+    temporary_path = index_path.with_suffix('.tmp')
+
+    try:
+        with open(temporary_path, 'w') as index_file:
+            json.dump(
+                {
+                    'version': LEGACY_SYMBOL_INDEX_FORMAT_VERSION,
+                    'stat_key': symbol_index.stat_key,
+                    'symbols': symbol_index.symbols,
+                },
+                index_file
+            )
+        temporary_path.replace(index_path)
+    except OSError:
+        pass
+
+
+def get_legacy_symbol_index(library_path: Path) -> LegacySymbolIndex:
+    # Only DEF and ENDDEF lines are looked at, no symbols are parsed.  Scans
+    #   are saved beside library, so library is only scanned again once it
+    #   was changed by something else (i.e. KiCad)
+    stat_key = file_stat_key(library_path)
+
+    symbol_index = _legacy_symbol_indexes.get(library_path)
+    if symbol_index is None or symbol_index.stat_key != stat_key:
+        symbol_index = _load_legacy_symbol_index(library_path, stat_key)
+
+    if symbol_index is None:
+        symbols = {}
+
+        with open(library_path, 'rb') as file:
+            offset = 0
+            symbol_name = None
+            symbol_start = 0
+
+            for line in file:
+                if line.startswith(b'DEF '):
+                    symbol_name = line.split(maxsplit=2)[1].decode('utf-8')
+                    symbol_start = offset
+                elif symbol_name is not None and line.strip() == b'ENDDEF':
+                    symbols[symbol_name] = (symbol_start, offset + len(line))
+                    symbol_name = None
+
+                offset += len(line)
+
+        symbol_index = LegacySymbolIndex(symbols, stat_key)
+        _save_legacy_symbol_index(library_path, symbol_index)
+
+    _legacy_symbol_indexes[library_path] = symbol_index
+
+    return symbol_index
+
+
+def get_legacy_symbol_names(library_path: Path):
+    return get_legacy_symbol_index(library_path).symbols.keys()
+
+
+LEGACY_LIBRARY_END = b'#End Library'
+
+
+def find_legacy_library_end(library_path: Path) -> int:
+    # Byte offset of `#End Library` line
+    #   Searched for backwards from end of file, so only the tail is read
+    with open(library_path, 'rb') as file:
+        file_size = file.seek(0, os.SEEK_END)
+
+        window_size = 4096
+        while True:
+            window_start = max(file_size - window_size, 0)
+            file.seek(window_start)
+            window = file.read()
+
+            end_index = window.rfind(LEGACY_LIBRARY_END)
+            while end_index > 0 and window[end_index - 1:end_index] != b'\n':
+                end_index = window.rfind(LEGACY_LIBRARY_END, 0, end_index)
+
+            if end_index >= 0 and (end_index > 0 or window_start == 0):
+                return window_start + end_index
+
+            if window_start == 0:
+                raise Exception(f"No `#End Library` found in {library_path}")
+
+            window_size *= 2
+
+
+def append_legacy_symbols(library_path: Path, symbols: List[LegacySymbol], transaction: Transaction):
+    # Write symbols in front of `#End Library` without touching the rest of
+    #   the library.  Caller is expected to have checked for duplicate names
+    end_offset = find_legacy_library_end(library_path)
+
+    appended_data = (
+        ''.join(symbol.to_str() + '\n' for symbol in symbols) +
+        LEGACY_LIBRARY_END.decode('utf-8')
+    ).encode('utf-8')
+
+    transaction.splice(library_path, end_offset, appended_data)
+
+    # Keep cached index valid instead of rescanning library
+    stat_key_before = file_stat_key(library_path)
+
+    def update_symbol_index():
+        symbol_index = _legacy_symbol_indexes.get(library_path)
+        if symbol_index is None or symbol_index.stat_key != stat_key_before:
+            return
+
+        offset = end_offset
+        for symbol in symbols:
+            symbol_bytes = (symbol.to_str() + '\n').encode('utf-8')
+            preamble_length = len(symbol.preamble.encode('utf-8'))
+
+            symbol_index.symbols[symbol.name] = (
+                offset + preamble_length, offset + len(symbol_bytes)
+            )
+            offset += len(symbol_bytes)
+
+        symbol_index.stat_key = file_stat_key(library_path)
+        _save_legacy_symbol_index(library_path, symbol_index)
+
+    transaction.on_commit(update_symbol_index)
+
+
+def replace_legacy_symbols(library_path: Path, replacements: Dict[str, LegacySymbol], new_symbols: List[LegacySymbol], transaction: Transaction):
+    # Swap DEF ... ENDDEF blocks of existing symbols in place, and append new
+    #   symbols.  Only the library from the first replaced symbol onward is
+    #   rewritten.  Comment blocks in front of replaced symbols are kept
+    symbol_index = get_legacy_symbol_index(library_path)
+    end_offset = find_legacy_library_end(library_path)
+
+    replaced_ranges = sorted(
+        symbol_index.symbols[name] for name in replacements
+    )
+    replacement_bytes = {
+        symbol_index.symbols[name]: f"DEF {symbol.name} {symbol.rest_of_file}\n".encode('utf-8')
+        for name, symbol in replacements.items()
+    }
+
+    splice_offset = replaced_ranges[0][0]
+
+    with open(library_path, 'rb') as file:
+        file.seek(splice_offset)
+        old_tail = file.read(end_offset - splice_offset)
+
+    new_tail = []
+    tail_offset = splice_offset
+    for symbol_range in replaced_ranges:
+        new_tail.append(old_tail[tail_offset - splice_offset:symbol_range[0] - splice_offset])
+        new_tail.append(replacement_bytes[symbol_range])
+        tail_offset = symbol_range[1]
+    new_tail.append(old_tail[tail_offset - splice_offset:])
+
+    new_tail += [
+        (symbol.to_str() + '\n').encode('utf-8') for symbol in new_symbols
+    ]
+    new_tail.append(LEGACY_LIBRARY_END)
+
+    transaction.splice(library_path, splice_offset, b''.join(new_tail))
+
+    # Offsets of most symbols moved, index is rebuilt on next use
+    transaction.on_commit(
+        lambda: _legacy_symbol_indexes.pop(library_path, None)
+    )
+
+
+def remove_legacy_symbols(library_path: Path, names: List[str], transaction: Transaction):
+    # Cut DEF ... ENDDEF blocks of symbols out of library by their byte
+    #   ranges, along with the `# name` comment block in front of them.  Only
+    #   the library from the first removed symbol onward is rewritten, and no
+    #   symbols are parsed.  Names not in library are ignored
+    symbol_index = get_legacy_symbol_index(library_path)
+
+    removed_symbols = sorted(
+        (symbol_index.symbols[name], name) for name in names
+        if name in symbol_index.symbols
+    )
+    if len(removed_symbols) == 0:
+        return
+
+    # Removed ranges are read with some bytes before them to find their
+    #   comment block
+    splice_offset = removed_symbols[0][0][0]
+    with open(library_path, 'rb') as file:
+        read_offset = max(splice_offset - 256, 0)
+        file.seek(read_offset)
+        old_tail = file.read()
+
+    def extend_to_comment_block(start: int, name: str) -> int:
+        # Comment block may name symbol by the sanitized form of its name,
+        #   as its file was named (i.e. `# MCP1402T-E_OT`)
+        comment_lines = set([b'#']) | set(
+            f'# {comment_name}'.encode('utf-8') for comment_name in (
+                name, cse_file_name_sanitization(name),
+                sanitize_for_filesystem(name)
+            )
+        )
+
+        while start > read_offset:
+            line_start = old_tail.rfind(b'\n', 0, start - read_offset - 1) + 1
+            # Line may continue before what was read
+            if line_start == 0 and read_offset > 0:
+                break
+            if old_tail[line_start:start - read_offset].strip() not in comment_lines:
+                break
+
+            start = read_offset + line_start
+
+        return start
+
+    removed_ranges = [
+        (extend_to_comment_block(start, name), end)
+        for (start, end), name in removed_symbols
+    ]
+    splice_offset = removed_ranges[0][0]
+
+    new_tail = []
+    tail_offset = splice_offset
+    for start, end in removed_ranges:
+        new_tail.append(old_tail[tail_offset - read_offset:start - read_offset])
+        tail_offset = end
+    new_tail.append(old_tail[tail_offset - read_offset:])
+
+    transaction.splice(library_path, splice_offset, b''.join(new_tail))
+
+    # Keep cached index valid by shifting symbols after each cut back,
+    #   instead of rescanning library
+    stat_key_before = symbol_index.stat_key
+
+    def update_symbol_index():
+        if _legacy_symbol_indexes.get(library_path) is not symbol_index or \
+                symbol_index.stat_key != stat_key_before:
+            return
+
+        for _, name in removed_symbols:
+            del symbol_index.symbols[name]
+
+        symbol_index.symbols = shift_offsets(symbol_index.symbols, removed_ranges)
+        symbol_index.stat_key = file_stat_key(library_path)
+        _save_legacy_symbol_index(library_path, symbol_index)
+
+    transaction.on_commit(update_symbol_index)
 
 
 @dataclass
@@ -208,11 +579,54 @@ def get_library_container(part_number: str, group: str, part_category: str, data
     assert False
 
 
-def ensure_part_containers(project_folder: Path, part_number: str, group: str, part_category: str, include_legacy=False):
+def get_model_store(project_folder: Path, group: str) -> ModelStore:
+    # Shared by all categories of group
+    return ModelStore(
+        project_folder, parts_folder / group / models_3d_folder / "store"
+    )
+
+
+# Footprint library folder (.pretty) -> (folder modification time, footprints)
+_footprint_listings: Dict[Path, Tuple[int, List[Path]]] = {}
+
+
+def get_footprint_files(project_folder: Path, group: str) -> List[Path]:
+    # Listing of each footprint library is reused until a footprint is added
+    #   to or removed from it, which changes its folder modification time
+    footprints_base_folder = project_folder / parts_folder / group / pcb_footprints_folder
+
+    footprint_files = []
+    for footprint_library in sorted(footprints_base_folder.glob('*.pretty')):
+        folder_mtime = footprint_library.stat().st_mtime_ns
+
+        cached = _footprint_listings.get(footprint_library)
+        if cached is None or cached[0] != folder_mtime:
+            cached = (folder_mtime, sorted(footprint_library.glob('*.kicad_mod')))
+            _footprint_listings[footprint_library] = cached
+
+        footprint_files += cached[1]
+
+    return footprint_files
+
+
+def collect_model_store_garbage(project_folder: Path, group: str, dry_run=False) -> List[Path]:
+    # Removes model store blobs that no footprint of group references
+    return get_model_store(project_folder, group).garbage_collect(
+        get_footprint_files(project_folder, group), dry_run=dry_run
+    )
+
+
+def ensure_part_containers(project_folder: Path, part_number: str, group: str, part_category: str, transaction: Transaction, include_legacy=False, include_models=True):
+    # Models of parts kept in the model store have no folder of their own, so
+    #   include_models is False then
+    import kiutils.symbol
+
     for data_selection in ComponentData:
         # Skip legacy if directed not to include it
         if (not include_legacy) and (data_selection == ComponentData.LEGACY_SCHEMATIC):
             continue
+        if (not include_models) and (data_selection == ComponentData.MODEL):
+            continue
 
         container, is_file = get_library_container(
             part_number, group, part_category, data_selection
@@ -220,18 +634,23 @@ def ensure_part_containers(project_folder: Path, part_number: str, group: str, p
         container = project_folder / container
 
         if is_file:
-            container.parent.mkdir(parents=True, exist_ok=True)
+            transaction.make_folder(container.parent)
             # @FIXME: Assumes a file container is a symbol library
 
-            if not container.exists():
+            # Library files are created when transaction is committed
+            if not (container.exists() or transaction.is_staged(container)):
                 if data_selection == ComponentData.SCHEMATIC:
                     new_symbol_lib = kiutils.symbol.SymbolLib()
                     new_symbol_lib.version = "20211014"
-                    new_symbol_lib.to_file(container)
+                    transaction.write_text(
+                        container, new_symbol_lib.to_sexpr()
+                    )
                 elif data_selection == ComponentData.LEGACY_SCHEMATIC:
-                    LegacySymbolLibrary().to_file(container)
+                    transaction.write_text(
+                        container, LegacySymbolLibrary().to_str()
+                    )
         else:
-            container.mkdir(parents=True, exist_ok=True)
+            transaction.make_folder(container)
 
 
 def is_relative_to(path, base_path):
@@ -244,12 +663,166 @@ def is_relative_to(path, base_path):
 
 
 def read_file_in_zip(zip_file, file_in_zip):
-    with zip_file.open(file_in_zip) as file:
-        file_content = file.read()
+    with profiling.span('zip_read'):
+        with zip_file.open(file_in_zip) as file:
+            file_content = file.read()
+
+    profiling.count('files_read')
+    profiling.count('bytes_read', len(file_content))
 
     return file_content
 
 
+# Size of each read when streaming files out of a zip.  Keeps peak memory
+#   bounded regardless of model file size.
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class ZipModelFile:
+    """Lazy handle to a 3D model file inside an open zip file."""
+    zip_file: Optional[zipfile.ZipFile]
+    zip_info: zipfile.ZipInfo
+
+    def __getstate__(self):
+        # Open zip files cannot be pickled across processes.  Receiver is
+        #   expected to reassign zip_file with its own open handle of the zip
+        state = self.__dict__.copy()
+        state['zip_file'] = None
+        return state
+
+    @property
+    def name(self) -> str:
+        return PurePosixPath(self.zip_info.filename).name
+
+    @property
+    def crc32(self) -> int:
+        # Stored in zip, so known without decompressing
+        return self.zip_info.CRC
+
+    def copy_to(self, output_path: Path) -> str:
+        # Stream decompressed contents chunk by chunk into output file
+        #   Content hash is computed on the way through and returned
+        with profiling.span('model_copy'):
+            with open(output_path, 'wb') as output_file:
+                content_hash = self._stream(output_file)
+
+        profiling.count('files_written')
+        profiling.count('bytes_written', self.zip_info.file_size)
+
+        return content_hash
+
+    def content_hash(self) -> str:
+        with profiling.span('model_hash'):
+            return self._stream(None)
+
+    def _stream(self, output_file) -> str:
+        content_hash = hashlib.sha256()
+
+        with self.zip_file.open(self.zip_info) as source_file:
+            while True:
+                chunk = source_file.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                content_hash.update(chunk)
+                if output_file is not None:
+                    output_file.write(chunk)
+
+        profiling.count('bytes_read', self.zip_info.file_size)
+
+        return content_hash.hexdigest()
+
+
+def copy_file_contents(source_path: Path, output_path: Path):
+    # Copy without passing contents through Python.  copy_file_range copies
+    #   inside the kernel, and shares blocks on filesystems with reflinks.
+    #   shutil.copyfile otherwise uses sendfile (Linux) or fcopyfile (macOS)
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(source_path, 'rb') as source_file, \
+                    open(output_path, 'wb') as output_file:
+                remaining = os.fstat(source_file.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(
+                        source_file.fileno(), output_file.fileno(), remaining
+                    )
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            return
+        except OSError:
+            # i.e. not supported between these filesystems, or by the kernel
+            pass
+
+    shutil.copyfile(source_path, output_path)
+
+
+def hash_file(file_path: Path) -> str:
+    # Read into one reused buffer, so no bytes object is made per chunk
+    content_hash = hashlib.sha256()
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    view = memoryview(buffer)
+
+    with open(file_path, 'rb', buffering=0) as file:
+        while True:
+            read_size = file.readinto(buffer)
+            if not read_size:
+                break
+            content_hash.update(view[:read_size])
+
+    return content_hash.hexdigest()
+
+
+@dataclass
+class FolderModelFile:
+    """Handle to a 3D model file in an unpacked part folder."""
+    path: Path
+    size: int
+    # Hard link into project instead of copying.  Falls back to copying if
+    #   project is on another filesystem
+    link: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def crc32(self) -> Optional[int]:
+        # Not known without reading the file, content hash is used instead
+        return None
+
+    def copy_to(self, output_path: Path) -> str:
+        # Returns content hash, same as `ZipModelFile.copy_to`
+        with profiling.span('model_copy'):
+            linked = False
+            if self.link:
+                try:
+                    os.link(self.path, output_path)
+                    linked = True
+                except OSError:
+                    pass
+
+            if not linked:
+                copy_file_contents(self.path, output_path)
+                profiling.count('files_written')
+                profiling.count('bytes_written', self.size)
+
+        return self.content_hash()
+
+    def content_hash(self) -> str:
+        with profiling.span('model_hash'):
+            content_hash = hash_file(self.path)
+
+        profiling.count('bytes_read', self.size)
+
+        return content_hash
+
+
+def hash_string(string_to_hash: str) -> str:
+    return hashlib.sha256(string_to_hash.encode('utf-8')).hexdigest()
+
+
 def cse_file_name_sanitization(string_to_sanitize: str):
     # CSE = Component Search Engine
     out = string_to_sanitize
@@ -260,122 +833,268 @@ def cse_file_name_sanitization(string_to_sanitize: str):
     return out
 
 
-def extract_part_data_zip(zip_file_path: Path):
-    with zipfile.ZipFile(zip_file_path) as zip_file:
-        # 1. Find all part_info.txt to get all part metadatas
-        # @TODO: Make parts_metadatas a set due to there being no explicit order
-        #   Cannot make set as Part is not hashable
-        parts_metadatas = []
+def index_zip_entries(zip_file: zipfile.ZipFile):
+    # Single pass over the zip's central directory.  Entries are bucketed by
+    #   their top level part folder and the subfolder under it (i.e. `3D` or
+    #   `KiCad`), so each part's files can be looked up directly instead of
+    #   rescanning the whole archive per part.
+    part_info_entries = []
+    part_entries: Dict[Tuple[str, str], List[zipfile.ZipInfo]] = {}
+
+    for file_in_zip in zip_file.infolist():
+        if file_in_zip.is_dir():
+            continue
+
+        current_file_in_zip = PurePosixPath(file_in_zip.filename)
+
+        if current_file_in_zip.name == "part_info.txt":
+            part_info_entries.append(file_in_zip)
+
+        path_parts = current_file_in_zip.parts
+        if len(path_parts) < 3:
+            continue
+
+        key = (path_parts[0], path_parts[1])
+        part_entries.setdefault(key, []).append(file_in_zip)
+
+    return part_info_entries, part_entries
+
 
-        for file_in_zip in zip_file.infolist():
-            current_file_in_zip = Path(file_in_zip.filename)
+def extract_part_data_zip(zip_file: zipfile.ZipFile):
+    # 3D model files are returned as lazy handles into zip_file, therefore
+    #   zip_file must be kept open until the models have been copied out
+    part_info_entries, part_entries = index_zip_entries(zip_file)
 
-            if current_file_in_zip.name == "part_info.txt":
-                file_content = read_file_in_zip(
+    # 1. Read all part_info.txt to get all part metadatas
+    # @TODO: Make parts_metadatas a set due to there being no explicit order
+    #   Cannot make set as Part is not hashable
+    parts_metadatas = []
+
+    for file_in_zip in part_info_entries:
+        file_content = read_file_in_zip(
+            zip_file, file_in_zip
+        )
+
+        part_metadata = Part.from_part_info_file(
+            file_content.decode(encoding="utf-8")
+        )
+        parts_metadatas.append(part_metadata)
+
+    # 2. Look up each part folder and get files relating to KiCad parts
+    parts = []
+
+    for part_metadata in parts_metadatas:
+        part_folder = cse_file_name_sanitization(
+            part_metadata.part_number
+        )
+
+        # @TODO: Check if part_folder exists in zip_file
+
+        model_files = []
+        pcb_footprint_file = None
+        legacy_schematic_symbol_file = None
+
+        # All files from {part_name}/3D folder
+        for file_in_zip in part_entries.get((part_folder, '3D'), []):
+            model_files.append(ZipModelFile(zip_file, file_in_zip))
+
+        for file_in_zip in part_entries.get((part_folder, 'KiCad'), []):
+            suffix = PurePosixPath(file_in_zip.filename).suffix
+
+            # {part_name}.lib from {part_name}/KiCad/ folder
+            if suffix == '.lib':
+                # @TODO: Proper error handling
+                #   Found two legacy schematic symbol files in one part
+                assert legacy_schematic_symbol_file is None
+
+                legacy_schematic_symbol_file = read_file_in_zip(
                     zip_file, file_in_zip
                 )
+                legacy_schematic_symbol_file = \
+                    legacy_schematic_symbol_file.decode('utf-8')
+
+            # {part_name}.kicad_mod from {part_name}/KiCad/ folder
+            if suffix == '.kicad_mod':
+                # @TODO: Proper error handling
+                #   Found two pcb footprint files in one part
+                assert pcb_footprint_file is None
 
-                part_metadata = Part.from_part_info_file(
-                    file_content.decode(encoding="utf-8")
+                pcb_footprint_file = read_file_in_zip(
+                    zip_file, file_in_zip
                 )
-                parts_metadatas.append(part_metadata)
+                pcb_footprint_file = pcb_footprint_file.decode('utf-8')
 
-        # 2. Go to each part folder and get files relating to KiCad parts
-        parts = []
+        # @TODO: Proper error handling
+        #   Never found pcb or schematic file if fail here
+        assert pcb_footprint_file is not None
+        assert legacy_schematic_symbol_file is not None
 
-        for part_metadata in parts_metadatas:
-            sanitized_part_name = cse_file_name_sanitization(
-                part_metadata.part_number
-            )
-            part_folder = Path(sanitized_part_name)
+        parts.append({
+            'part_metadata': part_metadata,
+            'pcb_footprint_file': pcb_footprint_file,
+            'legacy_schematic_symbol_file': legacy_schematic_symbol_file,
+            '3d_model_files': model_files,
+        })
 
-            # @TODO: Check if part_folder exists in zip_file
 
-            model_files = set()
-            pcb_footprint_file = None
-            legacy_schematic_symbol_file = None
+    return parts
 
-            for file_in_zip in zip_file.infolist():
-                current_file_in_zip = Path(file_in_zip.filename)
 
-                # All files from {part_name}/3D folder
-                if is_relative_to(current_file_in_zip, (part_folder / '3D')):
-                    name = current_file_in_zip.name
-                    file_content = read_file_in_zip(
-                        zip_file, file_in_zip
-                    )
+def read_file_in_folder(file_path: Path) -> bytes:
+    with profiling.span('file_read'):
+        with open(file_path, 'rb') as file:
+            file_content = file.read()
 
-                    model_files.add((name, file_content))
-
-                if is_relative_to(current_file_in_zip, (part_folder / 'KiCad')):
-                    # {part_name}.lib from {part_name}/KiCad/ folder
-                    if current_file_in_zip.suffix == '.lib':
-                        # @TODO: Proper error handling
-                        #   Found two legacy schematic symbol files in one part
-                        assert legacy_schematic_symbol_file is None
-
-                        legacy_schematic_symbol_file = read_file_in_zip(
-                            zip_file, file_in_zip
-                        )
-                        legacy_schematic_symbol_file = \
-                            legacy_schematic_symbol_file.decode('utf-8')
-
-                    # {part_name}.kicad_mod from {part_name}/KiCad/ folder
-                    if current_file_in_zip.suffix == '.kicad_mod':
-                        # @TODO: Proper error handling
-                        #   Found two pcb footprint files in one part
-                        assert pcb_footprint_file is None
-
-                        pcb_footprint_file = read_file_in_zip(
-                            zip_file, file_in_zip
-                        )
-                        pcb_footprint_file = pcb_footprint_file.decode('utf-8')
-
-            # @TODO: Proper error handling
-            #   Never found pcb or schematic file if fail here
-            assert pcb_footprint_file is not None
-            assert legacy_schematic_symbol_file is not None
-
-            parts.append({
-                'part_metadata': part_metadata,
-                'pcb_footprint_file': pcb_footprint_file,
-                'legacy_schematic_symbol_file': legacy_schematic_symbol_file,
-                '3d_model_files': model_files,
-            })
+    profiling.count('files_read')
+    profiling.count('bytes_read', len(file_content))
 
-    return parts
+    return file_content
 
 
-# def extract_part_data_folder(base_folder: Path):
-#     for tuple in os.walk(base_folder):
-#         print(tuple)
+def is_part_folder(path: Path) -> bool:
+    return (Path(path) / 'part_info.txt').is_file()
 
-#     return {
-#         'part_name': "",
-#         'pcb_footprint_file': None,
-#         'legacy_schematic_symbol_file': None,
-#         '3d_model_files': [],
-#     }
 
-def verify_model_entries(model_files: List[Tuple[int, bytes]], model_entires: List[kiutils.footprint.Model]):
-    models_provided = [
-        model[0] for model in model_files
-    ]
-    models_in_footprint = [
-        Path(model_entry.path) for model_entry in model_entires
-    ]
+def extract_part_data_folder(base_folder: Path, link_models=False):
+    # Same as `extract_part_data_zip`, for a bundle unpacked into base_folder
+    #   (a folder of part folders) or for a single part folder.  Each folder
+    #   is listed once with os.scandir.  3D model files are returned as
+    #   handles to their path and never read here
+    # If link_models, models are later hard linked instead of copied
+    base_folder = Path(base_folder)
+
+    if is_part_folder(base_folder):
+        part_folders = [base_folder]
+    else:
+        part_folders = sorted(
+            Path(entry.path) for entry in os.scandir(base_folder)
+            if entry.is_dir()
+        )
+
+    parts = []
+
+    for part_folder in part_folders:
+        part_info_path = None
+        kicad_entries = []
+        model_entries = []
+
+        for entry in os.scandir(part_folder):
+            if entry.name == 'part_info.txt' and entry.is_file():
+                part_info_path = Path(entry.path)
+            elif entry.name == 'KiCad' and entry.is_dir():
+                kicad_entries = sorted(os.scandir(entry.path), key=lambda e: e.name)
+            elif entry.name == '3D' and entry.is_dir():
+                model_entries = sorted(os.scandir(entry.path), key=lambda e: e.name)
+
+        # Not a part folder
+        if part_info_path is None:
+            continue
+
+        part_metadata = Part.from_part_info_file(
+            read_file_in_folder(part_info_path).decode(encoding="utf-8")
+        )
 
-    for model_filename in models_provided:
-        model_found = False
-        for model_entry_path in models_in_footprint:
-            if model_filename == model_entry_path.name:
-                model_found = True
+        model_files = []
+        pcb_footprint_file = None
+        legacy_schematic_symbol_file = None
 
+        # All files from {part_name}/3D folder
+        for entry in model_entries:
+            if entry.is_file():
+                model_files.append(FolderModelFile(
+                    Path(entry.path), entry.stat().st_size, link_models
+                ))
+
+        for entry in kicad_entries:
+            if not entry.is_file():
+                continue
+
+            suffix = Path(entry.name).suffix
+
+            # {part_name}.lib from {part_name}/KiCad/ folder
+            if suffix == '.lib':
+                # @TODO: Proper error handling
+                #   Found two legacy schematic symbol files in one part
+                assert legacy_schematic_symbol_file is None
+
+                # Decoded as bytes (not in text mode) so line endings are kept
+                #   as is, same as parts read from zips
+                legacy_schematic_symbol_file = \
+                    read_file_in_folder(Path(entry.path)).decode('utf-8')
+
+            # {part_name}.kicad_mod from {part_name}/KiCad/ folder
+            if suffix == '.kicad_mod':
+                # @TODO: Proper error handling
+                #   Found two pcb footprint files in one part
+                assert pcb_footprint_file is None
+
+                pcb_footprint_file = \
+                    read_file_in_folder(Path(entry.path)).decode('utf-8')
+
+        # @TODO: Proper error handling
+        #   Never found pcb or schematic file if fail here
+        assert pcb_footprint_file is not None
+        assert legacy_schematic_symbol_file is not None
+
+        parts.append({
+            'part_metadata': part_metadata,
+            'pcb_footprint_file': pcb_footprint_file,
+            'legacy_schematic_symbol_file': legacy_schematic_symbol_file,
+            '3d_model_files': model_files,
+        })
+
+    return parts
+
+
+def verify_model_entries(model_files: List[Union[ZipModelFile, 'FolderModelFile']], model_paths: List[str]):
+    models_in_footprint = set(
+        Path(model_path).name for model_path in model_paths
+    )
+
+    for model_file in model_files:
         # @TODO: Proper error handling
-        assert model_found
+        assert model_file.name in models_in_footprint
 
 
-def get_library_table_else_new(lib_type: str, library_table_path: Path) -> kiutils.libraries.LibTable:
+def add_symbols_to_library(symbol_library_path: Path, symbols: Dict[str, str], transaction: Transaction):
+    import kiutils.symbol
+
+    # symbols maps symbol ID to its S-Expression (`Symbol.to_sexpr(indent=2)`)
+    #   Existing libraries are only scanned for symbol names and appended to,
+    #   never parsed into kiutils objects.  A library that is new in
+    #   transaction is written whole, so all of its symbols must be given in
+    #   one call
+    library_on_disk = symbol_library_path.exists() and \
+        not transaction.is_staged(symbol_library_path)
+
+    existing_symbols = {}
+    if library_on_disk:
+        existing_symbols = get_kicad_symbol_index(symbol_library_path).symbols
+
+    for symbol_id in symbols:
+        if symbol_id in existing_symbols:
+            raise Exception(
+                f"Symbol {symbol_id} already exists in {symbol_library_path.name}!"
+            )
+
+    if library_on_disk:
+        append_kicad_symbols(symbol_library_path, symbols, transaction)
+    else:
+        new_symbol_lib = kiutils.symbol.SymbolLib()
+        new_symbol_lib.version = "20211014"
+        empty_library = new_symbol_lib.to_sexpr()
+
+        library_end = empty_library.rindex(')')
+        transaction.write_text(
+            symbol_library_path,
+            empty_library[:library_end] + ''.join(symbols.values()) +
+            empty_library[library_end:]
+        )
+
+
+def get_library_table_else_new(lib_type: str, library_table_path: Path) -> 'kiutils.libraries.LibTable':
+    import kiutils.libraries
+
     if library_table_path.exists():
         # from_file sets lib table type
         return kiutils.libraries.LibTable.from_file(library_table_path)
@@ -386,26 +1105,185 @@ def get_library_table_else_new(lib_type: str, library_table_path: Path) -> kiuti
     return out
 
 
-def find_libray_with_nickname(nickname: str, library_table: kiutils.libraries.LibTable) -> Optional[kiutils.libraries.Library]:
-    for lib in library_table.libs:
-        if lib.name == nickname:
-            return lib
+class LibraryTableIndex:
+    """Library table with its entries indexed by nickname.
+
+    Tracks changes made since table was loaded, so saving can be skipped
+    when nothing changed, and new entries can be appended to the file.
+    """
+
+    def __init__(self, library_table: 'kiutils.libraries.LibTable'):
+        self.library_table = library_table
+
+        self._libs_by_nickname: Dict[str, 'kiutils.libraries.Library'] = {
+            lib.name: lib for lib in library_table.libs
+        }
+
+        # Entries appended since load, and if file must be rewritten whole
+        self.appended_libs: List['kiutils.libraries.Library'] = []
+        self.rewrite_needed = False
+
+    @property
+    def dirty(self) -> bool:
+        return len(self.appended_libs) > 0 or self.rewrite_needed
+
+    def __contains__(self, nickname: str) -> bool:
+        return nickname in self._libs_by_nickname
+
+    def get(self, nickname: str) -> Optional['kiutils.libraries.Library']:
+        return self._libs_by_nickname.get(nickname)
+
+    def append(self, lib: 'kiutils.libraries.Library'):
+        assert lib.name not in self._libs_by_nickname
+
+        self.library_table.libs.append(lib)
+        self._libs_by_nickname[lib.name] = lib
+        self.appended_libs.append(lib)
+
+    def remove(self, nicknames: Set[str]):
+        if not any(nickname in self for nickname in nicknames):
+            return
+
+        self.rewrite_needed = True
+
+        # Rebuild list once instead of removing entries one by one
+        self.library_table.libs = [
+            lib for lib in self.library_table.libs if lib.name not in nicknames
+        ]
+
+        for nickname in nicknames:
+            self._libs_by_nickname.pop(nickname, None)
+
+
+# Library table path -> (stat key when loaded, table)
+_library_table_cache: Dict[Path, Tuple[Tuple[int, int], LibraryTableIndex]] = {}
+
+
+def load_library_table(lib_type: str, library_table_path: Path) -> LibraryTableIndex:
+    # Parsed tables are reused as long as their file is unchanged on disk and
+    #   they hold no changes that were never saved
+    if not library_table_path.exists():
+        return LibraryTableIndex(
+            get_library_table_else_new(lib_type, library_table_path)
+        )
+
+    stat_key = file_stat_key(library_table_path)
+
+    cached = _library_table_cache.get(library_table_path)
+    if cached is not None:
+        cached_stat_key, table_index = cached
+        if cached_stat_key == stat_key and not table_index.dirty:
+            return table_index
+
+    with profiling.span('parse_library_table'):
+        table_index = LibraryTableIndex(
+            get_library_table_else_new(lib_type, library_table_path)
+        )
+    _library_table_cache[library_table_path] = (stat_key, table_index)
+
+    return table_index
+
+
+def find_table_end(library_table_path: Path) -> int:
+    # Byte offset of closing parenthesis of table, which is the last
+    #   parenthesis in file
+    with open(library_table_path, 'rb') as file:
+        file_size = file.seek(0, os.SEEK_END)
+
+        window_start = max(file_size - 1024, 0)
+        file.seek(window_start)
+        end_index = file.read().rfind(b')')
+
+    if end_index < 0:
+        raise Exception(f"Library table {library_table_path} is missing its closing parenthesis")
+
+    return window_start + end_index
+
+
+def save_library_table(table_index: LibraryTableIndex, transaction: Transaction):
+    # Unchanged tables are not written.  Tables that only gained entries get
+    #   them appended in front of their closing parenthesis
+    if not table_index.dirty:
+        return
+
+    library_table_path = Path(table_index.library_table.filePath)
+
+    if library_table_path.exists() and not table_index.rewrite_needed and \
+            not transaction.is_staged(library_table_path):
+        transaction.splice(
+            library_table_path,
+            find_table_end(library_table_path),
+            (''.join(lib.to_sexpr() for lib in table_index.appended_libs) + ')\n').encode('utf-8')
+        )
+    else:
+        transaction.write_text(
+            library_table_path, table_index.library_table.to_sexpr()
+        )
+
+    def mark_saved():
+        table_index.appended_libs = []
+        table_index.rewrite_needed = False
+        _library_table_cache[library_table_path] = (
+            file_stat_key(library_table_path), table_index
+        )
+
+    transaction.on_commit(mark_saved)
+
+
+def evict_stale_caches() -> List[Path]:
+    # Drop cached files that were changed or removed since they were cached
+    #   (i.e. by KiCad).  Caches check this themselves when used, evicting
+    #   only frees them early.  Returns evicted paths
+    def current_stat_key(path: Path):
+        try:
+            return file_stat_key(path)
+        except FileNotFoundError:
+            return None
+
+    evicted = []
+
+    for library_table_path, (stat_key, _) in list(_library_table_cache.items()):
+        if current_stat_key(library_table_path) != stat_key:
+            del _library_table_cache[library_table_path]
+            evicted.append(library_table_path)
+
+    for symbol_indexes in [kicad_sym_index._kicad_symbol_indexes, _legacy_symbol_indexes]:
+        for library_path, symbol_index in list(symbol_indexes.items()):
+            if current_stat_key(library_path) != symbol_index.stat_key:
+                del symbol_indexes[library_path]
+                evicted.append(library_path)
+
+    for footprint_library, (folder_mtime, _) in list(_footprint_listings.items()):
+        if not footprint_library.is_dir() or \
+                footprint_library.stat().st_mtime_ns != folder_mtime:
+            del _footprint_listings[footprint_library]
+            evicted.append(footprint_library)
 
-    return None
+    evicted += evict_stale_part_indexes()
 
+    return evicted
+
+
+def find_libray_with_nickname(nickname: str, library_table: LibraryTableIndex) -> Optional['kiutils.libraries.Library']:
+    return library_table.get(nickname)
+
+
+def ensure_library_entry(library_table: LibraryTableIndex, part_container: Path, nickname: str, legacy=False) -> 'kiutils.libraries.Library':
+    import kiutils.libraries
 
-def ensure_library_entry(library_table: kiutils.libraries.LibTable, part_container: Path, nickname: str, legacy=False) -> kiutils.libraries.Library:
     lib = find_libray_with_nickname(nickname, library_table)
 
     if lib is None:
+        # Stored as a string, same as in entries parsed from file.  Cached
+        #   tables hand their entries on to later operations
         lib = kiutils.libraries.Library(
             name=nickname,
-            uri=KICAD_PROJECT_ENV_VAR / part_container
+            uri=(KICAD_PROJECT_ENV_VAR / Path(part_container)).as_posix()
         )
         if legacy:
             lib.type = "Legacy"
 
-        library_table.libs.append(lib)
+        library_table.append(lib)
 
     return lib
 
@@ -428,8 +1306,292 @@ def sanitize_for_filesystem(string_to_sanitize: str) -> str:
     return out
 
 
-def import_parts(new_parts_zip_path: Path, project_folder: Path, group: str):
-    # Get part files from .zip
+class LibraryBatch:
+    """Shared library files of a batch of part imports.
+
+    Library tables are loaded at most once per batch.  Parts are applied to
+    them in memory, and every modified file is staged exactly once into the
+    batch's transaction by `flush`.  New symbols are appended to their
+    existing symbol library instead of rewriting it, and replaced symbols are
+    swapped in place.
+    """
+
+    def __init__(self, project_folder: Path, group: str, transaction: Transaction, dedupe_models=False):
+        self.project_folder = project_folder
+        self.transaction = transaction
+
+        self.part_index = PartIndex.for_group(
+            project_folder, parts_folder, group
+        )
+        self.model_store = get_model_store(
+            project_folder, group
+        ) if dedupe_models else None
+
+        self._footprint_table = None
+        self._symbol_table = None
+        # Legacy symbol library path -> symbols to add to it
+        self._new_legacy_symbols: Dict[Path, List[LegacySymbol]] = {}
+        # Legacy symbol library path -> names of symbols to add to it, for
+        #   constant time duplicate checks
+        self._new_legacy_symbol_names: Dict[Path, Set[str]] = {}
+        # Legacy symbol library path -> symbol name -> replacing symbol
+        self._replaced_legacy_symbols: Dict[Path, Dict[str, LegacySymbol]] = {}
+        # Legacy symbol library path -> names of symbols to remove
+        self._removed_legacy_symbols: Dict[Path, Set[str]] = {}
+        # Symbol library (.kicad_sym) path -> names of symbols to remove
+        self._removed_symbols: Dict[Path, Set[str]] = {}
+        # Symbol library (.kicad_sym) path -> symbols (ID -> S-Expression)
+        #   to add to it
+        self._new_symbols: Dict[Path, Dict[str, str]] = {}
+
+    @property
+    def footprint_table(self) -> LibraryTableIndex:
+        if self._footprint_table is None:
+            self._footprint_table = load_library_table(
+                'fp_lib_table', get_footprint_library_table(self.project_folder)
+            )
+
+        return self._footprint_table
+
+    @property
+    def symbol_table(self) -> LibraryTableIndex:
+        if self._symbol_table is None:
+            self._symbol_table = load_library_table(
+                'sym_lib_table', get_symbol_library_table(self.project_folder)
+            )
+
+        return self._symbol_table
+
+    def ensure_footprint_library_entry(self, part_container: Path, nickname: str):
+        return ensure_library_entry(
+            self.footprint_table, part_container, nickname
+        )
+
+    def ensure_symbol_library_entry(self, part_container: Path, nickname: str, legacy=False):
+        return ensure_library_entry(
+            self.symbol_table, part_container, nickname, legacy=legacy
+        )
+
+    def _library_on_disk(self, library_path: Path) -> bool:
+        # Library may be new in this batch and not created until commit
+        return library_path.exists() and not self.transaction.is_staged(library_path)
+
+    def merge_legacy_symbol_library(self, library_path: Path, other: LegacySymbolLibrary, replace=False):
+        # If replace, symbols already in library are replaced instead of
+        #   being reported as duplicates
+        library_path = self.project_folder / library_path
+
+        existing_names = set()
+        if self._library_on_disk(library_path):
+            existing_names = get_legacy_symbol_names(library_path)
+
+        if self._removed_legacy_symbols.get(library_path):
+            raise Exception(
+                f"Symbols of {library_path.name} are being removed in this batch, "
+                "so symbols cannot be added to it too!"
+            )
+
+        new_symbols = self._new_legacy_symbols.setdefault(library_path, [])
+        new_symbol_names = self._new_legacy_symbol_names.setdefault(
+            library_path, set()
+        )
+        replaced_symbols = self._replaced_legacy_symbols.setdefault(
+            library_path, {}
+        )
+
+        for symbol in other.symbols:
+            if symbol.name in new_symbol_names or \
+                    symbol.name in replaced_symbols:
+                raise Exception(
+                    f"Symbol {symbol.name} already exists in {library_path.name}!"
+                )
+
+            if symbol.name in existing_names:
+                if not replace:
+                    raise Exception(
+                        f"Symbol {symbol.name} already exists in {library_path.name}!"
+                    )
+
+                replaced_symbols[symbol.name] = symbol
+            else:
+                new_symbols.append(symbol)
+                new_symbol_names.add(symbol.name)
+
+    def remove_symbols(self, library_path: Path, names: List[str]):
+        library_path = self.project_folder / library_path
+
+        self._removed_symbols.setdefault(library_path, set()).update(names)
+
+    def remove_legacy_symbols(self, library_path: Path, names: List[str]):
+        # Removals and additions of a legacy library are separate splices of
+        #   it, so a batch can only do one of them per library
+        library_path = self.project_folder / library_path
+
+        if self._new_legacy_symbols.get(library_path) or \
+                self._replaced_legacy_symbols.get(library_path):
+            raise Exception(
+                f"Symbols are being added to {library_path.name} in this batch, "
+                "so symbols cannot be removed from it too!"
+            )
+
+        self._removed_legacy_symbols.setdefault(library_path, set()).update(names)
+
+    def remaining_symbol_names(self, library_path: Path) -> Set[str]:
+        # Names of symbols library holds once batch is flushed
+        library_path = self.project_folder / library_path
+
+        if library_path.suffix == '.lib':
+            names = set()
+            if self._library_on_disk(library_path):
+                names = set(get_legacy_symbol_names(library_path))
+
+            names -= self._removed_legacy_symbols.get(library_path, set())
+            names |= self._new_legacy_symbol_names.get(library_path, set())
+            return names
+
+        names = set()
+        if self._library_on_disk(library_path):
+            names = set(get_kicad_symbol_index(library_path).symbols)
+
+        names -= self._removed_symbols.get(library_path, set())
+        names |= set(self._new_symbols.get(library_path, {}))
+        return names
+
+    def delete_library(self, library_path: Path):
+        # Library file is deleted on commit, instead of having its pending
+        #   changes staged
+        library_path = self.project_folder / library_path
+
+        for pending_changes in [
+            self._new_legacy_symbols, self._new_legacy_symbol_names,
+            self._replaced_legacy_symbols, self._removed_legacy_symbols,
+            self._removed_symbols, self._new_symbols
+        ]:
+            pending_changes.pop(library_path, None)
+
+        if library_path.exists() or self.transaction.is_staged(library_path):
+            self.transaction.delete(library_path)
+
+        # Along with its saved symbol index
+        for index_path in [
+            legacy_symbol_index_path(library_path),
+            kicad_symbol_index_path(library_path)
+        ]:
+            if index_path.exists():
+                self.transaction.delete(index_path)
+
+    def add_symbols(self, library_path: Path, symbols: Dict[str, str]):
+        # Symbols being removed from library in this batch may be added again
+        library_path = self.project_folder / library_path
+
+        existing_names = set()
+        if self._library_on_disk(library_path):
+            existing_names = get_kicad_symbol_index(library_path).symbols.keys()
+
+        removed_names = self._removed_symbols.get(library_path, set())
+        new_symbols = self._new_symbols.setdefault(library_path, {})
+
+        for symbol_id, symbol_sexpr in symbols.items():
+            if symbol_id in new_symbols or \
+                    (symbol_id in existing_names and symbol_id not in removed_names):
+                raise Exception(
+                    f"Symbol {symbol_id} already exists in {library_path.name}!"
+                )
+
+            new_symbols[symbol_id] = symbol_sexpr
+
+    def flush(self):
+        # Stage symbols removed from legacy libraries
+        for library_path, removed_names in self._removed_legacy_symbols.items():
+            remove_legacy_symbols(
+                library_path, sorted(removed_names), self.transaction
+            )
+
+        # Stage new and replaced legacy symbols
+        for library_path, new_symbols in self._new_legacy_symbols.items():
+            replaced_symbols = self._replaced_legacy_symbols.get(library_path)
+
+            if replaced_symbols:
+                replace_legacy_symbols(
+                    library_path, replaced_symbols, new_symbols, self.transaction
+                )
+            elif len(new_symbols) == 0:
+                continue
+            elif self._library_on_disk(library_path):
+                append_legacy_symbols(
+                    library_path, new_symbols, self.transaction
+                )
+            else:
+                self.transaction.write_text(
+                    library_path, LegacySymbolLibrary(new_symbols).to_str()
+                )
+
+        # Stage symbols added to and removed from modern libraries, in one
+        #   change per library
+        for library_path in set(self._removed_symbols) | set(self._new_symbols):
+            removed_names = self._removed_symbols.get(library_path, set())
+            new_symbols = self._new_symbols.get(library_path, {})
+
+            if self._library_on_disk(library_path):
+                replace_kicad_symbols(
+                    library_path, sorted(removed_names), new_symbols,
+                    self.transaction
+                )
+            elif len(new_symbols) > 0:
+                add_symbols_to_library(
+                    library_path, new_symbols, self.transaction
+                )
+
+        # Stage library tables that changed
+        for table_index in [self._footprint_table, self._symbol_table]:
+            if table_index is not None:
+                save_library_table(table_index, self.transaction)
+
+        self._new_legacy_symbols.clear()
+        self._new_legacy_symbol_names.clear()
+        self._replaced_legacy_symbols.clear()
+        self._removed_legacy_symbols.clear()
+        self._removed_symbols.clear()
+        self._new_symbols.clear()
+
+
+def find_part_bundles(paths: List[Path]) -> List[Path]:
+    # Bundles are .zip files, or folders they were unpacked to.  Directories
+    #   are expanded to the .zip files directly inside them, and are a bundle
+    #   themselves if they are a part folder or have part folders in them
+    bundle_paths = []
+
+    for path in paths:
+        path = Path(path)
+
+        if not path.is_dir():
+            bundle_paths.append(path)
+            continue
+
+        if is_part_folder(path):
+            bundle_paths.append(path)
+            continue
+
+        zip_paths = []
+        has_part_folders = False
+        for entry in os.scandir(path):
+            if entry.name.endswith('.zip') and entry.is_file():
+                zip_paths.append(Path(entry.path))
+            elif not has_part_folders and entry.is_dir() and \
+                    is_part_folder(Path(entry.path)):
+                has_part_folders = True
+
+        if has_part_folders:
+            bundle_paths.append(path)
+        bundle_paths += sorted(zip_paths)
+
+    return bundle_paths
+
+
+def import_parts(new_parts_paths: List[Path], project_folder: Path, group: str, jobs: Optional[int] = None, dedupe_models=False, incremental=False, convert_symbols=False, footprint_cache: Optional[FootprintCache] = None, link_models=False):
+    import concurrent.futures
+
+    # Get part files from .zip, or from folders .zips were unpacked to
     #   In KiCad folder:
     #       POOR ASSUMPTION: footprints/symbol only have one of each in them
     #       ASSUME arbitrary number of footprints/symbols in library files
@@ -438,314 +1600,950 @@ def import_parts(new_parts_zip_path: Path, project_folder: Path, group: str):
     #   In 3D folder:
     #       POOR ASSUMPTION: Only a .stp file for part
     #       ASSUME arbitrary number of 3d files in library files
-    new_parts = extract_part_data_zip(new_parts_zip_path)
+    # If incremental, parts already installed are compared against the
+    #   installed version and only replaced if they changed
+    # If convert_symbols, legacy symbols are converted and written straight
+    #   to modern symbol libraries, so there is nothing to migrate in KiCad
+    # If footprint_cache is given, footprints are upgraded through it
+    # If link_models, models of unpacked bundles are hard linked into project
+    # Returns stage timings, number of parts per import action, and warnings
+    #   of symbols that could not be converted exactly
+    #   A finer breakdown is collected by `profiling` while it is enabled
+    stage_timings = {}
+
+    # Project files are rolled back first if a previous commit was interrupted
+    recover_transactions(project_folder)
+
+    # Installed parts are only needed to compare against if incremental
+    installed_entries = None
+    if incremental:
+        installed_entries = {
+            entry['part_number']: entry
+            for entry in PartIndex.for_group(project_folder, parts_folder, group)
+        }
+
+    # 1. Decompress and parse every bundle.  Touches no project files, so
+    #   bundles are independent of each other and are handled in a process pool
+    stage_start = time.perf_counter()
+
+    with profiling.span('extract'):
+        if len(new_parts_paths) > 1 and jobs != 1:
+            bundle_count = len(new_parts_paths)
+
+            # Workers collect their own profile, merged in here
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                profiled_bundles = list(executor.map(
+                    profiling.call_profiled,
+                    [prepare_parts_bundle] * bundle_count,
+                    [profiling.is_enabled()] * bundle_count,
+                    new_parts_paths,
+                    [group] * bundle_count,
+                    [installed_entries] * bundle_count,
+                    [convert_symbols] * bundle_count,
+                    [footprint_cache] * bundle_count,
+                    [link_models] * bundle_count
+                ))
+
+            prepared_bundles = []
+            for prepared_parts, worker_profile in profiled_bundles:
+                prepared_bundles.append(prepared_parts)
+                profiling.merge(worker_profile)
+        else:
+            prepared_bundles = [
+                prepare_parts_bundle(
+                    bundle_path, group, installed_entries, convert_symbols,
+                    footprint_cache, link_models
+                )
+                for bundle_path in new_parts_paths
+            ]
+
+        if footprint_cache is not None:
+            with profiling.span('footprint_cache_evict'):
+                footprint_cache.evict()
+
+    action_counts = {action: 0 for action in PART_IMPORT_ACTIONS}
+    conversion_warnings = []
+    for prepared_parts in prepared_bundles:
+        for part_dict in prepared_parts:
+            action_counts[part_dict['import_action']] += 1
+
+            if part_dict['import_action'] in ('new', 'update'):
+                conversion_warnings += part_dict.get('conversion_warnings', [])
+
+    stage_timings['extract'] = time.perf_counter() - stage_start
+
+    # 2. Serialized commit of all parts into the project
+    stage_start = time.perf_counter()
+
+    # Every write of the whole batch is staged into one transaction, so
+    #   either all parts are imported or the project is left untouched
+    with Transaction(journal_folder=project_folder) as transaction:
+        with profiling.span('commit'):
+            # Shared library files are loaded once and saved once for all parts
+            library_batch = LibraryBatch(
+                project_folder, group, transaction, dedupe_models
+            )
 
-    for part_dict in new_parts:
-        part_metadata = part_dict['part_metadata']
-        part_number = part_metadata.part_number
-        part_number_filesystem = sanitize_for_filesystem(part_number)
+            for bundle_path, prepared_parts in zip(new_parts_paths, prepared_bundles):
+                # 3D models are streamed out of zips while committing.  Models
+                #   of unpacked bundles are copied straight from their path
+                is_zip = not Path(bundle_path).is_dir()
 
-        # Remove non alpha-numeric and not whitespace
-        part_category = re.sub(
-            r'[^\s\-a-zA-Z0-9]', '', part_metadata.part_category
-        )
-        part_category = part_category.replace(' ', '_')
-        part_category = part_category.replace('-', '_')
+                with zipfile.ZipFile(bundle_path) if is_zip else nullcontext() as new_parts_zip:
+                    for part_dict in prepared_parts:
+                        if part_dict['import_action'] not in ('new', 'update'):
+                            continue
 
-        ####################################
-        # Ensure containers
+                        if is_zip:
+                            for model_file in part_dict['3d_model_files']:
+                                model_file.zip_file = new_parts_zip
 
-        # @TODO: Do not create folders until finish without errors
-        ensure_part_containers(
-            project_folder, part_number_filesystem, group, part_category, include_legacy=True
-        )
+                        with profiling.span('import_part'):
+                            import_part(
+                                part_dict, project_folder, group, library_batch
+                            )
 
-        ####################################
-        # Merge new part into libraries and folders/files
+        stage_timings['commit'] = time.perf_counter() - stage_start
 
-        models_container_path, _ = get_library_container(
-            part_number_filesystem, group, part_category, ComponentData.MODEL
-        )
-        footprint_container_path, _ = get_library_container(
-            part_number_filesystem, group, part_category, ComponentData.PCB
+        stage_start = time.perf_counter()
+        with profiling.span('flush'):
+            library_batch.flush()
+
+        # Index is committed along with the project files it describes
+        with profiling.span('save_part_index'):
+            library_batch.part_index.save(transaction)
+    stage_timings['flush'] = time.perf_counter() - stage_start
+
+    return stage_timings, action_counts, conversion_warnings
+
+
+# What importing a part does, decided by comparing it to installed part
+#   - new: Part is not installed
+#   - update: Part is newer or has changed, and replaces installed part
+#   - unchanged: Part is identical to installed part, so is skipped
+#   - outdated: Part is older than installed part, so is skipped
+PART_IMPORT_ACTIONS = ('new', 'update', 'unchanged', 'outdated')
+
+
+def prepare_parts_bundle(bundle_path: Path, group: str, installed_entries: Optional[Dict[str, dict]] = None, convert_symbols=False, footprint_cache: Optional[FootprintCache] = None, link_models=False) -> List[dict]:
+    if Path(bundle_path).is_dir():
+        return prepare_parts_folder(
+            bundle_path, group, installed_entries, convert_symbols,
+            footprint_cache, link_models
         )
-        symbol_container_path, _ = get_library_container(
-            part_number_filesystem, group, part_category, ComponentData.SCHEMATIC
+
+    return prepare_parts_zip(
+        bundle_path, group, installed_entries, convert_symbols, footprint_cache
+    )
+
+
+def prepare_parts_zip(new_parts_zip_path: Path, group: str, installed_entries: Optional[Dict[str, dict]] = None, convert_symbols=False, footprint_cache: Optional[FootprintCache] = None) -> List[dict]:
+    # installed_entries are part index entries by part number, given if
+    #   import is incremental.  Skipped parts are not parsed
+    with zipfile.ZipFile(new_parts_zip_path) as new_parts_zip:
+        with profiling.span('extract_part_data_zip'):
+            part_dicts = extract_part_data_zip(new_parts_zip)
+
+        # Models of parts that are compared are read from the zip, so it is
+        #   kept open until then
+        return prepare_extracted_parts(
+            part_dicts, group, installed_entries, convert_symbols,
+            footprint_cache
         )
-        legacy_symbol_container_path, _ = get_library_container(
-            part_number_filesystem, group, part_category, ComponentData.LEGACY_SCHEMATIC
+
+
+def prepare_parts_folder(new_parts_folder: Path, group: str, installed_entries: Optional[Dict[str, dict]] = None, convert_symbols=False, footprint_cache: Optional[FootprintCache] = None, link_models=False) -> List[dict]:
+    with profiling.span('extract_part_data_folder'):
+        part_dicts = extract_part_data_folder(new_parts_folder, link_models)
+
+    return prepare_extracted_parts(
+        part_dicts, group, installed_entries, convert_symbols, footprint_cache
+    )
+
+
+def prepare_extracted_parts(part_dicts: List[dict], group: str, installed_entries: Optional[Dict[str, dict]] = None, convert_symbols=False, footprint_cache: Optional[FootprintCache] = None) -> List[dict]:
+    prepared_parts = []
+
+    for part_dict in part_dicts:
+        import_action = 'new'
+        if installed_entries is not None:
+            with profiling.span('compare_installed'):
+                import_action = get_part_import_action(
+                    part_dict,
+                    installed_entries.get(part_dict['part_metadata'].part_number)
+                )
+
+        if import_action in ('new', 'update'):
+            with profiling.span('prepare_part'):
+                part_dict = prepare_part(
+                    part_dict, group, convert_symbols, footprint_cache
+                )
+        part_dict['import_action'] = import_action
+
+        prepared_parts.append(part_dict)
+
+    return prepared_parts
+
+
+def get_part_import_action(part_dict: dict, installed_entry: Optional[dict]) -> str:
+    # Parts not imported from CSE are never replaced, importing them is
+    #   reported as a duplicate
+    if installed_entry is None or installed_entry.get('source') != 'cse':
+        return 'new'
+
+    incoming_version = tuple(part_dict['part_metadata'].version)
+    installed_version = tuple(installed_entry['version'])
+
+    if incoming_version < installed_version:
+        return 'outdated'
+    if incoming_version > installed_version:
+        return 'update'
+
+    # Same version may still have been refreshed by vendor
+    if part_contents_match(part_dict, installed_entry):
+        return 'unchanged'
+    return 'update'
+
+
+def part_contents_match(part_dict: dict, installed_entry: dict) -> bool:
+    installed_hashes = installed_entry['hashes']
+
+    if hash_string(part_dict['pcb_footprint_file']) != installed_hashes['footprint'] or \
+            hash_string(part_dict['legacy_schematic_symbol_file']) != installed_hashes['symbol']:
+        return False
+
+    model_files = part_dict['3d_model_files']
+    if set(model_file.name for model_file in model_files) != set(installed_hashes['models']):
+        return False
+
+    # Checksums stored in zip avoid decompressing models.  Parts installed
+    #   without them, or models not from a zip, have their models hashed instead
+    installed_crc32s = installed_hashes.get('model_crc32', {})
+    for model_file in model_files:
+        if model_file.crc32 is not None and model_file.name in installed_crc32s:
+            if model_file.crc32 != installed_crc32s[model_file.name]:
+                return False
+        elif model_file.content_hash() != installed_hashes['models'][model_file.name]:
+            return False
+
+    return True
+
+
+def get_part_category(part_metadata: Part) -> str:
+    # Remove non alpha-numeric and not whitespace
+    part_category = re.sub(
+        r'[^\s\-a-zA-Z0-9]', '', part_metadata.part_category
+    )
+    part_category = part_category.replace(' ', '_')
+    part_category = part_category.replace('-', '_')
+
+    return part_category
+
+
+# Date is the day after last use of old fp_arc formatting
+#   Source: https://gitlab.com/kicad/code/kicad/-/blob/master/pcbnew/plugins/kicad/pcb_plugin.h#L136
+FOOTPRINT_VERSION = "20210926"
+
+
+def upgrade_footprint(footprint_string: str) -> str:
+    import kiutils.footprint
+    import kiutils.utils
+
+    # Read PCB file string into Footprint object
+    #   ComponentSearchEngine's .kicad_mod files are intended for prior to
+    #       KiCad 6, as the footprint's first token was "module"
+    #       instead of "footprint"
+    #   Use KiUtils to upgrade to newer version by loading file
+    with profiling.span('parse_sexp'):
+        footprint_sexpr = kiutils.utils.sexpr.parse_sexp(footprint_string)
+    with profiling.span('footprint_from_sexpr'):
+        footprint_kiutils = kiutils.footprint.Footprint.from_sexpr(
+            footprint_sexpr
         )
+    footprint_kiutils.version = FOOTPRINT_VERSION
 
-        output_footprint_file_path = \
-            project_folder / \
-            footprint_container_path / \
-            f'{part_number_filesystem}.kicad_mod'
+    with profiling.span('serialize_footprint'):
+        return footprint_kiutils.to_sexpr()
 
-        # Load legacy symbol library from zip
+
+def prepare_part(part_dict: dict, group: str, convert_symbols=False, footprint_cache: Optional[FootprintCache] = None) -> dict:
+    # Parsing and upgrading of a part's files.  Does not touch the project
+    #   If footprint_cache is given, footprints upgraded before (by any
+    #   project) are taken from it instead of being upgraded again
+    part_metadata = part_dict['part_metadata']
+    part_number = part_metadata.part_number
+
+    # Load legacy symbol library from zip
+    with profiling.span('parse_legacy_symbol'):
         legacy_symbol = LegacySymbolLibrary.from_str(
             part_dict['legacy_schematic_symbol_file']
         )
 
-        # Oddly symbols in CSE have the sanitized part number whereas footprints
-        #   are full, original part number.
-        #   Change so both symbol and footprint is consistent.
-        # @FIXME: Use a `find` API to get symbol with name
-        legacy_symbol.symbols[0].name = part_number
+    # Oddly symbols in CSE have the sanitized part number whereas footprints
+    #   are full, original part number.
+    #   Change so both symbol and footprint is consistent.
+    # @FIXME: Use a `find` API to get symbol with name
+    legacy_symbol.symbols[0].name = part_number
 
-        # Merge legacy symbol library
-        legacy_symbol_library = LegacySymbolLibrary.from_file(
-            project_folder / legacy_symbol_container_path
-        )
+    part_footprint_string = part_dict['pcb_footprint_file']
 
-        final_legacy_symbol_library = \
-            legacy_symbol_library.merge(legacy_symbol)
+    part_footprint_sexpr = None
+    if footprint_cache is not None:
+        with profiling.span('footprint_cache_get'):
+            part_footprint_sexpr = footprint_cache.get(
+                part_footprint_string, FOOTPRINT_VERSION
+            )
 
-        # Check for duplicate of footprint file
-        if output_footprint_file_path.is_file():
-            raise Exception(f"Footprint of {part_number} already exists!")
+    if part_footprint_sexpr is None:
+        part_footprint_sexpr = upgrade_footprint(part_footprint_string)
 
-        # @TODO: Check for duplicates of files in models folder
-         #   If duplicate, throw error
+        if footprint_cache is not None:
+            with profiling.span('footprint_cache_put'):
+                footprint_cache.put(
+                    part_footprint_string, FOOTPRINT_VERSION,
+                    part_footprint_sexpr
+                )
 
-        # @TODO: Check for duplicate symbol in legacy symbol library SYMBOL
-        #   If duplicate, throw error
+    # Ensure footprint name is of right name as some footprints have wrong name with CSE provider for some reason
+    # @TODO Test: MCP1402T-E/OT
+    part_footprint_sexpr = set_footprint_name(part_footprint_sexpr, part_number)
 
-        part_footprint_string = part_dict['pcb_footprint_file']
+    if part_metadata.has_3d_model:
+        # Check to make sure .kicad_mod model entries points to file in new parts 3D models folder
+        with profiling.span('verify_model_entries'):
+            verify_model_entries(
+                part_dict['3d_model_files'],
+                footprint_model_paths(part_footprint_sexpr)
+            )
 
-        # Read PCB file string into Footprint object
-        #   ComponentSearchEngine's .kicad_mod files are intended for prior to
-        #       KiCad 6, as the footprint's first token was "module"
-        #       instead of "footprint"
-        #   Use KiUtils to upgrade to newer version by loading file
-        part_footprint_sexpr = kiutils.utils.sexpr.parse_sexp(
-            part_footprint_string
-        )
-        part_footprint_kiutils = kiutils.footprint.Footprint.from_sexpr(
-            part_footprint_sexpr
+    part_dict['part_category'] = get_part_category(part_metadata)
+    part_dict['legacy_symbol_library'] = legacy_symbol
+    # Upgraded footprint, with model paths still as in footprint file
+    part_dict['pcb_footprint_sexpr'] = part_footprint_sexpr
+
+    # Approximations made converting symbol, for the user to check
+    part_dict['conversion_warnings'] = []
+
+    aliases = legacy_symbol_aliases(legacy_symbol.symbols[0]) \
+        if convert_symbols else []
+    if len(aliases) > 0:
+        # Left for KiCad to migrate, which keeps aliases as derived symbols
+        part_dict['conversion_warnings'].append(
+            f"{part_number}: Symbol has aliases ({', '.join(aliases)}), so it "
+            "was not converted.  Migrate its LEGACY_ library in KiCad and run "
+            "`post-migrate`"
         )
-        # Date is the day after last use of old fp_arc formatting
-        #   Source: https://gitlab.com/kicad/code/kicad/-/blob/master/pcbnew/plugins/kicad/pcb_plugin.h#L136
-        part_footprint_kiutils.version = "20210926"
-        # Ensure footprint name is of right name as some footprints have wrong name with CSE provider for some reason
-        # @TODO Test: MCP1402T-E/OT
-        part_footprint_kiutils.entryName = part_number
+    elif convert_symbols:
+        # Serialized here as conversion runs in the worker processes
+        with profiling.span('convert_symbol'):
+            part_symbol = convert_legacy_symbol(
+                legacy_symbol.symbols[0], part_dict['conversion_warnings']
+            )
 
-        if part_metadata.has_3d_model:
-            # Check to make sure .kicad_mod model entries points to file in new parts 3D models folder
-            verify_model_entries(
-                part_dict['3d_model_files'], part_footprint_kiutils.models
+        library_nickname = get_library_nickname(group, part_dict['part_category'])
+        for sym_property in part_symbol.properties:
+            if sym_property.key == "Footprint":
+                sym_property.value = \
+                    f'{library_nickname}:{sanitize_for_filesystem(part_number)}'
+
+        with profiling.span('serialize_symbol'):
+            part_dict['symbol'] = (
+                part_symbol.libId, part_symbol.to_sexpr(indent=2)
             )
 
-            # Modify footprint model in memory to point to parts folder
-            #   https://kiutils.readthedocs.io/en/latest/module/kiutils.html#kiutils.footprint.Footprint.models
-            #   part_footprint_kiutils.models
-            for model_entry in part_footprint_kiutils.models:
-                model_filename = Path(model_entry.path).name
+    return part_dict
 
-                # Change footprint model directory
-                model_entry.path = \
-                    KICAD_PROJECT_ENV_VAR / \
-                    models_container_path / model_filename
 
-        footprint_table_path = get_footprint_library_table(project_folder)
-        symbol_table_path = get_symbol_library_table(project_folder)
+def import_part(part_dict: dict, project_folder: Path, group: str, library_batch: LibraryBatch):
+    # part_dict is expected to have been through `prepare_part`
+    part_metadata = part_dict['part_metadata']
+    part_number = part_metadata.part_number
+    part_number_filesystem = sanitize_for_filesystem(part_number)
+    part_category = part_dict['part_category']
+    part_footprint_sexpr = part_dict['pcb_footprint_sexpr']
+    # (symbol ID, S-Expression) if symbol was converted to modern symbol
+    converted_symbol = part_dict.get('symbol')
 
-        # Load footprint and symbol tables
-        footprint_table = get_library_table_else_new(
-            'fp_lib_table', footprint_table_path
-        )
-        symbol_table = get_library_table_else_new(
-            'sym_lib_table', symbol_table_path
-        )
+    ####################################
+    # Ensure containers
+
+    # @TODO: Do not create folders until finish without errors
+    ensure_part_containers(
+        project_folder, part_number_filesystem, group, part_category,
+        library_batch.transaction, include_legacy=converted_symbol is None,
+        include_models=library_batch.model_store is None
+    )
 
-        # Ensure library entries of:
-        #   - Footprint (.pretty)
-        #   - Symbol (.kicad_sym)
-        #   - Legacy symbol (.lib)
-        # @TODO: Logging of if entries were already present or not
-        library_nickname = get_library_nickname(group, part_category)
+    ####################################
+    # Merge new part into libraries and folders/files
 
-        # Ensure footprint
-        ensure_library_entry(
-            footprint_table, footprint_container_path, library_nickname
-        )
+    models_container_path, _ = get_library_container(
+        part_number_filesystem, group, part_category, ComponentData.MODEL
+    )
+    footprint_container_path, _ = get_library_container(
+        part_number_filesystem, group, part_category, ComponentData.PCB
+    )
+    symbol_container_path, _ = get_library_container(
+        part_number_filesystem, group, part_category, ComponentData.SCHEMATIC
+    )
+    legacy_symbol_container_path, _ = get_library_container(
+        part_number_filesystem, group, part_category, ComponentData.LEGACY_SCHEMATIC
+    )
 
-        # @TODO: Contact KiUtils developers to have default version number so
-        #   fresh symbol files can be imported
-        ensure_library_entry(
-            symbol_table, symbol_container_path, library_nickname
-        )
+    output_footprint_file_path = \
+        project_folder / \
+        footprint_container_path / \
+        f'{part_number_filesystem}.kicad_mod'
+
+    # Installed part to replace, if updating
+    installed_entry = None
+    if part_dict.get('import_action') == 'update':
+        installed_entry = library_batch.part_index.get(part_number)
 
+    if installed_entry is not None:
+        # @TODO: Move files of parts changing category
+        if installed_entry['category'] != part_category:
+            raise Exception(
+                f"{part_number} moved from category {installed_entry['category']} "
+                f"to {part_category}!  Remove it before importing it again"
+            )
+    else:
+        # Check for duplicate part
+        #   Part index covers footprint, symbol and models of installed parts.
+        #   Footprint file is still checked for parts installed before the index
+        if part_number in library_batch.part_index:
+            raise Exception(
+                f"{part_number} already exists in category "
+                f"{library_batch.part_index.category_of(part_number)}!"
+            )
+        if output_footprint_file_path.is_file():
+            raise Exception(f"Footprint of {part_number} already exists!")
+
+    # Ensure library entries of:
+    #   - Footprint (.pretty)
+    #   - Symbol (.kicad_sym)
+    #   - Legacy symbol (.lib)
+    # @TODO: Logging of if entries were already present or not
+    library_nickname = get_library_nickname(group, part_category)
+
+    # Ensure footprint
+    library_batch.ensure_footprint_library_entry(
+        footprint_container_path, library_nickname
+    )
+
+    # @TODO: Contact KiUtils developers to have default version number so
+    #   fresh symbol files can be imported
+    library_batch.ensure_symbol_library_entry(
+        symbol_container_path, library_nickname
+    )
+
+    if converted_symbol is None:
         legacy_library_nickname = get_legacy_library_nickname(
             group, part_category
         )
-        ensure_library_entry(
-            symbol_table,
+        library_batch.ensure_symbol_library_entry(
             legacy_symbol_container_path,
             legacy_library_nickname,
             legacy=True
         )
 
-        # Save to PCB folder
-        with open(output_footprint_file_path, 'w') as footprint_file:
-            footprint_file.write(part_footprint_kiutils.to_sexpr())
+    model_hashes = {}
+    model_crc32s = {}
+    model_containers = {}
+    if part_metadata.has_3d_model:
+        # Add MODEL files to 3d folder, or to model store if deduplicating
+        for model_file in part_dict['3d_model_files']:
+            if library_batch.model_store is not None:
+                model_container = library_batch.model_store.add(
+                    model_file, library_batch.transaction
+                )
+                model_hashes[model_file.name] = model_container.stem
+            else:
+                model_container = models_container_path / model_file.name
+                model_hashes[model_file.name] = model_file.copy_to(
+                    library_batch.transaction.stage(
+                        project_folder / model_container
+                    )
+                )
 
-        if part_metadata.has_3d_model:
-            # Add MODEL files to 3d folder
-            for model_filename, model_file_string in part_dict['3d_model_files']:
-                with open(project_folder / models_container_path / model_filename, 'wb') as model_file:
-                    model_file.write(model_file_string)
+            model_containers[model_file.name] = model_container
+            if model_file.crc32 is not None:
+                model_crc32s[model_file.name] = model_file.crc32
 
-        # Save merged legacy symbol library to file
-        with open(project_folder / legacy_symbol_container_path, 'w') as legacy_file:
-            legacy_file.write(final_legacy_symbol_library.to_str())
+        # Change footprint model directory to point to parts folder
+        def get_model_path(model_path: str) -> str:
+            model_filename = Path(model_path).name
 
-        # Save library tables
-        footprint_table.to_file()
-        symbol_table.to_file()
+            return str(
+                KICAD_PROJECT_ENV_VAR /
+                model_containers.get(
+                    model_filename, models_container_path / model_filename
+                )
+            )
 
-        # @TODO: Do not commit saving files until every file has been successfully saven
-        #   Could this be done by doing library operations in temporary clone folder,
-        #   and replacing original folder when done?
+        part_footprint_sexpr = replace_footprint_model_paths(
+            part_footprint_sexpr, get_model_path
+        )
 
-        ####################################
-        # Request user to migrate legacy entry
+    # Save to PCB folder
+    library_batch.transaction.write_text(
+        output_footprint_file_path, part_footprint_sexpr
+    )
 
-        ####################################
-        # Merging migrated symbol files
+    if installed_entry is not None:
+        # Remove models of replaced part no longer used by part
+        #   Models in model store may be shared, and are left to `gc`
+        store_container = get_model_store(project_folder, group).store_container
+        new_model_containers = set(model_containers.values())
 
-        # Find pair of entries with nicknames:
-        # - legacy prefix with nickname and is .kicad_sym
-        # - nickname and is .kicad_sym
+        for installed_model in installed_entry['files']['models']:
+            installed_model = Path(installed_model)
 
-        # Load both symbol libraries
-        # Merge together
-        # Save to nickname library file
+            if installed_model not in new_model_containers and \
+                    not is_relative_to(installed_model, store_container):
+                library_batch.transaction.delete(
+                    project_folder / installed_model
+                )
 
-        # Remove legacy entry from symbol table
-        # Delete legacy file that is .kicad_sym
+        # Symbol of replaced part may already have been migrated.  Remove it
+        #   from migrated library, new symbol is migrated again
+        installed_symbol_library = Path(installed_entry['files']['symbol_library'])
+        if installed_symbol_library.suffix == '.kicad_sym':
+            library_batch.remove_symbols(
+                installed_symbol_library, [part_number]
+            )
+        elif converted_symbol is not None:
+            # @TODO: Remove legacy symbol of replaced part
+            raise Exception(
+                f"Legacy symbol of {part_number} has not been migrated!  "
+                "Run `post-migrate` before replacing it with a converted symbol"
+            )
+
+    if converted_symbol is not None:
+        # Add converted symbol to category symbol library
+        symbol_id, symbol_sexpr = converted_symbol
+        library_batch.add_symbols(
+            symbol_container_path, {symbol_id: symbol_sexpr}
+        )
+    else:
+        # Merge legacy symbol into category legacy symbol library
+        #   Saved along with the library tables once the whole batch is imported
+        library_batch.merge_legacy_symbol_library(
+            legacy_symbol_container_path, part_dict['legacy_symbol_library'],
+            replace=installed_entry is not None
+        )
 
-        ####################################
-        # Opposite actions
+    # Record part in part index
+    part_index_entry = part_metadata_to_entry(part_metadata)
+    part_index_entry.update({
+        'category': part_category,
+        'source': 'cse',
+        'files': {
+            'footprint': (footprint_container_path / f'{part_number_filesystem}.kicad_mod').as_posix(),
+            'symbol_library': (
+                legacy_symbol_container_path if converted_symbol is None
+                else symbol_container_path
+            ).as_posix(),
+            'models': [
+                model_container.as_posix()
+                for model_container in model_containers.values()
+            ],
+        },
+        'hashes': {
+            'footprint': hash_string(part_dict['pcb_footprint_file']),
+            'symbol': hash_string(part_dict['legacy_schematic_symbol_file']),
+            'models': model_hashes,
+            'model_crc32': model_crc32s,
+        },
+    })
+    library_batch.part_index.put(part_index_entry)
+
+    ####################################
+    # Request user to migrate legacy entry
+
+    ####################################
+    # Merging migrated symbol files
+
+    # Find pair of entries with nicknames:
+    # - legacy prefix with nickname and is .kicad_sym
+    # - nickname and is .kicad_sym
+
+    # Load both symbol libraries
+    # Merge together
+    # Save to nickname library file
+
+    # Remove legacy entry from symbol table
+    # Delete legacy file that is .kicad_sym
+
+    ####################################
+    # Opposite actions
+
+    # OPP: Remove part from category library
+    #   Done by `remove_parts`
+
+    # OPP: Remove base folder (remove all libraries)
+
+    # https://en.wikipedia.org/wiki/Atomicity_(database_systems)
+    #   "consistency also relies on atomicity to roll back the enclosing
+    #   transaction in the event of a consistency violation by an illegal
+    #   transaction."
+
+
+def remove_parts(project_folder: Path, part_numbers: List[str], group: str) -> List[str]:
+    # Removes footprint, symbol and models of each part in one transaction.
+    #   Symbols are cut out of their library by the byte ranges kept by the
+    #   symbol offset indexes, so libraries are never parsed.  Libraries left
+    #   without symbols or footprints are deleted along with their library
+    #   table entries
+    # Returns containers of deleted libraries
+    deleted_libraries = []
+
+    recover_transactions(project_folder)
+
+    with Transaction(journal_folder=project_folder) as transaction:
+        library_batch = LibraryBatch(project_folder, group, transaction)
+
+        part_categories = set()
+        for part_number in dict.fromkeys(part_numbers):
+            part_categories.add(
+                remove_part(part_number, project_folder, group, library_batch)
+            )
+
+        for part_category in sorted(part_categories):
+            deleted_libraries += remove_empty_libraries(
+                project_folder, group, part_category, library_batch
+            )
 
-        # OPP: Remove part from category library
-        #   Needs footprint name
+        library_batch.flush()
 
-        # OPP: Remove base folder (remove all libraries)
+        # Index is committed along with the project files it describes
+        library_batch.part_index.save(transaction)
 
-        # https://en.wikipedia.org/wiki/Atomicity_(database_systems)
-        #   "consistency also relies on atomicity to roll back the enclosing
-        #   transaction in the event of a consistency violation by an illegal
-        #   transaction."
+    return deleted_libraries
 
 
-def merge_newly_migrated_symbol_libraries(project_folder: Path, group: str):
-    symbol_library_table_path = get_symbol_library_table(project_folder)
-    symbol_library_table = kiutils.libraries.LibTable.from_file(
-        symbol_library_table_path
+def remove_part(part_number: str, project_folder: Path, group: str, library_batch: LibraryBatch) -> str:
+    # Stages removal of part into library_batch.  Returns category of part
+    #   Part index records which files belong to part.  Parts installed
+    #   before the index cannot be removed
+    part_entry = library_batch.part_index.get(part_number)
+    if part_entry is None:
+        raise Exception(f"{part_number} is not installed in group {group}!")
+
+    transaction = library_batch.transaction
+    part_category = part_entry['category']
+    part_files = part_entry['files']
+
+    transaction.delete(project_folder / part_files['footprint'])
+
+    # Models in model store may be shared, and are left to `gc`
+    store_container = get_model_store(project_folder, group).store_container
+    models_base_folder = project_folder / parts_folder / group / models_3d_folder
+
+    for model_container in part_files['models']:
+        model_container = Path(model_container)
+        if is_relative_to(model_container, store_container):
+            continue
+
+        transaction.delete(project_folder / model_container)
+
+        # Part's model folder, and category's .3dshapes folder once it holds
+        #   no more parts
+        model_folder = project_folder / model_container.parent
+        transaction.on_commit(
+            lambda model_folder=model_folder:
+                remove_empty_folders(model_folder, models_base_folder)
+        )
+
+    symbol_library = Path(part_files['symbol_library'])
+    if symbol_library.suffix == '.lib':
+        library_batch.remove_legacy_symbols(symbol_library, [part_number])
+    else:
+        # Symbols of parts made by `new` are named with their library nickname
+        library_batch.remove_symbols(symbol_library, [
+            part_number,
+            f'{get_library_nickname(group, part_category)}:{part_number}'
+        ])
+
+    library_batch.part_index.delete(part_number)
+
+    return part_category
+
+
+def remove_empty_libraries(project_folder: Path, group: str, part_category: str, library_batch: LibraryBatch) -> List[str]:
+    # Stages deletion of libraries of category left empty by library_batch,
+    #   and of their library table entries.  Returns containers of deleted
+    #   libraries
+    # Libraries of a category with installed parts left are not empty, and
+    #   are not looked at
+    if len(library_batch.part_index.parts_in_category(part_category)) > 0:
+        return []
+
+    # @NOTE: Part number is not part of footprint and symbol containers
+    footprint_container, _ = get_library_container(
+        '', group, part_category, ComponentData.PCB
+    )
+    symbol_container, _ = get_library_container(
+        '', group, part_category, ComponentData.SCHEMATIC
+    )
+    legacy_symbol_container, _ = get_library_container(
+        '', group, part_category, ComponentData.LEGACY_SCHEMATIC
     )
 
-    # Find all library entries that have been converted to modern library:
+    library_nickname = get_library_nickname(group, part_category)
+    legacy_library_nickname = get_legacy_library_nickname(group, part_category)
+
+    transaction = library_batch.transaction
+    deleted_libraries = []
+
+    # Libraries may still hold files of parts not in part index
+    footprint_library = project_folder / footprint_container
+    if footprint_library.is_dir():
+        has_footprints = any(
+            entry.name.endswith('.kicad_mod') and
+            not transaction.is_deleted(Path(entry.path))
+            for entry in os.scandir(footprint_library)
+        )
+
+        if not has_footprints:
+            library_batch.footprint_table.remove({library_nickname})
+            transaction.on_commit(
+                lambda: remove_empty_folders(
+                    footprint_library, footprint_library.parent
+                )
+            )
+            deleted_libraries.append(footprint_container.as_posix())
+
+    legacy_symbols_left = library_batch.remaining_symbol_names(legacy_symbol_container)
+    if len(legacy_symbols_left) == 0:
+        if (project_folder / legacy_symbol_container).exists():
+            deleted_libraries.append(legacy_symbol_container.as_posix())
+
+        library_batch.delete_library(legacy_symbol_container)
+        library_batch.symbol_table.remove({legacy_library_nickname})
+
+    # Symbol library is where legacy symbols get migrated to, so is kept as
+    #   long as legacy library has symbols
+    if len(legacy_symbols_left) == 0 and \
+            len(library_batch.remaining_symbol_names(symbol_container)) == 0:
+        if (project_folder / symbol_container).exists():
+            deleted_libraries.append(symbol_container.as_posix())
+
+        library_batch.delete_library(symbol_container)
+        library_batch.symbol_table.remove({library_nickname})
+
+    return deleted_libraries
+
+
+def remove_empty_folders(folder: Path, base_folder: Path):
+    # Removes folder, then its parents up to base_folder, while they are empty
+    while folder != base_folder and is_relative_to(folder, base_folder):
+        try:
+            folder.rmdir()
+        except OSError:
+            # Not empty, or already removed
+            return
+
+        folder = folder.parent
+
+
+def prepare_migrated_symbols(migrated_lib_path: Path, library_nickname: str) -> List[Tuple[str, str, str]]:
+    import kiutils.symbol
+
+    # Returns (symbol ID, entry name, S-Expression) of each symbol in
+    #   migrated library, pointed at their footprints in library_nickname
+    migrated_lib = kiutils.symbol.SymbolLib.from_file(migrated_lib_path)
+
+    # Set "Footprint" property of new symbols to ensure symbol points to footprint
+    #   https://dev-docs.kicad.org/en/file-formats/sexpr-intro/index.html#_library_identifier
+    for symbol in migrated_lib.symbols:
+        for sym_property in symbol.properties:
+            if sym_property.key == "Footprint":
+                # KiCad has symbol point to its associated footprint where after the colon (:) is the footprint library FILENAME
+                footprint_filename = sanitize_for_filesystem(
+                    symbol.entryName
+                )
+                sym_property.value = f'{library_nickname}:{footprint_filename}'
+
+    return [
+        (symbol.libId, symbol.entryName, symbol.to_sexpr(indent=2))
+        for symbol in migrated_lib.symbols
+    ]
+
+
+def is_migrated_symbol_library(symbol_lib: 'kiutils.libraries.Library') -> bool:
+    # Library entries that have been converted to modern library:
     #   - legacy prefix in nickname
     #   - are type KiCad
     #   - have .kicad_sym file extension
-    migrated_libs = []
+    prefix_part = symbol_lib.name[:len(LEGACY_PREFIX)]
+
+    has_legacy_prefix = prefix_part == LEGACY_PREFIX
+    is_type_kicad = symbol_lib.type == 'KiCad'
+    has_modern_extension = Path(symbol_lib.uri).suffix == ".kicad_sym"
+
+    return has_legacy_prefix and is_type_kicad and has_modern_extension
 
-    for symbol_lib in symbol_library_table.libs:
-        prefix_part = symbol_lib.name[:len(LEGACY_PREFIX)]
 
-        has_legacy_prefix = prefix_part == LEGACY_PREFIX
-        is_type_kicad = symbol_lib.type == 'KiCad'
-        has_modern_extension = Path(symbol_lib.uri).suffix == ".kicad_sym"
+def merge_newly_migrated_symbol_libraries(project_folder: Path, group: str, jobs: Optional[int] = None, nicknames: Optional[Set[str]] = None) -> List[str]:
+    # If nicknames are given, only those of the migrated libraries are merged
+    #   Returns nicknames of merged libraries
+    import concurrent.futures
+
+    recover_transactions(project_folder)
+
+    symbol_library_table_path = get_symbol_library_table(project_folder)
+    symbol_library_table_index = load_library_table(
+        'sym_lib_table', symbol_library_table_path
+    )
+    symbol_library_table = symbol_library_table_index.library_table
 
-        if has_legacy_prefix and is_type_kicad and has_modern_extension:
-            migrated_libs.append(symbol_lib)
+    # Find all library entries that have been converted to modern library
+    migrated_libs = [
+        symbol_lib for symbol_lib in symbol_library_table.libs
+        if is_migrated_symbol_library(symbol_lib) and
+        (nicknames is None or symbol_lib.name in nicknames)
+    ]
 
     if len(migrated_libs) == 0:
         raise Exception("No migrated symbol libraries found!")
 
-    # For each converted lib, find existing modern sym library entry without
-    #   legacy extension and merge both libs
+    # For each converted lib, merge with its modern library
     nicknames_to_delete = set()
     files_to_delete = set()
-    modern_libs_to_save = []
+    # Modern library path -> migrated symbols (ID -> S-Expression) to add to it
+    symbols_to_add: Dict[Path, Dict[str, str]] = {}
 
+    part_index = PartIndex.for_group(project_folder, parts_folder, group)
+
+    # Pair each migrated lib with its existing modern sym library entry
+    #   (same nickname without legacy prefix) by nickname lookup
+    migrated_lib_pairs = []
     for migrated_lib_entry in migrated_libs:
-        matching_lib_found = False
-        for modern_lib_entry in symbol_library_table.libs:
-            non_legacy_name = migrated_lib_entry.name[len(LEGACY_PREFIX) + 1:]
-
-            if non_legacy_name == modern_lib_entry.name:
-                migrated_lib_path = project_folder / \
-                    Path(migrated_lib_entry.uri).relative_to(
-                        KICAD_PROJECT_ENV_VAR)
-                modern_lib_path = project_folder / \
-                    Path(modern_lib_entry.uri).relative_to(
-                        KICAD_PROJECT_ENV_VAR)
-
-                migrated_lib = kiutils.symbol.SymbolLib.from_file(
-                    migrated_lib_path
+        non_legacy_name = migrated_lib_entry.name[len(LEGACY_PREFIX) + 1:]
+
+        modern_lib_entry = symbol_library_table_index.get(non_legacy_name)
+        if modern_lib_entry is None:
+            raise Exception(
+                f"No modern matching symbol library to {migrated_lib_entry.name} is found!"
+            )
+
+        migrated_lib_pairs.append(
+            (migrated_lib_entry, modern_lib_entry, non_legacy_name)
+        )
+
+    # Parse, rewrite and serialize of each migrated library is independent
+    #   of the others, so they are done in a process pool
+    migrated_lib_paths = [
+        project_folder / Path(migrated_lib_entry.uri).relative_to(
+            KICAD_PROJECT_ENV_VAR
+        )
+        for migrated_lib_entry, _, _ in migrated_lib_pairs
+    ]
+    non_legacy_names = [
+        non_legacy_name for _, _, non_legacy_name in migrated_lib_pairs
+    ]
+
+    if len(migrated_lib_pairs) > 1 and jobs != 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            migrated_symbols = list(executor.map(
+                prepare_migrated_symbols, migrated_lib_paths, non_legacy_names
+            ))
+    else:
+        migrated_symbols = list(map(
+            prepare_migrated_symbols, migrated_lib_paths, non_legacy_names
+        ))
+
+    for (migrated_lib_entry, modern_lib_entry, _), migrated_lib_path, symbols in \
+            zip(migrated_lib_pairs, migrated_lib_paths, migrated_symbols):
+        modern_lib_path = project_folder / \
+            Path(modern_lib_entry.uri).relative_to(
+                KICAD_PROJECT_ENV_VAR)
+
+        # Merge two symbol libraries
+        modern_lib_symbols = symbols_to_add.setdefault(modern_lib_path, {})
+        for symbol_id, _, symbol_sexpr in symbols:
+            if symbol_id in modern_lib_symbols:
+                raise Exception(
+                    f"Symbol {symbol_id} already exists in {modern_lib_path.name}!"
                 )
-                modern_lib = kiutils.symbol.SymbolLib.from_file(
-                    modern_lib_path
+            modern_lib_symbols[symbol_id] = symbol_sexpr
+
+        # Symbols now live in modern library
+        modern_lib_container = modern_lib_path.relative_to(
+            project_folder
+        ).as_posix()
+        for _, entry_name, _ in symbols:
+            if entry_name in part_index:
+                part_index.update(
+                    entry_name,
+                    files={
+                        **part_index.get(entry_name)['files'],
+                        'symbol_library': modern_lib_container,
+                    }
                 )
 
-                # Set "Footprint" property of new symbols to ensure symbol points to footprint
-                #   https://dev-docs.kicad.org/en/file-formats/sexpr-intro/index.html#_library_identifier
-                for symbol in migrated_lib.symbols:
-                    for sym_property in symbol.properties:
-                        if sym_property.key == "Footprint":
-                            # KiCad has symbol point to its associated footprint where after the colon (:) is the footprint library FILENAME
-                            footprint_filename = sanitize_for_filesystem(
-                                symbol.entryName
-                            )
-                            sym_property.value = f'{non_legacy_name}:{footprint_filename}'
+        # Mark migrated library to be removed from library table
+        nicknames_to_delete.add(migrated_lib_entry.name)
 
-                # Merge two symbol libraries
-                # @TODO: Check duplicate names
-                modern_lib.symbols += migrated_lib.symbols
+        # Delete legacy library file (.lib), and its saved symbol index
+        files_to_delete.add(migrated_lib_path.with_suffix('.lib'))
+        files_to_delete.add(
+            legacy_symbol_index_path(migrated_lib_path.with_suffix('.lib'))
+        )
+        # Delete migrated library file (.kicad_sym), and its saved symbol
+        #   index
+        files_to_delete.add(migrated_lib_path)
+        files_to_delete.add(kicad_symbol_index_path(migrated_lib_path))
 
-                # Mark migrated library to be removed from library table
-                nicknames_to_delete.add(migrated_lib_entry.name)
+    # Remove all marked library table entries
+    symbol_library_table_index.remove(nicknames_to_delete)
 
-                # Save symbol library
-                modern_libs_to_save.append(modern_lib)
+    with Transaction(journal_folder=project_folder) as transaction:
+        # Delete all files to delete
+        for file_to_delete in files_to_delete:
+            transaction.delete(file_to_delete)
 
-                # Delete legacy library file (.lib)
-                files_to_delete.add(migrated_lib_path.with_suffix('.lib'))
-                # Delete migrated library file (.kicad_sym)
-                files_to_delete.add(migrated_lib_path)
+        # Save symbol libraries
+        #   Duplicate names are checked here, before anything is committed
+        for modern_lib_path, symbols in symbols_to_add.items():
+            add_symbols_to_library(modern_lib_path, symbols, transaction)
 
-                matching_lib_found = True
+        # Save symbol library table
+        save_library_table(symbol_library_table_index, transaction)
 
-                continue
+        part_index.save(transaction)
 
-        if not matching_lib_found:
-            raise Exception(
-                f"No modern matching symbol library to {migrated_lib_entry.name} is found!"
-            )
+    return sorted(nicknames_to_delete)
 
-    # Remove all marked library table entries
-    for nickname_to_delete in nicknames_to_delete:
-        for symbol_lib_entry in symbol_library_table.libs:
-            if symbol_lib_entry.name == nickname_to_delete:
-                symbol_library_table.libs.remove(symbol_lib_entry)
 
-    # Delete all files to delete
-    for file_to_delete in files_to_delete:
-        file_to_delete.unlink()
+def new_part(project_folder: Path, part_number: str, part_category: str, group: str):
+    recover_transactions(project_folder)
 
-    # Save symbol libraries
-    for modern_lib in modern_libs_to_save:
-        modern_lib.to_file()
+    part_index = PartIndex.for_group(project_folder, parts_folder, group)
 
-    # Save symbol library table
-    symbol_library_table.to_file()
+    if part_number in part_index:
+        raise Exception(
+            f"{part_number} already exists in category "
+            f"{part_index.category_of(part_number)}!"
+        )
 
+    with Transaction(journal_folder=project_folder) as transaction:
+        part_index_entry = stage_new_part(
+            project_folder, part_number, part_category, group, transaction
+        )
 
-def new_part(project_folder: Path, part_number: str, part_category: str, group: str):
+        part_index.put(part_index_entry)
+        part_index.save(transaction)
 
-    ensure_part_containers(project_folder, part_number, group, part_category)
+
+def stage_new_part(project_folder: Path, part_number: str, part_category: str, group: str, transaction: Transaction) -> dict:
+    import kiutils.footprint
+    import kiutils.symbol
+
+    ensure_part_containers(
+        project_folder, part_number, group, part_category, transaction
+    )
 
     # Add blank symbol
     symbol_library_path, _ = get_library_container(
@@ -756,17 +2554,12 @@ def new_part(project_folder: Path, part_number: str, part_category: str, group:
     library_nickname = get_library_nickname(group, part_category)
     library_link = f'{library_nickname}:{part_number}'
 
-    symbol_library = kiutils.symbol.SymbolLib.from_file(
-        project_folder / symbol_library_path
-    )
     new_part_symbol = kiutils.symbol.Symbol.create_new(
         id=library_link,
         value=part_number,
         reference=part_number,
         footprint=library_link
     )
-    # @TODO: Check for duplicate part numbers
-    symbol_library.symbols.append(new_part_symbol)
 
     # Add blank footprint
     footprint_library_path, _ = get_library_container(
@@ -786,10 +2579,10 @@ def new_part(project_folder: Path, part_number: str, part_category: str, group:
     footprint_table_path = get_footprint_library_table(project_folder)
     symbol_table_path = get_symbol_library_table(project_folder)
 
-    footprint_table = get_library_table_else_new(
+    footprint_table = load_library_table(
         'fp_lib_table', footprint_table_path
     )
-    symbol_table = get_library_table_else_new(
+    symbol_table = load_library_table(
         'sym_lib_table', symbol_table_path
     )
 
@@ -803,10 +2596,27 @@ def new_part(project_folder: Path, part_number: str, part_category: str, group:
     )
 
     # Commit additions
-    symbol_library.to_file()
-    new_part_footprint.to_file(
-        project_folder / footprint_library_path / f'{part_number}.kicad_mod'
+    add_symbols_to_library(
+        project_folder / symbol_library_path,
+        {new_part_symbol.libId: new_part_symbol.to_sexpr(indent=2)},
+        transaction
+    )
+    transaction.write_text(
+        project_folder / footprint_library_path / f'{part_number}.kicad_mod',
+        new_part_footprint.to_sexpr()
     )
 
-    footprint_table.to_file()
-    symbol_table.to_file()
+    save_library_table(footprint_table, transaction)
+    save_library_table(symbol_table, transaction)
+
+    return {
+        'part_number': part_number,
+        'category': part_category,
+        'source': 'new',
+        'files': {
+            'footprint': (footprint_library_path / f'{part_number}.kicad_mod').as_posix(),
+            'symbol_library': symbol_library_path.as_posix(),
+            'models': [],
+        },
+        'hashes': {},
+    }
@@ -0,0 +1,166 @@
+import hashlib
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from . import profiling
+
+# On disk cache of upgraded footprints, shared by all projects
+#   Upgrading a Component Search Engine footprint (parse, then serialize with
+#   kiutils) gives the same text every time for the same footprint file, so
+#   the upgraded text is stored under a hash of the footprint file, target
+#   footprint version and kiutils version:
+#       <cache>/<first 2 hash characters>/<hash>.kicad_mod
+#   Footprint name and model paths differ per import, and are patched into
+#   the cached text instead.
+#   Least recently used footprints are evicted once the cache outgrows its
+#   size.  Using a cached footprint updates its modification time, which is
+#   what recency is judged by
+
+CACHE_FOLDER_ENVIROMENT_VAR = "KICAD_COMPONENT_MANAGER_CACHE"
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# Matches paths of `(model <path> ...)` expressions in footprint files
+_model_path_regex = re.compile(r'\(model\s+(?:"((?:[^"\\]|\\.)*)"|([^\s()]+))')
+# Name of footprint as written by kiutils
+_footprint_name_regex = re.compile(r'\(footprint\s+"((?:[^"\\]|\\.)*)"')
+
+
+def _quote(string: str) -> str:
+    # Same escaping as kiutils' `dequote`
+    return '"' + string.replace('"', '\\"') + '"'
+
+
+def _unquote(match: re.Match) -> str:
+    if match.group(1) is not None:
+        return re.sub(r'\\(.)', r'\1', match.group(1))
+    return match.group(2)
+
+
+def footprint_model_paths(footprint_sexpr: str) -> List[str]:
+    # Paths of models of footprint, found without parsing footprint
+    return [
+        _unquote(match) for match in _model_path_regex.finditer(footprint_sexpr)
+    ]
+
+
+def replace_footprint_model_paths(footprint_sexpr: str, replace: Callable[[str], str]) -> str:
+    # replace maps each model path of footprint to its new path
+    return _model_path_regex.sub(
+        lambda match: f'(model {_quote(replace(_unquote(match)))}',
+        footprint_sexpr
+    )
+
+
+def set_footprint_name(footprint_sexpr: str, name: str) -> str:
+    return _footprint_name_regex.sub(
+        lambda match: f'(footprint {_quote(name)}', footprint_sexpr, count=1
+    )
+
+
+def get_kiutils_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version('kiutils')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def get_default_cache_folder() -> Path:
+    cache_folder = os.environ.get(CACHE_FOLDER_ENVIROMENT_VAR)
+    if cache_folder:
+        return Path(cache_folder)
+
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_home) / 'kicad-component-manager' / 'footprints'
+
+
+@dataclass
+class FootprintCache:
+    """Upgraded footprints by hash of their original footprint file."""
+    folder: Path
+    max_size: int = DEFAULT_MAX_SIZE
+    # Cached upgrades are only valid for the kiutils that made them.  Looked
+    #   up once, as cache is sent to worker processes
+    kiutils_version: str = field(default_factory=get_kiutils_version)
+
+    @classmethod
+    def default(cls):
+        return cls(get_default_cache_folder())
+
+    def cache_path(self, footprint_string: str, footprint_version: str) -> Path:
+        key = hashlib.sha256()
+        key.update(f'{footprint_version}\0{self.kiutils_version}\0'.encode('utf-8'))
+        key.update(footprint_string.encode('utf-8'))
+        key = key.hexdigest()
+
+        return self.folder / key[:2] / f'{key}.kicad_mod'
+
+    def get(self, footprint_string: str, footprint_version: str) -> Optional[str]:
+        cache_path = self.cache_path(footprint_string, footprint_version)
+
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                upgraded_footprint = file.read()
+            os.utime(cache_path)
+        except OSError:
+            profiling.count('footprint_cache_misses')
+            return None
+
+        profiling.count('footprint_cache_hits')
+        return upgraded_footprint
+
+    def put(self, footprint_string: str, footprint_version: str, upgraded_footprint: str):
+        # Cache is only an optimization, failing to write to it is ignored
+        cache_path = self.cache_path(footprint_string, footprint_version)
+        # Unique, as workers may cache same footprint at the same time
+        temporary_path = cache_path.parent / f'.{uuid.uuid4().hex}.tmp'
+
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                file.write(upgraded_footprint)
+            os.replace(temporary_path, cache_path)
+        except OSError:
+            if temporary_path.exists():
+                temporary_path.unlink()
+
+    def evict(self) -> int:
+        # Remove least recently used footprints until cache fits max_size
+        #   Returns number of footprints removed
+        if not self.folder.is_dir():
+            return 0
+
+        # (modification time, size, path)
+        cached_files = []
+        for fan_out_entry in os.scandir(self.folder):
+            if not fan_out_entry.is_dir():
+                continue
+
+            for entry in os.scandir(fan_out_entry.path):
+                if entry.is_file() and entry.name.endswith('.kicad_mod'):
+                    entry_stat = entry.stat()
+                    cached_files.append(
+                        (entry_stat.st_mtime_ns, entry_stat.st_size, entry.path)
+                    )
+
+        cache_size = sum(size for _, size, _ in cached_files)
+
+        removed = 0
+        for _, size, path in sorted(cached_files):
+            if cache_size <= self.max_size:
+                break
+
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+
+            cache_size -= size
+            removed += 1
+
+        return removed
@@ -0,0 +1,283 @@
+import bisect
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Lightweight index of the top level symbols of a KiCad symbol library
+#   (.kicad_sym) without building kiutils objects.  Only parentheses and
+#   strings are tokenized, which is enough to find where each top level
+#   `(symbol "name" ...)` starts and ends.  Indexes are saved beside their
+#   library, so a new process (without the daemon) only scans a library
+#   again once it was changed by something else (i.e. KiCad).
+
+# Strings are matched whole so parentheses inside them are skipped
+_token_regex = re.compile(rb'"(?:[^"\\]|\\.)*"|[()]')
+_symbol_head_regex = re.compile(rb'\(symbol\s+"((?:[^"\\]|\\.)*)"')
+
+
+@dataclass
+class KicadSymbolIndex:
+    """Byte ranges of the top level symbols of a .kicad_sym file."""
+    # Symbol name -> (start offset, end offset) of its `(symbol ...)`
+    symbols: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    # Offset of the closing parenthesis of `(kicad_symbol_lib ...)`
+    library_end: int = -1
+    stat_key: Tuple[int, int] = (0, 0)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.symbols)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.symbols
+
+    @classmethod
+    def from_bytes(cls, library_bytes: bytes):
+        out = cls()
+
+        depth = 0
+        symbol_start = None
+        symbol_name = None
+
+        for token in _token_regex.finditer(library_bytes):
+            token_text = token.group(0)
+
+            if token_text == b'(':
+                depth += 1
+
+                # Children of root expression
+                if depth == 2:
+                    head = _symbol_head_regex.match(
+                        library_bytes, token.start()
+                    )
+                    if head is not None:
+                        symbol_start = token.start()
+                        symbol_name = _unescape(head.group(1))
+            elif token_text == b')':
+                if depth == 2 and symbol_start is not None:
+                    out.symbols[symbol_name] = (symbol_start, token.end())
+                    symbol_start = None
+                elif depth == 1:
+                    out.library_end = token.start()
+
+                depth -= 1
+
+        if out.library_end < 0:
+            raise Exception("Symbol library is missing its closing parenthesis")
+
+        return out
+
+
+def _unescape(name_bytes: bytes) -> str:
+    return re.sub(rb'\\(.)', rb'\1', name_bytes).decode('utf-8')
+
+
+def file_stat_key(file_path: Path) -> Tuple[int, int]:
+    # Changes whenever file is modified.  Used to validate caches of files
+    file_stat = os.stat(file_path)
+    return (file_stat.st_mtime_ns, file_stat.st_size)
+
+
+# Symbol library path -> index, validated by modification time and size
+_kicad_symbol_indexes: Dict[Path, KicadSymbolIndex] = {}
+
+
+KICAD_SYMBOL_INDEX_FORMAT_VERSION = 1
+
+
+def kicad_symbol_index_path(library_path: Path) -> Path:
+    return library_path.with_name(f'.{library_path.name}.index.json')
+
+
+def _load_kicad_symbol_index(library_path: Path, stat_key: Tuple[int, int]) -> Optional[KicadSymbolIndex]:
+    # None if there is no saved index, or library changed since it was saved
+    try:
+        with open(kicad_symbol_index_path(library_path), 'r') as index_file:
+            saved_index = json.load(index_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if saved_index.get('version') != KICAD_SYMBOL_INDEX_FORMAT_VERSION or \
+            tuple(saved_index['stat_key']) != stat_key:
+        return None
+
+    return KicadSymbolIndex(
+        {
+            name: tuple(symbol_range)
+            for name, symbol_range in saved_index['symbols'].items()
+        },
+        saved_index['library_end'],
+        stat_key
+    )
+
+
+def _save_kicad_symbol_index(library_path: Path, index: KicadSymbolIndex):
+    # Saved index is only an optimization, so failing to save it is ignored
+    index_path = kicad_symbol_index_path(library_path)
+    temporary_path = index_path.with_suffix('.tmp')
+
+    try:
+        with open(temporary_path, 'w') as index_file:
+            json.dump(
+                {
+                    'version': KICAD_SYMBOL_INDEX_FORMAT_VERSION,
+                    'stat_key': index.stat_key,
+                    'library_end': index.library_end,
+                    'symbols': index.symbols,
+                },
+                index_file
+            )
+        temporary_path.replace(index_path)
+    except OSError:
+        pass
+
+
+def get_kicad_symbol_index(library_path: Path) -> KicadSymbolIndex:
+    stat_key = file_stat_key(library_path)
+
+    index = _kicad_symbol_indexes.get(library_path)
+    if index is None or index.stat_key != stat_key:
+        index = _load_kicad_symbol_index(library_path, stat_key)
+
+    if index is None:
+        with open(library_path, 'rb') as file:
+            index = KicadSymbolIndex.from_bytes(file.read())
+        index.stat_key = stat_key
+
+        _save_kicad_symbol_index(library_path, index)
+
+    _kicad_symbol_indexes[library_path] = index
+
+    return index
+
+
+def append_kicad_symbols(library_path: Path, symbols: Dict[str, str], transaction):
+    # Insert symbols (name -> S-Expression) in front of the closing
+    #   parenthesis of an existing library, leaving rest of library untouched
+    index = get_kicad_symbol_index(library_path)
+
+    appended_data = ''.join(symbols.values()).encode('utf-8') + b')\n'
+    transaction.splice(library_path, index.library_end, appended_data)
+
+    # Keep cached index valid instead of rescanning library
+    stat_key_before = index.stat_key
+
+    def update_index():
+        if _kicad_symbol_indexes.get(library_path) is not index or \
+                index.stat_key != stat_key_before:
+            return
+
+        _index_appended_symbols(index, symbols)
+        index.stat_key = file_stat_key(library_path)
+        _save_kicad_symbol_index(library_path, index)
+
+    transaction.on_commit(update_index)
+
+
+def _index_appended_symbols(index: KicadSymbolIndex, symbols: Dict[str, str]):
+    # Add symbols written at library end to index
+    offset = index.library_end
+    for name, symbol_sexpr in symbols.items():
+        symbol_bytes = symbol_sexpr.encode('utf-8')
+        # Range excludes indentation and trailing newline
+        index.symbols[name] = (
+            offset + symbol_bytes.index(b'('),
+            offset + symbol_bytes.rindex(b')') + 1
+        )
+        offset += len(symbol_bytes)
+
+    index.library_end = offset
+
+
+def remove_kicad_symbols(library_path: Path, names: List[str], transaction):
+    replace_kicad_symbols(library_path, names, {}, transaction)
+
+
+def replace_kicad_symbols(library_path: Path, removed_names: List[str], symbols: Dict[str, str], transaction):
+    # Cut removed symbols out of library by their byte ranges, along with
+    #   their indentation and line break, and insert symbols (name ->
+    #   S-Expression) in front of closing parenthesis of library.  Only the
+    #   library from the first removed symbol onward is rewritten.  Removed
+    #   names not in library are ignored
+    index = get_kicad_symbol_index(library_path)
+
+    removed_ranges = sorted(
+        index.symbols[name] for name in removed_names if name in index.symbols
+    )
+
+    if len(removed_ranges) == 0 and len(symbols) == 0:
+        return
+    if len(removed_ranges) == 0:
+        append_kicad_symbols(library_path, symbols, transaction)
+        return
+
+    # Removed ranges are read with some bytes before them to find the start
+    #   of their line
+    splice_offset = removed_ranges[0][0]
+    with open(library_path, 'rb') as file:
+        read_offset = max(splice_offset - 256, 0)
+        file.seek(read_offset)
+        old_tail = file.read(index.library_end - read_offset)
+
+    def extend_to_lines(start: int, end: int) -> Tuple[int, int]:
+        while start > read_offset and \
+                old_tail[start - read_offset - 1:start - read_offset] in (b' ', b'\t'):
+            start -= 1
+        if old_tail[end - read_offset:end - read_offset + 1] == b'\n':
+            end += 1
+        return start, end
+
+    removed_ranges = [extend_to_lines(start, end) for start, end in removed_ranges]
+    splice_offset = removed_ranges[0][0]
+
+    new_tail = []
+    tail_offset = splice_offset
+    for start, end in removed_ranges:
+        new_tail.append(old_tail[tail_offset - read_offset:start - read_offset])
+        tail_offset = end
+    new_tail.append(old_tail[tail_offset - read_offset:])
+
+    new_tail.append(''.join(symbols.values()).encode('utf-8') + b')\n')
+
+    transaction.splice(library_path, splice_offset, b''.join(new_tail))
+
+    # Keep cached index valid by shifting symbols after each cut back,
+    #   instead of rescanning library
+    stat_key_before = index.stat_key
+    removed_names = [name for name in removed_names if name in index.symbols]
+
+    def update_index():
+        if _kicad_symbol_indexes.get(library_path) is not index or \
+                index.stat_key != stat_key_before:
+            return
+
+        for name in removed_names:
+            del index.symbols[name]
+
+        index.symbols = shift_offsets(index.symbols, removed_ranges)
+        index.library_end -= sum(end - start for start, end in removed_ranges)
+
+        _index_appended_symbols(index, symbols)
+        index.stat_key = file_stat_key(library_path)
+        _save_kicad_symbol_index(library_path, index)
+
+    transaction.on_commit(update_index)
+
+
+def shift_offsets(symbols: Dict[str, Tuple[int, int]], removed_ranges: List[Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+    # Byte ranges of symbols once removed_ranges (sorted, not overlapping any
+    #   symbol) are cut out of the file
+    cut_starts = [start for start, _ in removed_ranges]
+    cut_lengths = [0]
+    for start, end in removed_ranges:
+        cut_lengths.append(cut_lengths[-1] + end - start)
+
+    shifted = {}
+    for name, (start, end) in symbols.items():
+        removed_before = cut_lengths[bisect.bisect_right(cut_starts, start)]
+        shifted[name] = (start - removed_before, end - removed_before)
+
+    return shifted
@@ -0,0 +1,407 @@
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Conversion of legacy symbols (.lib, KiCad 5 and prior) to modern symbols
+#   (.kicad_sym, KiCad 6), so imported parts do not have to be migrated in
+#   KiCad's Symbol Editor.  Follows the legacy record formats of
+#   https://dev-docs.kicad.org/en/file-formats/legacy-symbol-library/
+#   Legacy files use mils and modern files use millimeters.  Both use an
+#   upwards Y axis for symbols, so coordinates are only scaled
+#   Drawing items are put into child symbols by their unit and body style
+#   (`<name>_<unit>_<body style>`, 0 meaning common to all), as KiCad does
+
+MILS_TO_MM = 0.0254
+
+# Quoted strings (with escapes) or bare tokens
+_token_regex = re.compile(r'"(?:[^"\\]|\\.)*"|\S+')
+
+# Keys of the legacy fields with fixed meaning (F0 to F3)
+_FIELD_KEYS = ["Reference", "Value", "Footprint", "Datasheet"]
+
+_PIN_ELECTRICAL_TYPES = {
+    'I': 'input',
+    'O': 'output',
+    'B': 'bidirectional',
+    'T': 'tri_state',
+    'P': 'passive',
+    'U': 'unspecified',
+    'W': 'power_in',
+    'w': 'power_out',
+    'C': 'open_collector',
+    'E': 'open_emitter',
+    'N': 'no_connect',
+}
+
+# Pin shape letters, without `N` (invisible pin)
+_PIN_GRAPHICAL_STYLES = {
+    '': 'line',
+    'I': 'inverted',
+    'C': 'clock',
+    'CI': 'inverted_clock',
+    'IC': 'inverted_clock',
+    'L': 'input_low',
+    'CL': 'clock_low',
+    'LC': 'clock_low',
+    'V': 'output_low',
+    'F': 'edge_clock_high',
+    'X': 'non_logic',
+}
+
+# Line segments Bezier curves are approximated with
+BEZIER_SEGMENTS = 16
+
+# Pin orientation -> angle pin points at from its connection point
+_PIN_ANGLES = {'R': 0, 'U': 90, 'L': 180, 'D': 270}
+
+_FILL_TYPES = {'N': 'none', 'F': 'outline', 'f': 'background'}
+
+
+def _tokenize(line: str) -> List[str]:
+    return _token_regex.findall(line)
+
+
+def _unquote(token: str) -> str:
+    if len(token) >= 2 and token[0] == '"' and token[-1] == '"':
+        return re.sub(r'\\(.)', r'\1', token[1:-1])
+    return token
+
+
+def _mm(mils):
+    millimeters = round(float(mils) * MILS_TO_MM, 4)
+    # Whole numbers are written without decimals, as KiCad does
+    return int(millimeters) if millimeters.is_integer() else millimeters
+
+
+def _angle(degrees):
+    degrees = float(degrees)
+    return int(degrees) if degrees.is_integer() else degrees
+
+
+def _position(x, y, angle=None):
+    import kiutils.items.common
+
+    return kiutils.items.common.Position(
+        X=_mm(x), Y=_mm(y), angle=None if angle is None else _angle(angle)
+    )
+
+
+def _effects(size, hide=False, horizontal_justify=None, vertical_justify=None, italic=False, bold=False):
+    import kiutils.items.common
+
+    return kiutils.items.common.Effects(
+        font=kiutils.items.common.Font(
+            height=_mm(size), width=_mm(size), italic=italic, bold=bold
+        ),
+        justify=kiutils.items.common.Justify(
+            horizontally=horizontal_justify, vertically=vertical_justify
+        ),
+        hide=hide
+    )
+
+
+def _stroke(thickness):
+    import kiutils.items.common
+
+    return kiutils.items.common.Stroke(width=_mm(thickness), type='default')
+
+
+def _fill(fill_letter: Optional[str]):
+    import kiutils.items.common
+
+    return kiutils.items.common.Fill(type=_FILL_TYPES.get(fill_letter, 'none'))
+
+
+def _convert_field(tokens: List[str], field_number: int):
+    # F<n> "text" posx posy size H/V V/I L/R/C T/B/C+italic+bold ["name"]
+    import kiutils.items.common
+
+    if field_number < len(_FIELD_KEYS):
+        key = _FIELD_KEYS[field_number]
+    else:
+        key = _unquote(tokens[9]) if len(tokens) > 9 else f"Field{field_number}"
+
+    horizontal_justify = {'L': 'left', 'R': 'right'}.get(tokens[7]) \
+        if len(tokens) > 7 else None
+
+    vertical_justify = None
+    italic = bold = False
+    if len(tokens) > 8:
+        style = tokens[8]
+        vertical_justify = {'T': 'top', 'B': 'bottom'}.get(style[0:1])
+        italic = style[1:2] == 'I'
+        bold = style[2:3] == 'B'
+
+    return kiutils.items.common.Property(
+        key=key,
+        value=_unquote(tokens[1]),
+        id=field_number,
+        position=_position(tokens[2], tokens[3], 90 if tokens[5] == 'V' else 0),
+        effects=_effects(
+            tokens[4], hide=tokens[6].startswith('I'),
+            horizontal_justify=horizontal_justify,
+            vertical_justify=vertical_justify,
+            italic=italic, bold=bold
+        )
+    )
+
+
+def _arc_points(tokens: List[str]):
+    # A posx posy radius start_angle end_angle unit convert thickness fill
+    #   [startx starty endx endy]
+    #   Angles are in tenths of a degree
+    # Legacy arcs never span more than 180 degrees: KiCad 5 restricts the
+    #   angles it saves to a difference within (-180, 180] degrees, and draws
+    #   them the short way (`LIB_ARC::CalcRadiusAngles`).  So the midpoint is
+    #   taken on the short way, counterclockwise for exactly 180 degrees
+    center_x, center_y = float(tokens[1]), float(tokens[2])
+    radius = float(tokens[3])
+    start_angle = float(tokens[4])
+    end_angle = float(tokens[5])
+
+    span = (end_angle - start_angle) % 3600
+    if span > 1800:
+        span -= 3600
+
+    def on_circle(angle):
+        angle = math.radians(angle / 10)
+        return (
+            center_x + radius * math.cos(angle),
+            center_y + radius * math.sin(angle)
+        )
+
+    if len(tokens) >= 14:
+        start = (float(tokens[10]), float(tokens[11]))
+        end = (float(tokens[12]), float(tokens[13]))
+    else:
+        start, end = on_circle(start_angle), on_circle(end_angle)
+
+    mid = on_circle(start_angle + span / 2)
+
+    return start, mid, end
+
+
+def _cubic_bezier_point(control_points, t):
+    (x0, y0), (x1, y1), (x2, y2), (x3, y3) = control_points
+    u = 1 - t
+
+    return (
+        u**3 * x0 + 3 * u**2 * t * x1 + 3 * u * t**2 * x2 + t**3 * x3,
+        u**3 * y0 + 3 * u**2 * t * y1 + 3 * u * t**2 * y2 + t**3 * y3
+    )
+
+
+def _convert_draw_item(tokens: List[str]) -> Tuple[Tuple[int, int], object]:
+    # Returns ((unit, body style), item) of one DRAW record
+    import kiutils.items.syitems
+    import kiutils.symbol
+
+    record = tokens[0]
+
+    if record == 'X':
+        # X name number posx posy length orientation sizenum sizename unit
+        #   convert electrical_type [shape]
+        shape = tokens[12] if len(tokens) > 12 else ''
+        hidden = 'N' in shape
+        shape = shape.replace('N', '')
+
+        pin = kiutils.symbol.SymbolPin(
+            electricalType=_PIN_ELECTRICAL_TYPES.get(tokens[11], 'unspecified'),
+            graphicalStyle=_PIN_GRAPHICAL_STYLES.get(shape, 'line'),
+            position=_position(tokens[3], tokens[4], _PIN_ANGLES.get(tokens[6], 0)),
+            length=_mm(tokens[5]),
+            name=_unquote(tokens[1]),
+            nameEffects=_effects(tokens[8]),
+            number=_unquote(tokens[2]),
+            numberEffects=_effects(tokens[7]),
+            hide=hidden
+        )
+        return (int(tokens[9]), int(tokens[10])), pin
+
+    if record == 'S':
+        # S startx starty endx endy unit convert thickness fill
+        rectangle = kiutils.items.syitems.SyRect(
+            start=_position(tokens[1], tokens[2]),
+            end=_position(tokens[3], tokens[4]),
+            stroke=_stroke(tokens[7]),
+            fill=_fill(tokens[8] if len(tokens) > 8 else None)
+        )
+        return (int(tokens[5]), int(tokens[6])), rectangle
+
+    if record == 'C':
+        # C posx posy radius unit convert thickness fill
+        circle = kiutils.items.syitems.SyCircle(
+            center=_position(tokens[1], tokens[2]),
+            radius=_mm(tokens[3]),
+            stroke=_stroke(tokens[6]),
+            fill=_fill(tokens[7] if len(tokens) > 7 else None)
+        )
+        return (int(tokens[4]), int(tokens[5])), circle
+
+    if record in ('P', 'B'):
+        # P/B point_count unit convert thickness (x y)* [fill]
+        point_count = int(tokens[1])
+        coordinates = tokens[5:5 + 2 * point_count]
+        points = [
+            (float(coordinates[index]), float(coordinates[index + 1]))
+            for index in range(0, len(coordinates), 2)
+        ]
+        fill_tokens = tokens[5 + 2 * point_count:]
+
+        # kiutils writes curves without their points, so Bezier curves are
+        #   approximated by polylines.  `convert_legacy_symbol` warns of this
+        if record == 'B' and len(points) == 4:
+            points = [
+                _cubic_bezier_point(points, step / BEZIER_SEGMENTS)
+                for step in range(BEZIER_SEGMENTS + 1)
+            ]
+
+        polyline = kiutils.items.syitems.SyPolyLine(
+            points=[_position(*point) for point in points],
+            stroke=_stroke(tokens[4]),
+            fill=_fill(fill_tokens[0] if fill_tokens else None)
+        )
+        return (int(tokens[2]), int(tokens[3])), polyline
+
+    if record == 'A':
+        start, mid, end = _arc_points(tokens)
+        arc = kiutils.items.syitems.SyArc(
+            start=_position(*start),
+            mid=_position(*mid),
+            end=_position(*end),
+            stroke=_stroke(tokens[8]),
+            fill=_fill(tokens[9] if len(tokens) > 9 else None)
+        )
+        return (int(tokens[6]), int(tokens[7])), arc
+
+    if record == 'T':
+        # T angle posx posy size hidden unit convert text [italic bold
+        #   hjustify vjustify]
+        #   Unquoted text uses `~` in place of spaces
+        text = tokens[8]
+        text = _unquote(text) if text.startswith('"') else text.replace('~', ' ')
+
+        horizontal_justify = {'L': 'left', 'R': 'right'}.get(tokens[11]) \
+            if len(tokens) > 11 else None
+        vertical_justify = {'T': 'top', 'B': 'bottom'}.get(tokens[12]) \
+            if len(tokens) > 12 else None
+
+        text_item = kiutils.items.syitems.SyText(
+            text=text,
+            position=_position(tokens[2], tokens[3], float(tokens[1]) / 10),
+            effects=_effects(
+                tokens[4], hide=tokens[5] != '0',
+                horizontal_justify=horizontal_justify,
+                vertical_justify=vertical_justify,
+                italic=len(tokens) > 9 and tokens[9] == 'Italic',
+                bold=len(tokens) > 10 and tokens[10] != '0'
+            )
+        )
+        return (int(tokens[6]), int(tokens[7])), text_item
+
+    raise Exception(f"Unknown legacy symbol draw record {record}")
+
+
+def legacy_symbol_aliases(legacy_symbol) -> List[str]:
+    # Names of the symbols ALIAS lines derive from legacy_symbol
+    aliases = []
+    for line in legacy_symbol.rest_of_file.splitlines():
+        tokens = _tokenize(line)
+        if len(tokens) > 0 and tokens[0] == 'ALIAS':
+            aliases += tokens[1:]
+
+    return aliases
+
+
+def convert_legacy_symbol(legacy_symbol, conversion_warnings: Optional[List[str]] = None):
+    # legacy_symbol is a `LegacySymbol`.  Returns a `kiutils.symbol.Symbol`
+    #   Approximations made are described in conversion_warnings, if given
+    # Symbols with aliases are not converted, as they would become symbols
+    #   extending this one, which parts do not keep track of
+    import kiutils.items.common
+    import kiutils.symbol
+
+    aliases = legacy_symbol_aliases(legacy_symbol)
+    if len(aliases) > 0:
+        raise Exception(
+            f"Symbol {legacy_symbol.name} has aliases ({', '.join(aliases)}), "
+            "which are not converted!"
+        )
+
+    lines = legacy_symbol.rest_of_file.splitlines()
+
+    # DEF name reference unused text_offset draw_pinnumber draw_pinname
+    #   unit_count units_locked option_flag
+    def_tokens = ['DEF', legacy_symbol.name] + _tokenize(lines[0])
+
+    symbol = kiutils.symbol.Symbol()
+    symbol.entryName = legacy_symbol.name
+    symbol.inBom = True
+    symbol.onBoard = True
+    symbol.pinNames = True
+    symbol.pinNamesOffset = _mm(def_tokens[4])
+    symbol.hidePinNumbers = def_tokens[5] == 'N'
+    symbol.pinNamesHide = def_tokens[6] == 'N'
+    symbol.isPower = len(def_tokens) > 9 and def_tokens[9] == 'P'
+
+    # (unit, body style) -> child symbol
+    units: Dict[Tuple[int, int], kiutils.symbol.Symbol] = {}
+
+    footprint_filters = []
+    in_footprint_list = False
+    in_draw = False
+
+    for line in lines[1:]:
+        tokens = _tokenize(line)
+        if len(tokens) == 0:
+            continue
+        record = tokens[0]
+
+        if in_footprint_list:
+            if record == '$ENDFPLIST':
+                in_footprint_list = False
+            else:
+                footprint_filters += tokens
+        elif in_draw:
+            if record == 'ENDDRAW':
+                in_draw = False
+                continue
+
+            if record == 'B' and conversion_warnings is not None:
+                conversion_warnings.append(
+                    f"{legacy_symbol.name}: Bezier curve approximated by "
+                    f"{BEZIER_SEGMENTS} line segments"
+                )
+
+            unit_key, item = _convert_draw_item(tokens)
+
+            unit = units.get(unit_key)
+            if unit is None:
+                unit = kiutils.symbol.Symbol()
+                unit.entryName = legacy_symbol.name
+                unit.unitId, unit.styleId = unit_key
+                units[unit_key] = unit
+
+            if isinstance(item, kiutils.symbol.SymbolPin):
+                unit.pins.append(item)
+            else:
+                unit.graphicItems.append(item)
+        elif re.match(r'F\d+$', record):
+            symbol.properties.append(_convert_field(tokens, int(record[1:])))
+        elif record == '$FPLIST':
+            in_footprint_list = True
+        elif record == 'DRAW':
+            in_draw = True
+
+    if len(footprint_filters) > 0:
+        symbol.properties.append(kiutils.items.common.Property(
+            key='ki_fp_filters',
+            value=' '.join(footprint_filters),
+            id=max([sym_property.id for sym_property in symbol.properties], default=-1) + 1,
+            position=_position(0, 0, 0),
+            effects=_effects(50, hide=True)
+        ))
+
+    symbol.units = [units[unit_key] for unit_key in sorted(units)]
+
+    return symbol
@@ -0,0 +1,111 @@
+import os
+import uuid
+from pathlib import Path
+from typing import List, Set
+
+from .footprint_cache import footprint_model_paths
+
+# Content-addressed store of 3D model files
+#   Each distinct model is stored once as a blob named after the SHA-256 of its
+#   contents (keeping the original suffix so KiCad can tell the format):
+#       <store>/<first 2 hash characters>/<hash><suffix>
+#   Footprints reference blobs directly, so parts sharing a byte identical
+#   model share a single file.
+
+
+class ModelStore:
+    """Content-addressed 3D model store of a group."""
+
+    def __init__(self, project_folder: Path, store_container: Path):
+        # store_container is relative to project_folder
+        self.project_folder = project_folder
+        self.store_container = store_container
+
+    @property
+    def store_folder(self) -> Path:
+        return self.project_folder / self.store_container
+
+    def blob_container(self, content_hash: str, suffix: str) -> Path:
+        return self.store_container / content_hash[:2] / f'{content_hash}{suffix.lower()}'
+
+    def add(self, model_file, transaction=None) -> Path:
+        # model_file is a model handle with `name` and `copy_to`
+        #   Returns blob container path (relative to project folder)
+        #   If transaction is given, new blob is only moved into place when
+        #   transaction is committed
+        # Hash is not known until contents are streamed, so stream into a
+        #   temporary file in the store and move it into place afterwards
+        if transaction is not None:
+            transaction.make_folder(self.store_folder)
+            temporary_path = transaction.temporary_path(self.store_folder)
+        else:
+            self.store_folder.mkdir(parents=True, exist_ok=True)
+            temporary_path = self.store_folder / f'.incoming-{uuid.uuid4().hex}'
+        try:
+            content_hash = model_file.copy_to(temporary_path)
+
+            blob_container = self.blob_container(
+                content_hash, Path(model_file.name).suffix
+            )
+            blob_path = self.project_folder / blob_container
+
+            if blob_path.is_file() or \
+                    (transaction is not None and transaction.is_staged(blob_path)):
+                # Duplicate contents, keep existing blob
+                temporary_path.unlink()
+            else:
+                if transaction is not None:
+                    transaction.make_folder(blob_path.parent)
+                    transaction.adopt(temporary_path, blob_path)
+                else:
+                    blob_path.parent.mkdir(exist_ok=True)
+                    os.replace(temporary_path, blob_path)
+        except BaseException:
+            if temporary_path.exists():
+                temporary_path.unlink()
+            raise
+
+        return blob_container
+
+    def blobs(self) -> List[Path]:
+        if not self.store_folder.is_dir():
+            return []
+
+        return [
+            blob for blob in self.store_folder.glob('*/*') if blob.is_file()
+        ]
+
+    def referenced_blobs(self, footprint_files: List[Path]) -> Set[Path]:
+        # Footprints are scanned with a regex instead of a full parse as only
+        #   the model paths are needed
+        referenced = set()
+
+        for footprint_file in footprint_files:
+            with open(footprint_file, 'r') as file:
+                footprint_string = file.read()
+
+            for model_path in footprint_model_paths(footprint_string):
+                referenced.add(Path(model_path).name)
+
+        return set(
+            blob for blob in self.blobs() if blob.name in referenced
+        )
+
+    def garbage_collect(self, footprint_files: List[Path], dry_run=False) -> List[Path]:
+        # Remove blobs not referenced by any of the given footprints
+        referenced = self.referenced_blobs(footprint_files)
+
+        unreferenced = sorted(
+            blob for blob in self.blobs() if blob not in referenced
+        )
+
+        if not dry_run and self.store_folder.is_dir():
+            for blob in unreferenced:
+                blob.unlink()
+
+            # Remove emptied fan out folders
+            for fan_out_folder in self.store_folder.iterdir():
+                if fan_out_folder.is_dir() and not any(fan_out_folder.iterdir()):
+                    fan_out_folder.rmdir()
+
+        return unreferenced
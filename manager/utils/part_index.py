@@ -0,0 +1,254 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .search_index import SearchIndex
+from .transaction import Transaction
+
+# On-disk index of every part installed in a group folder (`parts/<group>`)
+#   Stored as an append-only JSON lines journal.  Each line is either
+#   a `put` of a full part entry or a `delete` of a part number.  Loading
+#   replays the journal, so updating the index only appends the changed
+#   entries instead of rewriting the whole file.  Journal is compacted once
+#   it holds too many superseded lines.
+PART_INDEX_FILENAME = "part_index.jsonl"
+PART_INDEX_FORMAT_VERSION = 1
+
+# Compact once journal has this many lines per live entry
+COMPACTION_RATIO = 2
+
+
+def _index_stat_key(index_path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        index_stat = os.stat(index_path)
+    except FileNotFoundError:
+        return None
+    return (index_stat.st_mtime_ns, index_stat.st_size)
+
+
+# Index path -> (stat key of journal when loaded or saved, index)
+#   Indexes with unsaved updates (i.e. of a failed import) are never reused
+_part_indexes: Dict[Path, Tuple[Optional[Tuple[int, int]], 'PartIndex']] = {}
+
+
+def evict_stale_part_indexes() -> List[Path]:
+    evicted = []
+
+    for index_path, (stat_key, index) in list(_part_indexes.items()):
+        if _index_stat_key(index_path) != stat_key or len(index._pending) > 0:
+            del _part_indexes[index_path]
+            evicted.append(index_path)
+
+    return evicted
+
+
+def part_metadata_to_entry(part_metadata) -> dict:
+    # part_metadata is a `Part`
+    def date_to_str(date):
+        return None if date is None else date.isoformat()
+
+    return {
+        'manufacturer': part_metadata.manufacturer,
+        'part_number': part_metadata.part_number,
+        'part_category': part_metadata.part_category,
+        'package_category': part_metadata.package_category,
+        'pin_count': part_metadata.pin_count,
+        'version': list(part_metadata.version),
+        'released': date_to_str(part_metadata.released),
+        'downloaded': date_to_str(part_metadata.downloaded),
+        'has_3d_model': part_metadata.has_3d_model,
+    }
+
+
+class PartIndex:
+    """Index of installed parts of a group keyed by part number."""
+
+    def __init__(self, index_path: Path):
+        self.index_path = index_path
+
+        self._entries: Dict[str, dict] = {}
+        self._categories: Dict[str, Set[str]] = {}
+        self._journal_lines = 0
+        self._pending: List[dict] = []
+        # Built on first search, then kept up to date along with entries
+        self._search_index: Optional[SearchIndex] = None
+
+        if index_path.is_file():
+            self._load()
+
+    @classmethod
+    def for_group(cls, project_folder: Path, parts_folder: Path, group: str):
+        return cls.load(project_folder / parts_folder / group / PART_INDEX_FILENAME)
+
+    @classmethod
+    def load(cls, index_path: Path):
+        # Index is only replayed from journal again once journal changed
+        stat_key = _index_stat_key(index_path)
+
+        cached = _part_indexes.get(index_path)
+        if cached is not None:
+            cached_stat_key, index = cached
+            if cached_stat_key == stat_key and len(index._pending) == 0:
+                return index
+
+        index = cls(index_path)
+        _part_indexes[index_path] = (stat_key, index)
+
+        return index
+
+    def _load(self):
+        with open(self.index_path, 'r') as index_file:
+            for line in index_file:
+                line = line.strip()
+                if not line:
+                    continue
+
+                record = json.loads(line)
+                self._journal_lines += 1
+
+                if record['op'] == 'put':
+                    self._apply_put(record['entry'])
+                elif record['op'] == 'delete':
+                    self._apply_delete(record['part_number'])
+                elif record['op'] == 'format':
+                    if record['version'] != PART_INDEX_FORMAT_VERSION:
+                        raise Exception(
+                            f"Unsupported part index version {record['version']} in {self.index_path}"
+                        )
+
+    def _apply_put(self, entry: dict):
+        part_number = entry['part_number']
+
+        self._apply_delete(part_number)
+
+        self._entries[part_number] = entry
+        self._categories.setdefault(entry['category'], set()).add(part_number)
+
+        if self._search_index is not None:
+            self._search_index.add(entry)
+
+    def _apply_delete(self, part_number: str):
+        old_entry = self._entries.pop(part_number, None)
+        if old_entry is None:
+            return
+
+        category_parts = self._categories[old_entry['category']]
+        category_parts.discard(part_number)
+        if len(category_parts) == 0:
+            del self._categories[old_entry['category']]
+
+        if self._search_index is not None:
+            self._search_index.remove(part_number)
+
+    ####################################
+    # Queries
+
+    def __contains__(self, part_number: str) -> bool:
+        return part_number in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self._entries.values())
+
+    def get(self, part_number: str) -> Optional[dict]:
+        return self._entries.get(part_number)
+
+    def category_of(self, part_number: str) -> Optional[str]:
+        entry = self._entries.get(part_number)
+        return None if entry is None else entry['category']
+
+    def categories(self) -> List[str]:
+        return sorted(self._categories)
+
+    def parts_in_category(self, category: str) -> List[str]:
+        return sorted(self._categories.get(category, ()))
+
+    @property
+    def search_index(self) -> SearchIndex:
+        if self._search_index is None:
+            self._search_index = SearchIndex(self._entries.values())
+        return self._search_index
+
+    def search(self, query: str, fuzzy=False, limit: Optional[int] = None) -> List[dict]:
+        # Entries matching query, best matches first.  See `SearchIndex.search`
+        return [
+            self._entries[part_number]
+            for part_number, _ in self.search_index.search(query, fuzzy, limit)
+        ]
+
+    ####################################
+    # Updates
+    #   Not written to disk until `save`
+
+    def put(self, entry: dict):
+        # entry must at least have `part_number` and `category`
+        self._apply_put(entry)
+        self._pending.append({'op': 'put', 'entry': entry})
+
+    def update(self, part_number: str, **fields):
+        entry = dict(self._entries[part_number])
+        entry.update(fields)
+        self.put(entry)
+
+    def delete(self, part_number: str):
+        if part_number not in self._entries:
+            return
+
+        self._apply_delete(part_number)
+        self._pending.append({'op': 'delete', 'part_number': part_number})
+
+    def save(self, transaction: Optional[Transaction] = None):
+        # Journal is written through transaction, so it only changes along
+        #   with the library files the updates describe.  Index takes the
+        #   updates as saved once transaction commits
+        #   Without a transaction, journal is written in one of its own
+        if len(self._pending) == 0:
+            return
+
+        if transaction is None:
+            with Transaction() as transaction:
+                self.save(transaction)
+            return
+
+        transaction.make_folder(self.index_path.parent)
+
+        saved_records = len(self._pending)
+        journal_lines = self._journal_lines + saved_records
+        if (not self.index_path.is_file()) or \
+                journal_lines > COMPACTION_RATIO * max(len(self._entries), 1):
+            journal_lines = self._stage_compacted(transaction)
+        else:
+            transaction.splice(
+                self.index_path, os.path.getsize(self.index_path),
+                ''.join(
+                    json.dumps(record) + '\n' for record in self._pending
+                ).encode('utf-8')
+            )
+
+        def mark_saved():
+            self._journal_lines = journal_lines
+            del self._pending[:saved_records]
+
+            if _part_indexes.get(self.index_path, (None, None))[1] is self:
+                _part_indexes[self.index_path] = (
+                    _index_stat_key(self.index_path), self
+                )
+
+        transaction.on_commit(mark_saved)
+
+    def _stage_compacted(self, transaction: Transaction) -> int:
+        # Rewrite journal with only the live entries.  Returns its lines
+        records = [{'op': 'format', 'version': PART_INDEX_FORMAT_VERSION}]
+        records += [
+            {'op': 'put', 'entry': entry} for entry in self._entries.values()
+        ]
+
+        transaction.write_text(
+            self.index_path,
+            ''.join(json.dumps(record) + '\n' for record in records)
+        )
+
+        return len(records)
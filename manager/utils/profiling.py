@@ -0,0 +1,134 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Lightweight instrumentation of the import pipeline
+#   Spans time named stages, and are named after the spans they are nested
+#   in (`extract/parse_footprint`).  Counters add up amounts such as bytes
+#   read.  Both are collected per process and only while enabled, so
+#   instrumented code costs next to nothing otherwise.  Work done in worker
+#   processes is collected by running it through `call_profiled`, and merged
+#   under the span that was open when the workers were started
+#   Times of spans in worker processes are summed over all workers, so they
+#   can add up to more than the wall clock time of their parent span
+
+_enabled = False
+_span_stack: List[str] = []
+# Span path -> [number of times entered, total seconds]
+_spans: Dict[str, List[float]] = {}
+_counters: Dict[str, int] = {}
+
+
+def enable():
+    global _enabled
+    reset()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    _span_stack.clear()
+    _spans.clear()
+    _counters.clear()
+
+
+@contextmanager
+def span(name: str):
+    if not _enabled:
+        yield
+        return
+
+    _span_stack.append(name)
+    span_path = '/'.join(_span_stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        _span_stack.pop()
+
+        span_totals = _spans.setdefault(span_path, [0, 0.0])
+        span_totals[0] += 1
+        span_totals[1] += elapsed
+
+
+def count(name: str, amount: int = 1):
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def report() -> dict:
+    # JSON serializable spans and counters collected so far
+    return {
+        'spans': {
+            span_path: {'count': int(span_count), 'seconds': seconds}
+            for span_path, (span_count, seconds) in _spans.items()
+        },
+        'counters': dict(_counters),
+    }
+
+
+def merge(other_report: Optional[dict]):
+    # Adds report of another process under currently open span
+    if other_report is None or not _enabled:
+        return
+
+    prefix = ''.join(f'{name}/' for name in _span_stack)
+
+    for span_path, totals in other_report['spans'].items():
+        span_totals = _spans.setdefault(prefix + span_path, [0, 0.0])
+        span_totals[0] += totals['count']
+        span_totals[1] += totals['seconds']
+
+    for name, amount in other_report['counters'].items():
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def call_profiled(function, profiling_enabled: bool, *args):
+    # Worker process entry point.  Returns (result, report or None)
+    if not profiling_enabled:
+        return function(*args), None
+
+    enable()
+    try:
+        result = function(*args)
+        return result, report()
+    finally:
+        disable()
+
+
+def format_report(profile_report: dict) -> str:
+    spans = profile_report['spans']
+    counters = profile_report['counters']
+
+    root_seconds = sum(
+        totals['seconds'] for span_path, totals in spans.items()
+        if '/' not in span_path
+    )
+
+    lines = [f"{'span':<48} {'count':>8} {'total (s)':>10} {'share':>7}"]
+    for span_path in sorted(spans):
+        totals = spans[span_path]
+        depth = span_path.count('/')
+        name = '  ' * depth + span_path.rsplit('/', 1)[-1]
+
+        share = totals['seconds'] / root_seconds * 100 if root_seconds > 0 else 0
+        lines.append(
+            f"{name:<48} {totals['count']:>8} {totals['seconds']:>10.4f} {share:>6.1f}%"
+        )
+
+    if len(counters) > 0:
+        lines.append("")
+        lines.append(f"{'counter':<48} {'total':>8}")
+        for name in sorted(counters):
+            lines.append(f"{name:<48} {counters[name]:>8}")
+
+    return '\n'.join(lines)
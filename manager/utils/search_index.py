@@ -0,0 +1,329 @@
+import bisect
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# Inverted index for searching installed parts
+#   Each searchable field of a part index entry is split into lower case
+#   terms, and every term maps to the part numbers having it.  Terms of each
+#   field are also kept sorted, so the terms starting with a prefix are one
+#   contiguous range found by bisection.  Fuzzy matching looks up terms
+#   sharing trigrams with the searched term, then keeps those within a small
+#   edit distance of it.  Trigrams are only indexed once fuzzy matching is
+#   first used.
+#   Kept up to date by `PartIndex` as parts are put and deleted
+
+# Query field -> part index entry keys searched by it
+SEARCH_FIELDS = {
+    'part': ('part_number',),
+    'manufacturer': ('manufacturer',),
+    'category': ('category', 'part_category'),
+    'package': ('package_category',),
+    'pins': ('pin_count',),
+}
+
+# Fields only matched whole, as a prefix of a number is another number
+EXACT_FIELDS = {'pins'}
+
+# Score of a term matching exactly, by prefix, or fuzzily
+EXACT_SCORE = 3
+PREFIX_SCORE = 2
+FUZZY_SCORE = 1
+# Matches in part number count more than matches in other fields
+FIELD_WEIGHTS = {'part': 2}
+
+_term_split_regex = re.compile(r'[^0-9a-z]+')
+
+
+def split_terms(value) -> List[str]:
+    return [
+        term for term in _term_split_regex.split(str(value).lower()) if term
+    ]
+
+
+# Most values (manufacturers, categories, ...) are shared by many parts
+@lru_cache(maxsize=4096)
+def value_terms(value: str) -> Tuple[str, ...]:
+    terms = split_terms(value)
+
+    # Whole value without separators too, so `lm317t` finds `LM317T-DR` and
+    #   `LM317TDR` alike
+    if len(terms) > 1:
+        terms.append(''.join(terms))
+
+    return tuple(terms)
+
+
+def entry_terms(entry: dict) -> Set[Tuple[str, str]]:
+    # (field, term) of every searchable term of entry
+    part_terms = set()
+
+    for field, entry_keys in SEARCH_FIELDS.items():
+        for entry_key in entry_keys:
+            value = entry.get(entry_key)
+            if value is None or value == '' or value == -1:
+                continue
+
+            for term in value_terms(str(value)):
+                part_terms.add((field, term))
+
+    return part_terms
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f'${term}$'
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    # Levenshtein distance of a and b, or max_distance + 1 if greater
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_row = list(range(len(b) + 1))
+    for i, a_character in enumerate(a, 1):
+        row = [i]
+        for j, b_character in enumerate(b, 1):
+            row.append(min(
+                previous_row[j] + 1,
+                row[j - 1] + 1,
+                previous_row[j - 1] + (a_character != b_character)
+            ))
+
+        if min(row) > max_distance:
+            return max_distance + 1
+        previous_row = row
+
+    return previous_row[-1]
+
+
+def max_edits(term: str) -> int:
+    # Typos allowed in a searched term when matching fuzzily
+    if len(term) < 4:
+        return 0
+    if len(term) < 8:
+        return 1
+    return 2
+
+
+class SearchIndex:
+    """Inverted index of part index entries for prefix and fuzzy search."""
+
+    def __init__(self, entries=()):
+        # Field -> term -> part numbers
+        self._postings: Dict[str, Dict[str, Set[str]]] = {
+            field: {} for field in SEARCH_FIELDS
+        }
+        # Field -> sorted terms
+        self._sorted_terms: Dict[str, List[str]] = {
+            field: [] for field in SEARCH_FIELDS
+        }
+        # Part number -> its (field, term), to remove part again
+        self._part_terms: Dict[str, Set[Tuple[str, str]]] = {}
+        # Trigram -> terms containing it, of all fields
+        self._trigram_terms: Optional[Dict[str, Set[str]]] = None
+        # Term -> number of fields with term, to know when to drop trigrams
+        self._term_fields: Dict[str, int] = {}
+
+        # Terms are sorted once in bulk, instead of inserted one at a time
+        for entry in entries:
+            self._add(entry, sorted_insert=False)
+        for field, field_postings in self._postings.items():
+            self._sorted_terms[field] = sorted(field_postings)
+
+    def __len__(self) -> int:
+        return len(self._part_terms)
+
+    ####################################
+    # Updates
+
+    def add(self, entry: dict):
+        self._add(entry, sorted_insert=True)
+
+    def _add(self, entry: dict, sorted_insert: bool):
+        part_number = entry['part_number']
+        self.remove(part_number)
+
+        part_terms = entry_terms(entry)
+        self._part_terms[part_number] = part_terms
+
+        for field, term in part_terms:
+            field_postings = self._postings[field]
+
+            term_parts = field_postings.get(term)
+            if term_parts is None:
+                term_parts = field_postings[term] = set()
+                if sorted_insert:
+                    bisect.insort(self._sorted_terms[field], term)
+                self._add_term(term)
+
+            term_parts.add(part_number)
+
+    def remove(self, part_number: str):
+        part_terms = self._part_terms.pop(part_number, None)
+        if part_terms is None:
+            return
+
+        for field, term in part_terms:
+            field_postings = self._postings[field]
+
+            term_parts = field_postings[term]
+            term_parts.discard(part_number)
+            if len(term_parts) == 0:
+                del field_postings[term]
+
+                sorted_terms = self._sorted_terms[field]
+                del sorted_terms[bisect.bisect_left(sorted_terms, term)]
+                self._remove_term(term)
+
+    def _add_term(self, term: str):
+        self._term_fields[term] = self._term_fields.get(term, 0) + 1
+
+        if self._trigram_terms is not None and self._term_fields[term] == 1:
+            for trigram in _trigrams(term):
+                self._trigram_terms.setdefault(trigram, set()).add(term)
+
+    def _remove_term(self, term: str):
+        self._term_fields[term] -= 1
+        if self._term_fields[term] > 0:
+            return
+
+        del self._term_fields[term]
+
+        if self._trigram_terms is not None:
+            for trigram in _trigrams(term):
+                trigram_terms = self._trigram_terms[trigram]
+                trigram_terms.discard(term)
+                if len(trigram_terms) == 0:
+                    del self._trigram_terms[trigram]
+
+    ####################################
+    # Queries
+
+    def prefix_terms(self, field: str, prefix: str) -> Iterator[str]:
+        sorted_terms = self._sorted_terms[field]
+
+        index = bisect.bisect_left(sorted_terms, prefix)
+        while index < len(sorted_terms) and sorted_terms[index].startswith(prefix):
+            yield sorted_terms[index]
+            index += 1
+
+    def index_trigrams(self):
+        # Done by first fuzzy search if not done before
+        if self._trigram_terms is not None:
+            return
+
+        self._trigram_terms = {}
+        for indexed_term in self._term_fields:
+            for trigram in _trigrams(indexed_term):
+                trigram_terms = self._trigram_terms.get(trigram)
+                if trigram_terms is None:
+                    trigram_terms = self._trigram_terms[trigram] = set()
+                trigram_terms.add(indexed_term)
+
+    def fuzzy_terms(self, term: str) -> List[str]:
+        # Indexed terms (of any field) within `max_edits` of term
+        allowed_edits = max_edits(term)
+        if allowed_edits == 0:
+            return []
+
+        self.index_trigrams()
+
+        # Each edit changes at most 3 trigrams
+        term_trigrams = _trigrams(term)
+        shared_trigrams: Dict[str, int] = {}
+        for trigram in term_trigrams:
+            for indexed_term in self._trigram_terms.get(trigram, ()):
+                shared_trigrams[indexed_term] = shared_trigrams.get(indexed_term, 0) + 1
+
+        minimum_shared = len(term_trigrams) - 3 * allowed_edits
+
+        return [
+            indexed_term
+            for indexed_term, shared in shared_trigrams.items()
+            if shared >= minimum_shared and
+            edit_distance(term, indexed_term, allowed_edits) <= allowed_edits
+        ]
+
+    def match_term(self, term: str, fields: List[str], fuzzy=False, candidates: Optional[Set[str]] = None) -> Dict[str, float]:
+        # Part number -> best score of term in any of fields
+        #   If candidates are given, only those parts are scored
+        scores: Dict[str, float] = {}
+
+        def score_parts(part_numbers, score):
+            if candidates is not None:
+                # Iterates over smaller of the two
+                part_numbers = candidates.intersection(part_numbers)
+
+            for part_number in part_numbers:
+                if scores.get(part_number, 0) < score:
+                    scores[part_number] = score
+
+        fuzzy_terms = self.fuzzy_terms(term) if fuzzy else []
+
+        for field in fields:
+            field_postings = self._postings[field]
+            weight = FIELD_WEIGHTS.get(field, 1)
+
+            if field not in EXACT_FIELDS:
+                for prefix_term in self.prefix_terms(field, term):
+                    if prefix_term != term:
+                        score_parts(field_postings[prefix_term], PREFIX_SCORE * weight)
+
+            for fuzzy_term in fuzzy_terms:
+                if fuzzy_term in field_postings:
+                    score_parts(field_postings[fuzzy_term], FUZZY_SCORE * weight)
+
+            score_parts(field_postings.get(term, ()), EXACT_SCORE * weight)
+
+        return scores
+
+    def search(self, query: str, fuzzy=False, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        # Query is whitespace separated words, each of which has to match.
+        #   Words are matched as prefixes in any field, or only in one field
+        #   if given as `<field>:<word>` (i.e. `package:soic pins:8`)
+        #   Returns (part number, score) of best matches first
+        clauses = []
+        for word in query.split():
+            fields = list(SEARCH_FIELDS)
+
+            field, separator, value = word.partition(':')
+            if separator and field in SEARCH_FIELDS:
+                fields = [field]
+                word = value
+            elif separator:
+                raise Exception(
+                    f"Unknown search field `{field}`!  "
+                    f"Fields are: {', '.join(SEARCH_FIELDS)}"
+                )
+
+            clauses += [(term, fields) for term in split_terms(word)]
+
+        if len(clauses) == 0:
+            return []
+
+        # Longer terms match fewer parts.  Matching them first leaves less
+        #   parts to score for the shorter terms
+        clauses.sort(key=lambda clause: -len(clause[0]))
+
+        results: Optional[Dict[str, float]] = None
+        for term, fields in clauses:
+            if results is None:
+                results = self.match_term(term, fields, fuzzy)
+                continue
+
+            scores = self.match_term(term, fields, fuzzy, set(results))
+            results = {
+                part_number: score + scores[part_number]
+                for part_number, score in results.items()
+                if part_number in scores
+            }
+
+            if len(results) == 0:
+                break
+
+        ranked = sorted(results.items(), key=lambda result: (-result[1], result[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+
+        return ranked
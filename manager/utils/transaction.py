@@ -0,0 +1,566 @@
+import json
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from . import profiling
+
+# Atomic commit of a group of file writes and deletions
+#   Writes are staged to temporary files next to their target (same folder,
+#   so same filesystem) and nothing in the project is touched until `commit`.
+#   Splices (in place overwrites of the end of a file, i.e. appending) are
+#   only computed at staging time, and are written at commit.
+#   Commit first writes a journal of how to undo every change (old tail of
+#   each spliced file, backup of each replaced or deleted file) and syncs it.
+#   Then splices are applied, staged files renamed over their targets and
+#   deleted files moved to their backups.  If any step fails, every change is
+#   undone from the journal.  Removing the journal is the commit point, after
+#   which backups are removed.
+#   A journal left behind by a commit that was interrupted (i.e. by a crash)
+#   is rolled back by `recover_transactions`, so callers recover their journal folder
+#   before reading files they will change
+#   While staging, temporary files and folders created for the transaction
+#   are logged to its staging log in journal folder, so the ones left by a
+#   crash before commit are removed by recovery too
+#   https://en.wikipedia.org/wiki/Atomicity_(database_systems)
+
+JOURNAL_PREFIX = '.transaction-'
+JOURNAL_SUFFIX = '.journal'
+STAGING_LOG_SUFFIX = '.staging'
+
+
+def _fsync_path(path: Path, directory=False):
+    # Folders cannot be opened for syncing on Windows
+    if directory and os.name == 'nt':
+        return
+
+    file_descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
+
+
+class Transaction:
+    """Group of file writes and deletions committed all at once."""
+
+    def __init__(self, sync=True, journal_folder: Optional[Path] = None):
+        # Journal is written to journal_folder, which callers recover from.
+        #   Defaults to the deepest folder holding every changed file
+        self.sync = sync
+        self.journal_folder = journal_folder
+        self._id = uuid.uuid4().hex
+
+        # Target path -> staged temporary path
+        self._staged: Dict[Path, Path] = {}
+        # Temporary files not staged to a target yet (see `temporary_path`)
+        self._temporaries: Set[Path] = set()
+        # Folders created by `make_folder`, parents first
+        self._created_folders: List[Path] = []
+        # Opened on first temporary file or folder, if there is a journal
+        #   folder
+        self._staging_log = None
+        self._deletions: Set[Path] = set()
+        # Target -> (byte offset, data replacing everything from offset)
+        self._splices: Dict[Path, Tuple[int, bytes]] = {}
+        self._commit_callbacks: List[Callable[[], None]] = []
+        self._finished = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        if exception_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+        # Do not suppress exceptions
+        return False
+
+    ####################################
+    # Staging
+
+    def stage(self, target: Path) -> Path:
+        # Returns temporary path the caller writes target's new contents to
+        #   Staging an already staged target discards the previous contents
+        assert not self._finished
+
+        target = Path(target)
+        self._check_not_spliced(target)
+        self._deletions.discard(target)
+
+        if target in self._staged:
+            return self._staged[target]
+
+        temporary_path = target.parent / \
+            f'.{target.name}.{uuid.uuid4().hex}.tmp'
+        self._log_staging('temporary', temporary_path)
+        self._staged[target] = temporary_path
+
+        return temporary_path
+
+    def temporary_path(self, folder: Path) -> Path:
+        # Temporary file for contents whose target is not known until they
+        #   are written (i.e. named by their hash), to be `adopt`ed.  Removed
+        #   along with staged files if transaction does not commit
+        assert not self._finished
+
+        temporary_path = Path(folder) / f'.{uuid.uuid4().hex}.tmp'
+        self._log_staging('temporary', temporary_path)
+        self._temporaries.add(temporary_path)
+
+        return temporary_path
+
+    def make_folder(self, folder: Path):
+        # Create folder and its missing parents.  Ones created are removed
+        #   again (if empty) if transaction does not commit
+        assert not self._finished
+
+        folder = Path(folder)
+        missing_folders = []
+        while not folder.is_dir():
+            missing_folders.append(folder)
+            folder = folder.parent
+
+        for missing_folder in reversed(missing_folders):
+            self._log_staging('folder', missing_folder)
+            missing_folder.mkdir(exist_ok=True)
+            self._created_folders.append(missing_folder)
+
+    def adopt(self, temporary_path: Path, target: Path):
+        # Stage an already written temporary file (must be on the same
+        #   filesystem as target) to be moved to target on commit
+        assert not self._finished
+
+        target = Path(target)
+        self._check_not_spliced(target)
+        self._deletions.discard(target)
+
+        temporary_path = Path(temporary_path)
+        previous = self._staged.get(target)
+        if previous is not None and previous != temporary_path and previous.exists():
+            previous.unlink()
+
+        if temporary_path in self._temporaries:
+            self._temporaries.discard(temporary_path)
+        else:
+            self._log_staging('temporary', temporary_path)
+        self._staged[target] = temporary_path
+
+    def is_staged(self, target: Path) -> bool:
+        return Path(target) in self._staged
+
+    def is_spliced(self, target: Path) -> bool:
+        return Path(target) in self._splices
+
+    def is_deleted(self, target: Path) -> bool:
+        return Path(target) in self._deletions
+
+    def _log_staging(self, kind: str, path: Path):
+        # Logged before path is created.  Not synced, as it is only needed to
+        #   clean up, not to undo changes
+        if self.journal_folder is None:
+            return
+
+        if self._staging_log is None:
+            self._staging_log = open(self._staging_log_path(), 'a')
+
+        self._staging_log.write(json.dumps([
+            kind, os.path.relpath(os.path.abspath(path), os.path.abspath(self.journal_folder))
+        ]) + '\n')
+        self._staging_log.flush()
+
+    def _staging_log_path(self) -> Path:
+        return self.journal_folder / \
+            f'{JOURNAL_PREFIX}{self._id}{STAGING_LOG_SUFFIX}'
+
+    def _check_not_spliced(self, target: Path):
+        # Splice would be applied to the old contents, then overwritten
+        if target in self._splices:
+            raise Exception(f"{target} is already spliced in this transaction!")
+
+    def write_text(self, target: Path, text: str):
+        with profiling.span('stage_write'):
+            with open(self.stage(target), 'w') as file:
+                file.write(text)
+                written_bytes = file.tell()
+
+        profiling.count('files_written')
+        profiling.count('bytes_written', written_bytes)
+
+    def write_bytes(self, target: Path, data: bytes):
+        with profiling.span('stage_write'):
+            with open(self.stage(target), 'wb') as file:
+                file.write(data)
+
+        profiling.count('files_written')
+        profiling.count('bytes_written', len(data))
+
+    def splice(self, target: Path, offset: int, data: bytes):
+        # Replace everything from byte offset to end of existing target with
+        #   data, without rewriting the part of target before offset
+        #   Offset is computed against target as it is on disk, so a target
+        #   can only be spliced once, and not also be staged
+        assert not self._finished
+
+        target = Path(target)
+        self._check_not_spliced(target)
+        if self.is_staged(target):
+            raise Exception(f"{target} is already staged in this transaction!")
+
+        self._deletions.discard(target)
+        self._splices[target] = (offset, data)
+
+        profiling.count('files_spliced')
+        profiling.count('bytes_written', len(data))
+
+    def on_commit(self, callback: Callable[[], None]):
+        # Called once transaction has been successfully committed
+        self._commit_callbacks.append(callback)
+
+    def delete(self, target: Path):
+        assert not self._finished
+
+        target = Path(target)
+
+        temporary_path = self._staged.pop(target, None)
+        if temporary_path is not None and temporary_path.exists():
+            temporary_path.unlink()
+        self._splices.pop(target, None)
+
+        self._deletions.add(target)
+
+    ####################################
+    # Finishing
+
+    def commit(self):
+        with profiling.span('transaction_commit'):
+            self._commit()
+
+    def _commit(self):
+        assert not self._finished
+        self._finished = True
+
+        journal = None
+        try:
+            # One sync point for every staged file
+            if self.sync:
+                for temporary_path in self._staged.values():
+                    _fsync_path(temporary_path)
+
+            if len(self._staged) + len(self._splices) + len(self._deletions) > 0:
+                journal = self._write_journal()
+        except BaseException:
+            self._discard_staging()
+            raise
+
+        try:
+            self._apply(journal)
+        except BaseException:
+            _undo_journal(journal.path, self.sync)
+            self._discard_staging()
+            raise
+
+        if journal is not None:
+            # Commit point
+            journal.path.unlink()
+            if self.sync:
+                _fsync_path(journal.folder, directory=True)
+
+            for backup_path in journal.backups():
+                if backup_path.exists():
+                    backup_path.unlink()
+
+        self._close_staging_log()
+
+        self._staged.clear()
+        self._deletions.clear()
+        self._splices.clear()
+
+        for callback in self._commit_callbacks:
+            callback()
+        self._commit_callbacks.clear()
+
+    def _write_journal(self) -> '_Journal':
+        journal_id = self._id
+
+        changed_paths = list(self._staged) + list(self._splices) + list(self._deletions)
+        journal_folder = self.journal_folder
+        if journal_folder is None:
+            journal_folder = Path(os.path.commonpath([
+                os.path.abspath(path.parent) for path in changed_paths
+            ]))
+
+        def backup_path(target: Path) -> Path:
+            return target.parent / f'.{target.name}.{journal_id}.bak'
+
+        entries = {'splices': [], 'renames': [], 'deletions': []}
+        tails = []
+
+        for target, (offset, _) in self._splices.items():
+            with open(target, 'rb') as file:
+                file.seek(offset)
+                tails.append(file.read())
+
+            entries['splices'].append([str(target), offset, len(tails[-1])])
+
+        for target, temporary_path in self._staged.items():
+            # Targets that do not exist yet are removed again on undo
+            entries['renames'].append([
+                str(target),
+                str(backup_path(target)) if target.exists() else None,
+                str(temporary_path),
+            ])
+
+        for target in self._deletions:
+            if target.exists():
+                entries['deletions'].append([str(target), str(backup_path(target))])
+
+        journal = _Journal(
+            journal_folder / f'{JOURNAL_PREFIX}{journal_id}{JOURNAL_SUFFIX}',
+            _relative_entries(entries, journal_folder)
+        )
+
+        # Written whole under a temporary name, so a journal is never found
+        #   half written
+        temporary_path = journal.path.with_suffix('.tmp')
+        with open(temporary_path, 'wb') as file:
+            file.write(json.dumps(journal.entries).encode('utf-8') + b'\n')
+            for tail in tails:
+                file.write(tail)
+
+            file.flush()
+            if self.sync:
+                os.fsync(file.fileno())
+
+        os.replace(temporary_path, journal.path)
+        if self.sync:
+            _fsync_path(journal_folder, directory=True)
+
+        return journal
+
+    def _apply(self, journal: Optional['_Journal']):
+        for target, (offset, data) in self._splices.items():
+            with open(target, 'r+b') as file:
+                file.seek(offset)
+                file.write(data)
+                file.truncate()
+
+                file.flush()
+                if self.sync:
+                    os.fsync(file.fileno())
+
+        if journal is None:
+            return
+
+        for target, backup_path, temporary_path in journal.absolute('renames'):
+            # Old contents are kept under backup until commit point
+            if backup_path is not None:
+                _link_or_copy(target, backup_path)
+            os.replace(temporary_path, target)
+
+        for target, backup_path in journal.absolute('deletions'):
+            os.replace(target, backup_path)
+
+        if self.sync:
+            changed_folders = set(
+                target.parent for target in self._staged
+            ) | set(
+                target.parent for target in self._deletions
+            )
+            for folder in changed_folders:
+                if folder.is_dir():
+                    _fsync_path(folder, directory=True)
+
+    def rollback(self):
+        if self._finished:
+            return
+        self._finished = True
+
+        self._discard_staging()
+        self._deletions.clear()
+        self._splices.clear()
+        self._commit_callbacks.clear()
+
+    def _discard_staging(self):
+        # Remove every temporary file and folder created for transaction
+        for temporary_path in list(self._staged.values()) + list(self._temporaries):
+            if temporary_path.exists():
+                temporary_path.unlink()
+
+        _remove_created_folders(self._created_folders)
+
+        self._staged.clear()
+        self._temporaries.clear()
+        self._created_folders.clear()
+        self._close_staging_log()
+
+    def _close_staging_log(self):
+        if self._staging_log is None:
+            return
+
+        self._staging_log.close()
+        self._staging_log = None
+        self._staging_log_path().unlink()
+
+
+####################################
+# Journal
+
+
+class _Journal:
+    """Undo information of a commit, with paths relative to its folder."""
+
+    def __init__(self, path: Path, entries: dict):
+        self.path = path
+        self.folder = path.parent
+        self.entries = entries
+
+    def absolute(self, kind: str) -> List[list]:
+        return _absolute_entries(self.entries, self.folder)[kind]
+
+    def backups(self) -> List[Path]:
+        return [
+            backup_path
+            for _, backup_path, _ in self.absolute('renames')
+            if backup_path is not None
+        ] + [backup_path for _, backup_path in self.absolute('deletions')]
+
+
+def _relative_entries(entries: dict, folder: Path) -> dict:
+    def relative(path):
+        return None if path is None else os.path.relpath(os.path.abspath(path), os.path.abspath(folder))
+
+    return {
+        'splices': [[relative(target), offset, length] for target, offset, length in entries['splices']],
+        'renames': [[relative(path) for path in rename] for rename in entries['renames']],
+        'deletions': [[relative(path) for path in deletion] for deletion in entries['deletions']],
+    }
+
+
+def _absolute_entries(entries: dict, folder: Path) -> dict:
+    def absolute(path):
+        return None if path is None else folder / path
+
+    return {
+        'splices': [[absolute(target), offset, length] for target, offset, length in entries['splices']],
+        'renames': [[absolute(path) for path in rename] for rename in entries['renames']],
+        'deletions': [[absolute(path) for path in deletion] for deletion in entries['deletions']],
+    }
+
+
+def _link_or_copy(source: Path, target: Path):
+    # Hard link is instant, copy is for filesystems without them
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _undo_journal(journal_path: Path, sync=True):
+    # Restores every change recorded in journal, then removes journal.
+    #   Changes that were never applied are left as they are, so undoing is
+    #   safe at any point of a commit, and again if undoing is interrupted
+    journal_folder = journal_path.parent
+
+    with open(journal_path, 'rb') as file:
+        entries = _absolute_entries(json.loads(file.readline()), journal_folder)
+        old_tails = [file.read(length) for _, _, length in entries['splices']]
+
+    for (target, offset, _), old_tail in zip(entries['splices'], old_tails):
+        if not target.exists():
+            continue
+
+        with open(target, 'r+b') as file:
+            file.seek(offset)
+            file.write(old_tail)
+            file.truncate()
+
+            file.flush()
+            if sync:
+                os.fsync(file.fileno())
+
+    for target, backup_path, temporary_path in entries['renames']:
+        if backup_path is not None:
+            if backup_path.exists():
+                os.replace(backup_path, target)
+        elif not temporary_path.exists() and target.exists():
+            # Target did not exist before, and was created by the rename
+            target.unlink()
+
+        if temporary_path.exists():
+            temporary_path.unlink()
+
+    for target, backup_path in entries['deletions']:
+        if backup_path.exists():
+            os.replace(backup_path, target)
+
+    journal_path.unlink()
+    if sync:
+        _fsync_path(journal_folder, directory=True)
+
+
+def _remove_created_folders(created_folders: List[Path]):
+    # Children first.  Folders that are not empty are left
+    for folder in reversed(created_folders):
+        try:
+            folder.rmdir()
+        except OSError:
+            pass
+
+
+def _discard_staging_log(staging_log_path: Path):
+    # Remove what was logged of a transaction that never committed
+    journal_folder = staging_log_path.parent
+
+    created_folders = []
+    with open(staging_log_path, 'r') as staging_log:
+        for line in staging_log:
+            try:
+                kind, path = json.loads(line)
+            except ValueError:
+                # Line cut short by crash
+                continue
+
+            path = journal_folder / path
+            if kind == 'folder':
+                created_folders.append(path)
+            elif path.exists():
+                path.unlink()
+
+    _remove_created_folders(created_folders)
+    staging_log_path.unlink()
+
+
+def recover_transactions(journal_folder: Path) -> List[Path]:
+    # Roll back commits interrupted while journaling in journal_folder, and
+    #   remove what was staged by transactions that never committed
+    #   Returns journals that were rolled back
+    journal_folder = Path(journal_folder)
+    if not journal_folder.is_dir():
+        return []
+
+    journal_paths = []
+    staging_log_paths = []
+    for entry in os.scandir(journal_folder):
+        if not entry.name.startswith(JOURNAL_PREFIX):
+            continue
+
+        if entry.name.endswith('.tmp'):
+            # Never completed, so nothing was changed yet
+            Path(entry.path).unlink()
+        elif entry.name.endswith(JOURNAL_SUFFIX):
+            journal_paths.append(Path(entry.path))
+        elif entry.name.endswith(STAGING_LOG_SUFFIX):
+            staging_log_paths.append(Path(entry.path))
+
+    # Changes are undone before their temporary files and folders are removed
+    for journal_path in journal_paths:
+        _undo_journal(journal_path)
+    for staging_log_path in staging_log_paths:
+        _discard_staging_log(staging_log_path)
+
+    return journal_paths
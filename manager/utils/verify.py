@@ -0,0 +1,314 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import profiling, parts_folder, models_3d_folder, pcb_footprints_folder, \
+    schematic_symbols_folder, KICAD_PROJECT_ENV_VAR, \
+    get_footprint_library_table, get_symbol_library_table, load_library_table
+from .footprint_cache import footprint_model_paths
+from .kicad_sym_index import KicadSymbolIndex
+
+# Integrity check of the parts of a group
+#   - Model paths of every footprint resolve to a model file
+#   - Footprint property of every symbol names an existing footprint
+#       (`nickname:footprint`)
+#   - Every library table entry points at an existing library
+#   - Every model file in a `.3dshapes` folder is used by some footprint
+#   Reading files for the paths and names they reference is the slow part,
+#   so references are cached per file (by modification time and size) in the
+#   group folder.  Checking that references exist is redone every time, as
+#   it depends on other files.  Unchanged files therefore cost a stat call.
+VERIFY_CACHE_FILENAME = "verify_cache.json"
+VERIFY_CACHE_FORMAT_VERSION = 1
+
+# Kinds of files references are read from
+FOOTPRINT_FILE = 'footprint'
+SYMBOL_LIBRARY_FILE = 'symbol_library'
+
+_footprint_property_regex = re.compile(
+    rb'\(property\s+"Footprint"\s+"((?:[^"\\]|\\.)*)"'
+)
+
+
+def extract_references(file_kind: str, file_path: Path) -> list:
+    # Paths or names file references.  Run in worker processes
+    #   Footprints: model paths
+    #   Symbol libraries: [symbol name, Footprint property] of each symbol
+    if file_kind == FOOTPRINT_FILE:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return footprint_model_paths(file.read())
+
+    with open(file_path, 'rb') as file:
+        library_bytes = file.read()
+
+    references = []
+    for symbol_name, (start, end) in KicadSymbolIndex.from_bytes(library_bytes).symbols.items():
+        # First Footprint property is that of the symbol, units come after
+        footprint_property = _footprint_property_regex.search(
+            library_bytes, start, end
+        )
+        footprint = None
+        if footprint_property is not None:
+            footprint = re.sub(
+                rb'\\(.)', rb'\1', footprint_property.group(1)
+            ).decode('utf-8')
+
+        references.append([symbol_name, footprint])
+
+    return references
+
+
+def resolve_project_path(project_folder: Path, path: str, project_variable: str) -> Optional[Path]:
+    # None if path depends on a variable other than the project folder, as
+    #   only KiCad knows its value
+    #   Project variable is only expected at start of path.  Relative project
+    #   folders are kept relative
+    if path.startswith(project_variable):
+        path = path[len(project_variable):].lstrip('/\\')
+    if '${' in path:
+        return None
+
+    path = Path(path)
+    if not path.is_absolute():
+        path = project_folder / path
+    return path
+
+
+def _load_cache(cache_path: Path) -> Dict[str, dict]:
+    try:
+        with open(cache_path, 'r') as cache_file:
+            cache = json.load(cache_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+    if cache.get('version') != VERIFY_CACHE_FORMAT_VERSION:
+        return {}
+    return cache['files']
+
+
+def _save_cache(cache_path: Path, cached_files: Dict[str, dict]):
+    temporary_path = cache_path.with_suffix('.tmp')
+    with open(temporary_path, 'w') as cache_file:
+        json.dump(
+            {'version': VERIFY_CACHE_FORMAT_VERSION, 'files': cached_files},
+            cache_file
+        )
+    temporary_path.replace(cache_path)
+
+
+def _scan_files(folder: Path, folder_suffix: Optional[str], file_suffix: str) -> List[os.DirEntry]:
+    # Files ending with file_suffix in folder, or in its subfolders ending
+    #   with folder_suffix if given
+    if not folder.is_dir():
+        return []
+
+    if folder_suffix is None:
+        return [
+            entry for entry in os.scandir(folder)
+            if entry.name.endswith(file_suffix) and entry.is_file()
+        ]
+
+    entries = []
+    for library_entry in os.scandir(folder):
+        if library_entry.name.endswith(folder_suffix) and library_entry.is_dir():
+            entries += _scan_files(Path(library_entry.path), None, file_suffix)
+    return entries
+
+
+def collect_references(project_folder: Path, group_folder: Path, jobs: Optional[int] = None) -> Tuple[Dict[str, Tuple[str, list]], int]:
+    # Returns references of every footprint and symbol library of group by
+    #   path relative to project folder (with their file kind), and number of
+    #   files that had to be read
+    import concurrent.futures
+
+    cache_path = project_folder / group_folder / VERIFY_CACHE_FILENAME
+    cached_files = _load_cache(cache_path)
+
+    with profiling.span('scan_files'):
+        file_entries = [
+            (FOOTPRINT_FILE, entry) for entry in _scan_files(
+                project_folder / group_folder / pcb_footprints_folder,
+                '.pretty', '.kicad_mod'
+            )
+        ] + [
+            (SYMBOL_LIBRARY_FILE, entry) for entry in _scan_files(
+                project_folder / group_folder / schematic_symbols_folder,
+                None, '.kicad_sym'
+            )
+        ]
+
+    references: Dict[str, Tuple[str, list]] = {}
+    current_cache: Dict[str, dict] = {}
+    # (container, file kind, path, stat key) of files to read
+    stale_files = []
+
+    for file_kind, entry in file_entries:
+        file_stat = entry.stat()
+        stat_key = [file_stat.st_mtime_ns, file_stat.st_size]
+        container = Path(entry.path).relative_to(project_folder).as_posix()
+
+        cached = cached_files.get(container)
+        if cached is not None and cached['stat'] == stat_key and \
+                cached['kind'] == file_kind:
+            references[container] = (file_kind, cached['references'])
+            current_cache[container] = cached
+        else:
+            stale_files.append((container, file_kind, Path(entry.path), stat_key))
+
+    with profiling.span('extract_references'):
+        file_kinds = [file_kind for _, file_kind, _, _ in stale_files]
+        file_paths = [file_path for _, _, file_path, _ in stale_files]
+
+        if len(stale_files) > 1 and jobs != 1:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+                extracted = list(executor.map(
+                    extract_references, file_kinds, file_paths,
+                    chunksize=max(len(stale_files) // 64, 1)
+                ))
+        else:
+            extracted = list(map(extract_references, file_kinds, file_paths))
+
+    for (container, file_kind, _, stat_key), file_references in zip(stale_files, extracted):
+        references[container] = (file_kind, file_references)
+        current_cache[container] = {
+            'kind': file_kind, 'stat': stat_key, 'references': file_references,
+        }
+
+    # Cache is rewritten if anything changed, also dropping removed files
+    if len(stale_files) > 0 or len(current_cache) != len(cached_files):
+        (project_folder / group_folder).mkdir(parents=True, exist_ok=True)
+        _save_cache(cache_path, current_cache)
+
+    return references, len(stale_files)
+
+
+def verify_project(project_folder: Path, group: str, jobs: Optional[int] = None) -> dict:
+    # Returns issues found (each a path relative to project and a message),
+    #   number of files checked and number of those that had to be read
+    group_folder = parts_folder / group
+    issues = []
+
+    def add_issue(path, message):
+        issues.append({'path': str(path), 'message': message})
+
+    # 1. Library tables
+    footprint_libraries: Dict[str, Optional[Path]] = {}
+
+    with profiling.span('check_tables'):
+        for lib_type, library_table_path in [
+            ('fp_lib_table', get_footprint_library_table(project_folder)),
+            ('sym_lib_table', get_symbol_library_table(project_folder)),
+        ]:
+            if not library_table_path.exists():
+                continue
+
+            library_table = load_library_table(lib_type, library_table_path).library_table
+            for lib in library_table.libs:
+                library_path = resolve_project_path(
+                    project_folder, str(lib.uri), KICAD_PROJECT_ENV_VAR
+                )
+
+                if library_path is not None and not library_path.exists():
+                    add_issue(
+                        library_table_path.name,
+                        f"Library {lib.name} points at missing {lib.uri}"
+                    )
+                    # Footprints of missing library are not reported again
+                    library_path = None
+
+                if lib_type == 'fp_lib_table':
+                    footprint_libraries[lib.name] = library_path
+
+    # 2. References of footprints and symbols
+    references, files_read = collect_references(project_folder, group_folder, jobs)
+
+    # Footprint library nickname -> footprint names, listed when first needed
+    footprint_listings: Dict[str, Set[str]] = {}
+
+    def footprint_exists(nickname: str, footprint_name: str) -> bool:
+        if nickname not in footprint_listings:
+            footprint_listings[nickname] = set(
+                Path(entry.name).stem
+                for entry in os.scandir(footprint_libraries[nickname])
+                if entry.name.endswith('.kicad_mod')
+            )
+
+        return footprint_name in footprint_listings[nickname]
+
+    referenced_models: Set[Path] = set()
+    # Model paths are often shared, each is only checked once
+    model_exists: Dict[Path, bool] = {}
+
+    with profiling.span('check_references'):
+        for container, (file_kind, file_references) in sorted(references.items()):
+            if file_kind == FOOTPRINT_FILE:
+                for model_path in file_references:
+                    resolved_path = resolve_project_path(
+                        project_folder, model_path, KICAD_PROJECT_ENV_VAR
+                    )
+                    if resolved_path is None:
+                        continue
+
+                    referenced_models.add(resolved_path)
+                    if resolved_path not in model_exists:
+                        model_exists[resolved_path] = resolved_path.is_file()
+                    if not model_exists[resolved_path]:
+                        add_issue(container, f"Model {model_path} does not exist")
+                continue
+
+            for symbol_name, footprint in file_references:
+                if not footprint:
+                    add_issue(container, f"Symbol {symbol_name} has no footprint")
+                    continue
+
+                nickname, separator, footprint_name = footprint.partition(':')
+                if not separator:
+                    add_issue(
+                        container,
+                        f"Footprint {footprint} of symbol {symbol_name} has no library nickname"
+                    )
+                elif nickname not in footprint_libraries:
+                    add_issue(
+                        container,
+                        f"Footprint library {nickname} of symbol {symbol_name} is not in fp-lib-table"
+                    )
+                elif footprint_libraries[nickname] is not None and \
+                        not footprint_exists(nickname, footprint_name):
+                    add_issue(
+                        container,
+                        f"Footprint {footprint} of symbol {symbol_name} does not exist"
+                    )
+
+    # 3. Models no footprint uses.  Unused models in the model store are
+    #   removed by `gc` instead
+    with profiling.span('check_models'):
+        for model_path in _scan_model_files(project_folder / group_folder / models_3d_folder):
+            if model_path not in referenced_models:
+                add_issue(
+                    model_path.relative_to(project_folder).as_posix(),
+                    "Model is not used by any footprint"
+                )
+
+    return {
+        'issues': issues,
+        'files_checked': len(references),
+        'files_read': files_read,
+    }
+
+
+def _scan_model_files(models_folder: Path) -> List[Path]:
+    # Files in model libraries (.3dshapes folders), which hold a folder per part
+    if not models_folder.is_dir():
+        return []
+
+    model_files = []
+    for library_entry in os.scandir(models_folder):
+        if not (library_entry.name.endswith('.3dshapes') and library_entry.is_dir()):
+            continue
+
+        for root, _, file_names in os.walk(library_entry.path):
+            model_files += [Path(root) / file_name for file_name in file_names]
+
+    return model_files
@@ -0,0 +1,105 @@
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+# Watches a project for symbol libraries migrated in KiCad, and hands them to
+#   be merged once KiCad is done writing.  Watched are `sym-lib-table` and the
+#   migrated libraries (`LEGACY_*.kicad_sym`) in the group's symbols folder.
+#   Polls their modification times, as file notification APIs differ per
+#   platform and are not in the standard library
+#   Migrating a library writes its .kicad_sym and then the library table, and
+#   several libraries are usually migrated in a row, so merging waits until
+#   nothing changed for `debounce` seconds and merges them all in one batch
+
+# Seconds between polls
+WATCH_INTERVAL = 0.5
+# Seconds without changes before migrated libraries are merged
+DEBOUNCE = 2.0
+
+
+class MigrationWatcher:
+    """Polls a project for migrated symbol libraries."""
+
+    def __init__(self, project_folder: Path, group: str,
+                 on_migrated: Callable[[List[str]], None],
+                 interval=WATCH_INTERVAL, debounce=DEBOUNCE):
+        from . import utils
+
+        self.project_folder = project_folder
+        self.on_migrated = on_migrated
+        self.interval = interval
+        self.debounce = debounce
+
+        self.symbol_table_path = utils.get_symbol_library_table(project_folder)
+        self.symbols_folder = project_folder / utils.parts_folder / group / \
+            utils.schematic_symbols_folder
+
+    def snapshot(self) -> Tuple:
+        # Changes whenever any watched file is written, created or removed
+        from . import utils
+
+        def stat_key(path: Path) -> Optional[Tuple[int, int]]:
+            try:
+                return utils.file_stat_key(path)
+            except FileNotFoundError:
+                return None
+
+        migrated_libraries = []
+        if self.symbols_folder.is_dir():
+            migrated_libraries = sorted(
+                self.symbols_folder.glob(f'{utils.LEGACY_PREFIX}_*.kicad_sym')
+            )
+
+        return (
+            stat_key(self.symbol_table_path),
+            tuple(
+                (library_path.name, stat_key(library_path))
+                for library_path in migrated_libraries
+            ),
+        )
+
+    def migrated_nicknames(self) -> List[str]:
+        # Entries of table switched from Legacy to KiCad type whose migrated
+        #   library has been written.  Table is only parsed again if it changed
+        from . import utils
+
+        if not self.symbol_table_path.exists():
+            return []
+
+        symbol_table = utils.load_library_table(
+            'sym_lib_table', self.symbol_table_path
+        ).library_table
+
+        return [
+            symbol_lib.name for symbol_lib in symbol_table.libs
+            if utils.is_migrated_symbol_library(symbol_lib) and
+            (self.project_folder / Path(symbol_lib.uri).relative_to(
+                utils.KICAD_PROJECT_ENV_VAR
+            )).is_file()
+        ]
+
+    def run(self):
+        # Libraries migrated before watching started are merged right away
+        last_snapshot = None
+        last_change = time.monotonic() - self.debounce
+        settled = False
+
+        while True:
+            snapshot = self.snapshot()
+            now = time.monotonic()
+
+            if snapshot != last_snapshot:
+                last_snapshot = snapshot
+                last_change = now
+                settled = False
+            elif not settled and now - last_change >= self.debounce:
+                settled = True
+
+                nicknames = self.migrated_nicknames()
+                if len(nicknames) > 0:
+                    self.on_migrated(nicknames)
+
+                # Merging changed watched files itself
+                last_snapshot = self.snapshot()
+
+            time.sleep(self.interval)
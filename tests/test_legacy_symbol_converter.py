@@ -0,0 +1,85 @@
+import unittest
+
+from manager.utils import LegacySymbol
+from manager.utils.legacy_symbol_converter import BEZIER_SEGMENTS, \
+    convert_legacy_symbol, legacy_symbol_aliases
+
+
+def legacy_symbol(draw_lines: str, extra_lines='') -> LegacySymbol:
+    return LegacySymbol.from_str(
+        "DEF TEST U 0 40 Y Y 1 F N\n"
+        'F0 "U" 0 100 50 H V C CNN\n'
+        'F1 "TEST" 0 -100 50 H V C CNN\n'
+        'F2 "Package:SOT-23" 0 -200 50 H I C CNN\n'
+        f"{extra_lines}"
+        "DRAW\n"
+        f"{draw_lines}"
+        "ENDDRAW\n"
+        "ENDDEF\n"
+    )
+
+
+class ConvertLegacySymbolTest(unittest.TestCase):
+    def test_fields_and_pins(self):
+        symbol = convert_legacy_symbol(legacy_symbol(
+            "X VDD 1 -200 0 100 R 50 50 1 1 W\n"
+            "X OUT 2 200 0 100 L 50 50 1 1 O I\n"
+        ))
+
+        self.assertEqual(symbol.libId, 'TEST')
+        self.assertEqual(
+            [(sym_property.key, sym_property.value) for sym_property in symbol.properties],
+            [('Reference', 'U'), ('Value', 'TEST'), ('Footprint', 'Package:SOT-23')]
+        )
+
+        pins = symbol.units[0].pins
+        self.assertEqual([pin.number for pin in pins], ['1', '2'])
+        self.assertEqual([pin.electricalType for pin in pins], ['power_in', 'output'])
+        self.assertEqual(pins[1].graphicalStyle, 'inverted')
+        # Mils to millimeters
+        self.assertEqual((pins[0].position.X, pins[0].length), (-5.08, 2.54))
+        self.assertEqual(pins[1].position.angle, 180)
+
+    def test_arc_takes_short_way(self):
+        # 350 to 10 degrees spans 20 degrees through 0, not 340 degrees
+        symbol = convert_legacy_symbol(legacy_symbol(
+            "A 0 0 100 3500 100 0 1 0 N\n"
+        ))
+
+        arc = symbol.units[0].graphicItems[0]
+        self.assertEqual((arc.mid.X, arc.mid.Y), (2.54, 0))
+
+    def test_half_circle_arc_is_counterclockwise(self):
+        symbol = convert_legacy_symbol(legacy_symbol(
+            "A 0 0 100 0 1800 0 1 0 N 100 0 -100 0\n"
+        ))
+
+        arc = symbol.units[0].graphicItems[0]
+        self.assertEqual((arc.start.X, arc.start.Y), (2.54, 0))
+        self.assertEqual((arc.mid.X, arc.mid.Y), (0, 2.54))
+        self.assertEqual((arc.end.X, arc.end.Y), (-2.54, 0))
+
+    def test_bezier_is_approximated_with_warning(self):
+        conversion_warnings = []
+        symbol = convert_legacy_symbol(
+            legacy_symbol("B 4 0 1 0 0 0 10 10 20 10 30 0 N\n"),
+            conversion_warnings
+        )
+
+        polyline = symbol.units[0].graphicItems[0]
+        self.assertEqual(len(polyline.points), BEZIER_SEGMENTS + 1)
+        self.assertEqual(len(conversion_warnings), 1)
+        self.assertIn('Bezier', conversion_warnings[0])
+
+    def test_symbol_with_aliases_is_refused(self):
+        aliased_symbol = legacy_symbol(
+            "S -100 100 100 -100 0 1 0 N\n", extra_lines="ALIAS TEST2 TEST3\n"
+        )
+
+        self.assertEqual(legacy_symbol_aliases(aliased_symbol), ['TEST2', 'TEST3'])
+        with self.assertRaises(Exception):
+            convert_legacy_symbol(aliased_symbol)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from manager.utils import part_index
+from manager.utils.part_index import PartIndex
+from manager.utils.transaction import Transaction
+
+
+def entry(part_number: str, category='Integrated_Circuits') -> dict:
+    return {'part_number': part_number, 'category': category}
+
+
+class PartIndexTest(unittest.TestCase):
+    def setUp(self):
+        temporary_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_folder.cleanup)
+
+        self.index_path = Path(temporary_folder.name) / part_index.PART_INDEX_FILENAME
+        self.addCleanup(part_index._part_indexes.clear)
+
+    def journal_records(self):
+        with open(self.index_path, 'r') as index_file:
+            return [json.loads(line) for line in index_file if line.strip()]
+
+    def test_updates_are_appended(self):
+        index = PartIndex(self.index_path)
+        for number in range(4):
+            index.put(entry(f'P{number}'))
+        index.save()
+
+        index.update('P0', category='Resistors')
+        index.save()
+
+        records = self.journal_records()
+        self.assertEqual(len(records), 6)
+        self.assertEqual(records[-1], {'op': 'put', 'entry': entry('P0', 'Resistors')})
+
+        reloaded = PartIndex(self.index_path)
+        self.assertEqual(reloaded.category_of('P0'), 'Resistors')
+        self.assertEqual(reloaded.parts_in_category('Integrated_Circuits'), ['P1', 'P2', 'P3'])
+
+    def test_journal_is_compacted(self):
+        index = PartIndex(self.index_path)
+        for number in range(4):
+            index.put(entry(f'P{number}'))
+        index.save()
+
+        # Journal outgrows live entries by more than COMPACTION_RATIO
+        for number in range(3):
+            index.delete(f'P{number}')
+            index.save()
+
+        records = self.journal_records()
+        self.assertEqual(records, [
+            {'op': 'format', 'version': part_index.PART_INDEX_FORMAT_VERSION},
+            {'op': 'put', 'entry': entry('P3')},
+        ])
+
+        reloaded = PartIndex(self.index_path)
+        self.assertEqual([part['part_number'] for part in reloaded], ['P3'])
+        self.assertNotIn('P0', reloaded)
+
+    def test_save_is_undone_with_its_transaction(self):
+        index = PartIndex.load(self.index_path)
+        index.put(entry('P0'))
+        index.save()
+
+        index.put(entry('P1'))
+        with self.assertRaises(RuntimeError):
+            with Transaction() as transaction:
+                index.save(transaction)
+                raise RuntimeError()
+
+        self.assertEqual(len(self.journal_records()), 2)
+        # Index holding the unsaved update is not reused
+        self.assertNotIn('P1', PartIndex.load(self.index_path))
+
+    def test_load_is_cached_until_journal_changes(self):
+        index = PartIndex.load(self.index_path)
+        index.put(entry('P0'))
+        index.save()
+
+        self.assertIs(PartIndex.load(self.index_path), index)
+
+        with open(self.index_path, 'a') as index_file:
+            index_file.write(json.dumps({'op': 'put', 'entry': entry('P1')}) + '\n')
+
+        reloaded = PartIndex.load(self.index_path)
+        self.assertIsNot(reloaded, index)
+        self.assertIn('P1', reloaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
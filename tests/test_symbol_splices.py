@@ -0,0 +1,224 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from manager import utils
+from manager.utils import kicad_sym_index
+from manager.utils.kicad_sym_index import KicadSymbolIndex, shift_offsets
+from manager.utils.transaction import Transaction
+
+
+def legacy_symbol(name: str, comment_name=None) -> 'utils.LegacySymbol':
+    return utils.LegacySymbol.from_str(
+        "#\n"
+        f"# {comment_name or name}\n"
+        "#\n"
+        f"DEF {name} U 0 40 Y Y 1 F N\n"
+        'F0 "U" 0 100 50 H V C CNN\n'
+        "DRAW\n"
+        "S -100 100 100 -100 0 1 0 N\n"
+        "ENDDRAW\n"
+        "ENDDEF\n"
+    )
+
+
+def kicad_symbol(name: str) -> str:
+    return f'  (symbol "{name}" (in_bom yes) (on_board yes)\n    (property "Reference" "U" (id 0) (at 0 0 0))\n  )\n'
+
+
+class LegacySymbolSpliceTest(unittest.TestCase):
+    def setUp(self):
+        temporary_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_folder.cleanup)
+
+        self.library_path = Path(temporary_folder.name) / 'LEGACY_Test.lib'
+        self.library_path.write_text(utils.LegacySymbolLibrary([
+            legacy_symbol('A'), legacy_symbol('B'), legacy_symbol('C')
+        ]).to_str())
+
+        self.addCleanup(utils._legacy_symbol_indexes.clear)
+
+    def assert_library_holds(self, names):
+        library = utils.LegacySymbolLibrary.from_str(self.library_path.read_text())
+        self.assertEqual([symbol.name for symbol in library.symbols], names)
+        self.assertTrue(self.library_path.read_text().endswith('#End Library'))
+
+        # Index kept up to date by commit is the same as a fresh scan, and as
+        #   the one saved beside library
+        kept_index = utils.get_legacy_symbol_index(self.library_path)
+
+        utils._legacy_symbol_indexes.clear()
+        saved_index = utils.get_legacy_symbol_index(self.library_path)
+
+        utils._legacy_symbol_indexes.clear()
+        utils.legacy_symbol_index_path(self.library_path).unlink()
+        scanned_index = utils.get_legacy_symbol_index(self.library_path)
+
+        self.assertEqual(kept_index.symbols, scanned_index.symbols)
+        self.assertEqual(saved_index.symbols, scanned_index.symbols)
+        self.assertEqual(list(scanned_index.symbols), names)
+
+        library_bytes = self.library_path.read_bytes()
+        for name, (start, end) in scanned_index.symbols.items():
+            symbol_bytes = library_bytes[start:end]
+            self.assertTrue(symbol_bytes.startswith(f'DEF {name} '.encode('utf-8')))
+            self.assertTrue(symbol_bytes.endswith(b'ENDDEF\n'))
+
+    def test_append(self):
+        utils.get_legacy_symbol_index(self.library_path)
+
+        with Transaction() as transaction:
+            utils.append_legacy_symbols(
+                self.library_path, [legacy_symbol('D'), legacy_symbol('E')],
+                transaction
+            )
+
+        self.assert_library_holds(['A', 'B', 'C', 'D', 'E'])
+
+    def test_replace(self):
+        replacement = legacy_symbol('B')
+        replacement.rest_of_file = replacement.rest_of_file.replace(
+            'S -100 100 100 -100', 'S -200 200 200 -200'
+        )
+
+        with Transaction() as transaction:
+            utils.replace_legacy_symbols(
+                self.library_path, {'B': replacement}, [legacy_symbol('D')],
+                transaction
+            )
+
+        self.assert_library_holds(['A', 'B', 'C', 'D'])
+        self.assertIn('S -200 200 200 -200', self.library_path.read_text())
+
+    def test_remove(self):
+        with Transaction() as transaction:
+            utils.remove_legacy_symbols(self.library_path, ['A', 'C'], transaction)
+
+        self.assert_library_holds(['B'])
+        # Comment blocks go along with their symbols
+        self.assertNotIn('# A\n', self.library_path.read_text())
+        self.assertNotIn('# C\n', self.library_path.read_text())
+
+    def test_remove_with_sanitized_comment_block(self):
+        self.library_path.write_text(utils.LegacySymbolLibrary([
+            legacy_symbol('A'),
+            legacy_symbol('MCP1402T-E/OT', comment_name='MCP1402T-E_OT'),
+            legacy_symbol('C')
+        ]).to_str())
+
+        with Transaction() as transaction:
+            utils.remove_legacy_symbols(
+                self.library_path, ['MCP1402T-E/OT'], transaction
+            )
+
+        self.assert_library_holds(['A', 'C'])
+        self.assertNotIn('MCP1402T-E_OT', self.library_path.read_text())
+
+    def test_failed_commit_leaves_library_and_index(self):
+        library_before = self.library_path.read_bytes()
+        index_before = dict(utils.get_legacy_symbol_index(self.library_path).symbols)
+
+        with self.assertRaises(RuntimeError):
+            with Transaction() as transaction:
+                utils.remove_legacy_symbols(self.library_path, ['B'], transaction)
+                raise RuntimeError()
+
+        self.assertEqual(self.library_path.read_bytes(), library_before)
+        self.assertEqual(
+            utils.get_legacy_symbol_index(self.library_path).symbols, index_before
+        )
+
+
+class KicadSymbolSpliceTest(unittest.TestCase):
+    def setUp(self):
+        temporary_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_folder.cleanup)
+
+        self.library_path = Path(temporary_folder.name) / 'Test.kicad_sym'
+        self.library_path.write_text(
+            '(kicad_symbol_lib (version 20211014) (generator kicad_component_manager)\n' +
+            kicad_symbol('A') + kicad_symbol('B') + kicad_symbol('C') +
+            ')\n'
+        )
+
+        self.addCleanup(kicad_sym_index._kicad_symbol_indexes.clear)
+
+    def assert_library_holds(self, names):
+        import kiutils.symbol
+
+        library = kiutils.symbol.SymbolLib.from_file(str(self.library_path))
+        self.assertEqual([symbol.libId for symbol in library.symbols], names)
+
+        # Index kept up to date by commit is the same as a fresh scan, and as
+        #   the one saved beside library
+        kept_index = kicad_sym_index.get_kicad_symbol_index(self.library_path)
+
+        kicad_sym_index._kicad_symbol_indexes.clear()
+        saved_index = kicad_sym_index.get_kicad_symbol_index(self.library_path)
+
+        scanned_index = KicadSymbolIndex.from_bytes(self.library_path.read_bytes())
+
+        for index in [kept_index, saved_index]:
+            self.assertEqual(index.symbols, scanned_index.symbols)
+            self.assertEqual(index.library_end, scanned_index.library_end)
+        self.assertEqual(list(scanned_index.symbols), names)
+
+    def test_index_is_saved_beside_library(self):
+        index = kicad_sym_index.get_kicad_symbol_index(self.library_path)
+        kicad_sym_index._kicad_symbol_indexes.clear()
+
+        self.assertTrue(kicad_sym_index.kicad_symbol_index_path(self.library_path).is_file())
+        self.assertEqual(
+            kicad_sym_index._load_kicad_symbol_index(self.library_path, index.stat_key),
+            index
+        )
+
+    def test_append(self):
+        with Transaction() as transaction:
+            kicad_sym_index.append_kicad_symbols(
+                self.library_path, {'D': kicad_symbol('D')}, transaction
+            )
+
+        self.assert_library_holds(['A', 'B', 'C', 'D'])
+
+    def test_replace(self):
+        with Transaction() as transaction:
+            kicad_sym_index.replace_kicad_symbols(
+                self.library_path, ['B'], {'B': kicad_symbol('B')}, transaction
+            )
+
+        self.assert_library_holds(['A', 'C', 'B'])
+
+    def test_remove(self):
+        with Transaction() as transaction:
+            kicad_sym_index.remove_kicad_symbols(
+                self.library_path, ['A', 'C'], transaction
+            )
+
+        self.assert_library_holds(['B'])
+
+    def test_remove_all(self):
+        with Transaction() as transaction:
+            kicad_sym_index.remove_kicad_symbols(
+                self.library_path, ['A', 'B', 'C'], transaction
+            )
+
+        self.assert_library_holds([])
+
+
+class ShiftOffsetsTest(unittest.TestCase):
+    def test_shift_offsets(self):
+        symbols = {'A': (0, 10), 'C': (30, 40), 'E': (60, 70)}
+
+        shifted = shift_offsets(symbols, [(10, 30), (40, 45)])
+
+        self.assertEqual(shifted, {'A': (0, 10), 'C': (10, 20), 'E': (35, 45)})
+
+    def test_no_removed_ranges(self):
+        symbols = {'A': (0, 10)}
+
+        self.assertEqual(shift_offsets(symbols, []), symbols)
+
+
+if __name__ == '__main__':
+    unittest.main()
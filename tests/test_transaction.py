@@ -0,0 +1,162 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from manager.utils.transaction import Transaction, recover_transactions
+
+
+class TransactionTest(unittest.TestCase):
+    def setUp(self):
+        temporary_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_folder.cleanup)
+
+        self.folder = Path(temporary_folder.name)
+
+        self.spliced_path = self.folder / 'spliced.txt'
+        self.spliced_path.write_bytes(b'kept|old tail')
+        self.replaced_path = self.folder / 'replaced.txt'
+        self.replaced_path.write_text('old contents')
+        self.deleted_path = self.folder / 'deleted.txt'
+        self.deleted_path.write_text('deleted contents')
+        self.created_path = self.folder / 'created.txt'
+
+    def stage_changes(self, transaction: Transaction):
+        transaction.splice(self.spliced_path, len(b'kept|'), b'new tail')
+        transaction.write_text(self.replaced_path, 'new contents')
+        transaction.write_text(self.created_path, 'created contents')
+        transaction.delete(self.deleted_path)
+
+    def assert_untouched(self):
+        self.assertEqual(self.spliced_path.read_bytes(), b'kept|old tail')
+        self.assertEqual(self.replaced_path.read_text(), 'old contents')
+        self.assertEqual(self.deleted_path.read_text(), 'deleted contents')
+        self.assertFalse(self.created_path.exists())
+
+        # No temporaries, backups or journals are left behind
+        self.assertEqual(
+            sorted(os.listdir(self.folder)),
+            ['deleted.txt', 'replaced.txt', 'spliced.txt']
+        )
+
+    def test_commit(self):
+        committed = []
+
+        with Transaction(journal_folder=self.folder) as transaction:
+            self.stage_changes(transaction)
+            transaction.on_commit(lambda: committed.append(True))
+
+        self.assertEqual(self.spliced_path.read_bytes(), b'kept|new tail')
+        self.assertEqual(self.replaced_path.read_text(), 'new contents')
+        self.assertEqual(self.created_path.read_text(), 'created contents')
+        self.assertFalse(self.deleted_path.exists())
+        self.assertEqual(committed, [True])
+
+        self.assertEqual(
+            sorted(os.listdir(self.folder)),
+            ['created.txt', 'replaced.txt', 'spliced.txt']
+        )
+
+    def test_rollback_on_exception(self):
+        with self.assertRaises(RuntimeError):
+            with Transaction(journal_folder=self.folder) as transaction:
+                self.stage_changes(transaction)
+                raise RuntimeError()
+
+        self.assert_untouched()
+
+    def test_failed_commit_is_undone(self):
+        # A folder cannot be replaced by a file, so commit fails after the
+        #   splice and some renames were applied
+        blocking_folder = self.folder / 'blocking'
+        (blocking_folder / 'child').mkdir(parents=True)
+
+        transaction = Transaction(journal_folder=self.folder)
+        self.stage_changes(transaction)
+        transaction.write_text(blocking_folder, 'contents')
+
+        with self.assertRaises(OSError):
+            transaction.commit()
+
+        (blocking_folder / 'child').rmdir()
+        blocking_folder.rmdir()
+        self.assert_untouched()
+
+    def test_interrupted_commit_is_recovered(self):
+        # As if process died after applying every change, but before the
+        #   commit point
+        transaction = Transaction(journal_folder=self.folder)
+        self.stage_changes(transaction)
+        transaction._apply(transaction._write_journal())
+        transaction._staging_log.close()
+
+        self.assertEqual(self.spliced_path.read_bytes(), b'kept|new tail')
+
+        recovered = recover_transactions(self.folder)
+
+        self.assertEqual(len(recovered), 1)
+        self.assert_untouched()
+
+    def test_rollback_removes_created_folders_and_temporaries(self):
+        with self.assertRaises(RuntimeError):
+            with Transaction(journal_folder=self.folder) as transaction:
+                transaction.make_folder(self.folder / 'new' / 'nested')
+                transaction.write_text(self.folder / 'new' / 'nested' / 'file.txt', 'contents')
+                transaction.temporary_path(self.folder).write_text('contents')
+                raise RuntimeError()
+
+        self.assert_untouched()
+
+    def test_committed_folders_are_kept(self):
+        with Transaction(journal_folder=self.folder) as transaction:
+            transaction.make_folder(self.folder / 'new')
+            temporary_path = transaction.temporary_path(self.folder / 'new')
+            temporary_path.write_text('contents')
+            transaction.adopt(temporary_path, self.folder / 'new' / 'adopted.txt')
+
+        self.assertEqual((self.folder / 'new' / 'adopted.txt').read_text(), 'contents')
+        self.assertEqual(
+            sorted(os.listdir(self.folder)),
+            ['deleted.txt', 'new', 'replaced.txt', 'spliced.txt']
+        )
+
+    def test_staging_of_crashed_transaction_is_recovered(self):
+        # As if process died while staging, before commit
+        transaction = Transaction(journal_folder=self.folder)
+        transaction.make_folder(self.folder / 'new' / 'nested')
+        transaction.write_text(self.folder / 'new' / 'nested' / 'file.txt', 'contents')
+        self.stage_changes(transaction)
+        transaction.temporary_path(self.folder).write_text('contents')
+        transaction._staging_log.close()
+
+        self.assertEqual(recover_transactions(self.folder), [])
+        self.assert_untouched()
+
+    def test_recovery_without_journal_changes_nothing(self):
+        self.assertEqual(recover_transactions(self.folder), [])
+        self.assert_untouched()
+
+    def test_splicing_twice_is_refused(self):
+        transaction = Transaction()
+        transaction.splice(self.spliced_path, 0, b'first')
+
+        with self.assertRaises(Exception):
+            transaction.splice(self.spliced_path, 0, b'second')
+        with self.assertRaises(Exception):
+            transaction.write_text(self.spliced_path, 'contents')
+
+        transaction.rollback()
+
+    def test_splicing_staged_file_is_refused(self):
+        transaction = Transaction()
+        transaction.write_text(self.replaced_path, 'new contents')
+
+        with self.assertRaises(Exception):
+            transaction.splice(self.replaced_path, 0, b'spliced')
+
+        transaction.rollback()
+        self.assert_untouched()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.synthetic import write_synthetic_bundle
+from manager import operations
+
+GROUP = 'Extern'
+
+
+class VerifyAfterImportTest(unittest.TestCase):
+    def setUp(self):
+        temporary_folder = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_folder.cleanup)
+
+        self.folder = Path(temporary_folder.name)
+        self.project_folder = self.folder / 'project'
+        self.project_folder.mkdir()
+
+    def add_parts(self, number_of_parts: int, first_index=0):
+        bundle_path = write_synthetic_bundle(
+            self.folder / f'bundle_{first_index}.zip', number_of_parts,
+            first_index=first_index
+        )
+
+        operations.add_parts(
+            str(self.project_folder), GROUP, [str(bundle_path)],
+            jobs=1, footprint_cache=False
+        )
+
+    def test_verify_in_same_process_as_add(self):
+        # Library tables cached by `add` hold the entries it created
+        self.add_parts(2)
+
+        result = operations.verify_project(str(self.project_folder), GROUP, jobs=1)
+
+        self.assertEqual(result['issues'], [])
+        self.assertEqual(result['files_checked'], 3)
+
+    def test_verify_after_second_add(self):
+        self.add_parts(2)
+        operations.verify_project(str(self.project_folder), GROUP, jobs=1)
+        self.add_parts(1, first_index=2)
+
+        result = operations.verify_project(str(self.project_folder), GROUP, jobs=1)
+
+        # Only the new footprint is read again
+        self.assertEqual(result['issues'], [])
+        self.assertEqual(result['files_read'], 1)
+
+    def test_verify_relative_project_folder(self):
+        self.add_parts(1)
+
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.folder)
+
+        result = operations.verify_project('project', GROUP, jobs=1)
+
+        self.assertEqual(result['issues'], [])
+
+    def test_verify_reports_missing_model(self):
+        self.add_parts(1)
+
+        for model_path in (self.project_folder / 'parts').rglob('*.stp'):
+            model_path.unlink()
+
+        result = operations.verify_project(str(self.project_folder), GROUP, jobs=1)
+
+        self.assertEqual(len(result['issues']), 1)
+        self.assertIn("does not exist", result['issues'][0]['message'])
+
+
+if __name__ == '__main__':
+    unittest.main()